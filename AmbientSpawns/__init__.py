@@ -1,11 +1,22 @@
-import math, random
-from typing import List, Tuple
+from array import array
+import itertools, random, time
+from typing import Dict, Iterator, List, Sequence, Tuple
 import unrealsdk
 from unrealsdk import Log
 
 from Mods import ModMenu
 from Mods.AmbientSpawns import custom_spawns
+from Mods.AmbientSpawns import frame_budget
 from Mods.AmbientSpawns import level_packages
+from Mods.AmbientSpawns import map_cache
+from Mods.AmbientSpawns import population
+from Mods.AmbientSpawns import scheduler
+from Mods.AmbientSpawns import spawn_pipeline
+from Mods.AmbientSpawns import spawn_plan
+from Mods.AmbientSpawns import weighted_tables
+from Mods.AmbientSpawns import spatial_index
+from Mods.AmbientSpawns import spawn_geometry
+from Mods.AmbientSpawns import visibility
 from Mods.AmbientSpawns.level_packages import *
 try:
     from Mods.UserFeedback import TrainingBox
@@ -174,6 +185,19 @@ FACTORY_EXCLUDED_FROM_ALLEGIANCE_CHANGE = [
 
 MIN_TIME_DURATION = 10
 
+SETUP_FRAME_BUDGET = 0.004
+"""Seconds of each frame that SetupDensAndCustoms can use, so the map setup doesn't hitch when we spawn in"""
+SETUP_READY_FRACTION = 0.5
+"""Fraction of the map's dens that need to be set up before the spawn timer can fire"""
+SPAWN_RECHECK_DELAY = 1
+"""Seconds to wait before trying a spawn again, if the spawn timer fired before we could start one
+ (e.g. not enough dens set up yet, too many groups already spawning, or the frame time is way over budget)"""
+MAX_AMBIENT_SPAWNS_DEFAULT = 40
+MAX_DEN_SPAWNS_DEFAULT = 12
+FRAME_BUDGET_DEFAULT = 33
+FRAME_BUDGET_DESCRIPTION = "The longest frame time (in ms) to allow before ambient spawns back off - slowing down, spawning smaller groups," \
+    " or waiting until the game has caught up. 33ms is 30 FPS. 0 never backs off."
+
 
 class SpawnPool(enum.IntEnum):
     DEN = enum.auto()
@@ -182,35 +206,76 @@ class SpawnPool(enum.IntEnum):
     GAME = enum.auto()
 
 
+class PackageLoading(enum.IntEnum):
+    MAIN_MENU = enum.auto()
+    """Load every DLC's combat packages upon reaching the main menu"""
+    ON_DEMAND = enum.auto()
+    """Load each DLC's combat packages when we enter one of its maps, and release the least recently used"""
+
+
 class DenSpawnInfo:
-    """Stores the info and spawns that we use from a den"""
+    """
+    Stores the info and spawns that we use from a den.
+    Spawns are stored as arrays of indexes into the map's spawn lists, since many dens share the same spawns.
+    """
+    __slots__ = ("denObject", "index", "needsFOVCheck", "baseSpawn", "levelSpawns", "customSpawns", "fovCustomSpawns",
+                 "blankPoints", "pointIndexes", "pointsByDef", "spawnTables")
+    
     def __init__(self) -> None:
-        self.denObject: object
+        self.denObject: object = None
+        self.index: int = 0
+        """This den's index in mapDenInfos and the den LocationTable"""
         self.needsFOVCheck: bool = True
-        self.baseSpawn: custom_spawns.CustomSpawn
+        self.baseSpawn: custom_spawns.CustomSpawn = None
         """The default spawns from this den's own PopDef"""
-        self.levelSpawns: List[custom_spawns.CustomSpawn] = []
-        """All valid spawns from this level"""
-        self.customSpawns: List[custom_spawns.CustomSpawn] = []
-        """All valid spawns from our custom spawn list"""
-        self.fovCustomSpawns: List[custom_spawns.CustomSpawn] = []
-        """All valid custom spawns that can spawn from a blank point in view"""
-        self.blankPoints: List[object] = []
-        """List of all blank spawn points for this den"""
-    
-    def FindFOVSpawns(self):
+        self.levelSpawns: array = array("H")
+        """Indexes in mapNormalSpawns of all valid spawns from this level"""
+        self.customSpawns: array = array("H")
+        """Indexes in mapCustomSpawns of all valid spawns from our custom spawn list"""
+        self.fovCustomSpawns: array = array("H")
+        """Indexes in mapCustomSpawns of all valid custom spawns that can spawn from a blank point in view"""
+        self.blankPoints: array = array("I")
+        """Indexes in mapPoints of all blank spawn points for this den"""
+        self.pointIndexes: range = range(0)
+        """Indexes of this den's spawn points in mapPoints and the spawn point LocationTable"""
+        self.pointsByDef: Dict[str, array] = {}
+        """Indexes in mapPoints of this den's spawn points with each PointDef name, with blank points under "None" """
+        self.spawnTables: Dict[str, custom_spawns.TagWeightedTable] = None
+        """Cached weighted tables for each of our spawn lists, built the first time we pick from them"""
+    
+    def GetSpawnTable(self, listName: str, mapSpawns: List[custom_spawns.Spawn]) -> custom_spawns.TagWeightedTable:
+        """Returns the TagWeightedTable for one of our spawn lists e.g. 'customSpawns', given the map spawn list it indexes"""
+        if self.spawnTables is None:
+            self.spawnTables = {}
+        table = self.spawnTables.get(listName)
+        if table is None:
+            table = custom_spawns.TagWeightedTable([mapSpawns[i] for i in getattr(self, listName)])
+            self.spawnTables[listName] = table
+        return table
+    
+    def PartitionPoints(self, mapPoints: List[object]):
+        """Sorts our spawn points by PointDef once, so picking a spawn point for a spawnPointDef is just a lookup"""
+        self.pointsByDef = {}
+        for i in self.pointIndexes:
+            point = mapPoints[i]
+            name = point.PointDef.Name if point.PointDef else "None"
+            self.pointsByDef.setdefault(name, array("I")).append(i)
+        self.blankPoints = self.pointsByDef.get("None", array("I"))
+    
+    def FindFOVSpawns(self, mapCustomSpawns: List[custom_spawns.Spawn]):
         if len(self.blankPoints) == 0:
             self.needsFOVCheck = False
             return
         self.needsFOVCheck = True
-        for spawn in self.customSpawns:
+        for i in self.customSpawns:
+            spawn = mapCustomSpawns[i]
             if isinstance(spawn, custom_spawns.CustomSpawn):
                 if spawn.popDef:
                     path = spawn.popDef
                 else:
                     path = spawn.factory
                 if any(x in path for x in POPDEF_PREFIX_EXCLUDED_FROM_FOV_CHECKS):
-                    self.fovCustomSpawns.append(spawn)
+                    self.fovCustomSpawns.append(i)
                     self.needsFOVCheck = False
 
 
@@ -220,9 +285,10 @@ class AmbientSpawns(ModMenu.SDKMod):
         "Periodically spawns random groups of enemies.\n\n" \
         "Options for controlling the frequency and distance of spawns, " \
         "and also whether custom groups of enemies can spawn.\n\n" \
-        "If enabled, enemies from all levels are loaded upon reaching the main menu, causing a delay."
+        "If enabled, enemies from all levels are loaded upon reaching the main menu, causing a delay, " \
+        "unless Package Loading is set to ON_DEMAND."
     Author: str = "Siggles"
-    Version: str = "1.3.1"
+    Version: str = "1.4.0"
     SaveEnabledState: ModMenu.EnabledSaveType = ModMenu.EnabledSaveType.LoadWithSettings
 
     Types: ModMenu.ModTypes = ModMenu.ModTypes.Gameplay
@@ -234,18 +300,30 @@ class AmbientSpawns(ModMenu.SDKMod):
     timeRandomRange: int = 10
     
     justLoadedIn: bool = False
-    isSpawning: bool = False
-    lastSpawnDelayTime = 0
-    currentSpawnDelay = 0.1
-    currentSpawnDen = None
-    currentSpawnList = []
     lastChosenSpawnPoint = None
     
     initialMaxActorCost = None
     """To reset PopulationMaster's MaxActorCost on blacklisted maps or option disabled."""
     
+    setupJob: Iterator[None] = None
+    """The SetupDensAndCustoms generator, while it is still running"""
+    spawnCheckEvent: scheduler.ScheduledEvent = None
+    """The next time we try a new spawn, while one is pending"""
+    spawnTickEvent: scheduler.ScheduledEvent = None
+    """The next time an entry in the spawn pipeline is due"""
+    frameSampleEvent: scheduler.ScheduledEvent = None
+    """The next frame time sample for the frame budget, while we have one set"""
+    planEvent: scheduler.ScheduledEvent = None
+    """The next time we start or carry on planning the next spawn"""
+    planJob: Iterator[None] = None
+    """The PlanSpawn generator, while it is still running"""
+    spawnPlan: spawn_plan.SpawnPlan = None
+    """The next spawn, planned ahead of the spawn timer running out"""
+    frameState: frame_budget.FrameState = frame_budget.FrameState.OFF
+    
     megaMixActive = None
     pool: SpawnPool = None
+    packageLoading: PackageLoading = None
     currentDLC: DLC = DLC.BL2
 
     #Keybinds = [ModMenu.Keybind("Spawn Now", "P")]
@@ -259,12 +337,41 @@ class AmbientSpawns(ModMenu.SDKMod):
     def __init__(self) -> None:
         super().__init__()
         
+        self.scheduler = scheduler.Scheduler(f"{self.Name}.PlayerTick")
+        """ Runs our spawn timer and spawn delays from the PlayerTick, only while one is pending """
+        self.pipeline = spawn_pipeline.SpawnPipeline()
+        """ The groups currently being spawned """
+        self.frameBudget = frame_budget.FrameBudget(FRAME_BUDGET_DEFAULT)
+        """ Throttles spawning while the frame time is over the user's budget """
+        self.population = population.PopulationTracker(MAX_AMBIENT_SPAWNS_DEFAULT, MAX_DEN_SPAWNS_DEFAULT)
+        """ Our ambient spawns that are still alive, to cap how many there are at once """
+        
         self.mapDens = []
         """ A list of all PopulationOpportunityDens in the current map with at SpawnData least one available SpawnPoint """
         self.mapPopDefs = []
         """ A list of all PopDefs in the current map - to use for custom Spawn Pools """
+        self.mapNormalSpawns: List[custom_spawns.CustomSpawn] = []
+        """ CustomSpawns made from each unique PopDef in the current map """
+        self.mapCustomSpawns: List[custom_spawns.Spawn] = []
+        """ Spawns from our custom spawn list that could be loaded in the current map """
         self.mapDenInfos: List[DenSpawnInfo] = []
         """ A list of all DenSpawnInfos for each Den in the current map """
+        self.denGrid: spatial_index.DenGrid = None
+        """ Spatial index of mapDenInfos indexes, for finding dens near the player """
+        self.denCandidates = spatial_index.CandidateRing()
+        """ The dens near the player from the last spawn attempt, so we only recheck those that could have changed """
+        self.denLocations: spawn_geometry.LocationTable = None
+        """ Packed locations of each den in mapDenInfos, for scoring them all at once """
+        self.mapPoints: List[object] = []
+        """ All usable spawn points from every den in the current map """
+        self.pointLocations: spawn_geometry.LocationTable = None
+        """ Packed locations of each spawn point in mapPoints """
+        self.pointVisibility: visibility.VisibilityCache = None
+        """ Which spawn points were in view for the group we're planning, tested against the camera frustum """
+        self.denPointIndexes: List[range] = []
+        """ The range of each den's spawn points in mapPoints, in mapDens order """
+        self.gameStageCache: Dict[Tuple[object, object], int] = {}
+        """ (den, its GameStageRegion) -> game stage, until the map changes or the player's progress does """
         
         self.frequencySlider = ModMenu.Options.Slider(
             Caption="Frequency",
@@ -285,6 +392,30 @@ class AmbientSpawns(ModMenu.SDKMod):
             Description="Increases the maximum possible number of enemies spawned at once, by 3x. Disable this if you have other mods that affect this.",
             StartingValue=True,
         )
+        self.maxSpawnsSlider = ModMenu.Options.Slider(
+            Caption="Max Ambient Enemies",
+            Description="The most ambient spawned enemies that can be alive at once. New spawns wait until some are killed. 0 for no limit.",
+            StartingValue=MAX_AMBIENT_SPAWNS_DEFAULT,
+            MinValue=0,
+            MaxValue=100,
+            Increment=5,
+        )
+        self.maxDenSpawnsSlider = ModMenu.Options.Slider(
+            Caption="Max Enemies Per Den",
+            Description="The most ambient spawned enemies that can be alive at once from a single den. 0 for no limit.",
+            StartingValue=MAX_DEN_SPAWNS_DEFAULT,
+            MinValue=0,
+            MaxValue=50,
+            Increment=1,
+        )
+        self.frameBudgetSlider = ModMenu.Options.Slider(
+            Caption="Frame Time Budget",
+            Description=FRAME_BUDGET_DESCRIPTION,
+            StartingValue=FRAME_BUDGET_DEFAULT,
+            MinValue=0,
+            MaxValue=100,
+            Increment=1,
+        )
         self.distanceMinSlider = ModMenu.Options.Slider(
             Caption="Min Distance",
             Description="Only spawn points between the Min Distance and Max Distance from the player are valid.",
@@ -326,6 +457,22 @@ class AmbientSpawns(ModMenu.SDKMod):
             Description="Whether enemies can substituted for similar variants, e.g. Hyperion loaders with Torgue loaders.",
             StartingValue=False,
         )
+        self.packageLoadingSpinner = ModMenu.Options.Spinner(
+            Caption="Package Loading",
+            Description="When enemies from other levels are loaded, for the DLC/GAME pools or Mega Mix." \
+                    "\nMAIN_MENU loads every level upon entering the main menu." \
+                    "\nON_DEMAND loads only the current DLC's levels (and the base game's for Mega Mix) when you enter one of its maps," \
+                    f" keeping up to {level_packages.MAX_ON_DEMAND_DLCS} DLCs loaded." \
+                    " The GAME pool needs every DLC, so it loads them all while setting up the first map instead.",
+            StartingValue=PackageLoading.MAIN_MENU.name,
+            Choices=[x.name for x in PackageLoading],
+        )
+        self.mapCacheSwitch = ModMenu.Options.Boolean(
+            Caption="Cache Map Setup",
+            Description="Saves the dens and spawns found for each map, so loading back into a map is faster." \
+                    "\nDisabling this deletes the cache.",
+            StartingValue=True,
+        )
          
         badass_tags = [
             ("CHUMP", "Chump (e.g. Marauders, Psychos, Midgets, GUN loaders)"),
@@ -357,12 +504,17 @@ class AmbientSpawns(ModMenu.SDKMod):
             self.frequencySlider,
             self.combatSwitch,
             self.spawnCapSwitch,
+            self.maxSpawnsSlider,
+            self.maxDenSpawnsSlider,
+            self.frameBudgetSlider,
             self.distanceMinSlider,
             self.distanceMaxSlider,
             self.targetPlayerSwitch,
             self.customSpawnSlider,
             self.spawnPoolSpinner,
             self.megaMixSwitch,
+            self.packageLoadingSpinner,
+            self.mapCacheSwitch,
             *weight_options
         ]
     
@@ -372,6 +524,8 @@ class AmbientSpawns(ModMenu.SDKMod):
             self.timeRandomRange = int(new_value / 3)
             if self.timeForNextSpawn > self.averageTimeForNextSpawn:
                 self.timeForNextSpawn = self.averageTimeForNextSpawn
+                if self.spawnCheckEvent:
+                    self.ScheduleSpawnCheck(self.lastTime + self.timeForNextSpawn)
         elif option == self.megaMixSwitch:
             if self.megaMixActive and new_value:
                 self.ShowPackageLoadingHelp()
@@ -382,12 +536,29 @@ class AmbientSpawns(ModMenu.SDKMod):
                 self.pool >= SpawnPool.DLC and SpawnPool[new_value] < SpawnPool.DLC):
                 self.ShowPackageLoadingHelp()
             self.pool = SpawnPool[new_value]
+        elif option == self.packageLoadingSpinner:
+            # Not on the first call, while the settings are loading
+            if self.packageLoading and self.packageLoading is not PackageLoading[new_value] and \
+                PackageLoading[new_value] is PackageLoading.MAIN_MENU and (self.megaMixActive or self.pool >= SpawnPool.DLC):
+                self.ShowPackageLoadingHelp()
+            self.packageLoading = PackageLoading[new_value]
+        elif option == self.mapCacheSwitch:
+            if not new_value:
+                map_cache.Clear()
+        elif option == self.maxSpawnsSlider:
+            self.population.maxTotal = new_value
+        elif option == self.maxDenSpawnsSlider:
+            self.population.maxPerDen = new_value
+        elif option == self.frameBudgetSlider:
+            self.frameBudget.SetBudget(new_value)
+            self.UpdateFrameState()
+            self.StartFrameSampling()
             
         # Handle changes to the badass weight sliders
         for tag, slider in self.badassWeightSliders.items():
             if option == slider:
-                # Use the correct dictionary 'BadassTagWeights'
-                custom_spawns.BadassTagWeights[tag] = new_value
+                # Use the correct dictionary 'BadassTagWeights', and let the cached spawn tables know
+                custom_spawns.SetBadassTagWeight(tag, new_value)
                 return
     
     packageLoadingHelpSeen: bool = False
@@ -416,6 +587,9 @@ class AmbientSpawns(ModMenu.SDKMod):
 
         self.initialMaxActorCost = None # PopulationMaster changes on save quit.
         if self.megaMixActive or self.pool >= SpawnPool.DLC:
+            if self.IsLoadingOnDemand():
+                # Each DLC's packages get loaded when we enter one of its maps instead
+                return True
             if not level_packages.loaded_DLCs:
                 Log(f"[{__name__}] Loading ALL REQUIRED PACKAGES")
             for deeellcee in level_packages.combat_packages_by_DLC:
@@ -425,6 +599,7 @@ class AmbientSpawns(ModMenu.SDKMod):
             if level_packages.loaded_DLCs:
                 Log(f"[{__name__}] Unloading all spawn objects")
             level_packages.UnloadLevelSpawnObjects()
+            custom_spawns.PrunePopDefCache()
         return True
     
     @ModMenu.Hook("WillowGame.WillowPlayerController.WillowClientShowLoadingMovie")
@@ -433,21 +608,41 @@ class AmbientSpawns(ModMenu.SDKMod):
         We make sure to disable spawning incase the timer is active when we transition, causing a crash.
         """
         if not self.justLoadedIn: # I.E. We're just starting to load a new map
-            unrealsdk.RemoveHook("WillowGame.WillowPlayerController.PlayerTick", f"{self.Name}.PlayerTick")
+            self.ClearScheduler()
+            self.frameBudget.Reset()
+            self.UpdateFrameState()
+            self.population.Clear()
             self.EndSpawning()
-            self.currentSpawnList = []
+            self.setupJob = None
             self.mapDenInfos = []
+            self.denGrid = None
+            self.denCandidates.Clear()
+            self.denLocations = None
+            self.mapPoints = []
+            self.pointLocations = None
+            self.pointVisibility = None
+            self.denPointIndexes = []
             self.mapDens = []
             self.mapNormalSpawns = []
             self.mapCustomSpawns = []
+            self.gameStageCache = {}
+            custom_spawns.ClearMapCaches()
         # For some reason this function is called after loading in too so we need to flag that
         self.justLoadedIn = False
         return True
     
+    @ModMenu.Hook("WillowGame.WillowPlayerController.OnExpLevelChange")
+    @ModMenu.Hook("WillowGame.WillowPlayerController.ServerCompleteMission")
+    def ProgressChanged(self, caller: unrealsdk.UObject, function: unrealsdk.UFunction, params: unrealsdk.FStruct) -> bool:
+        """ Levelling up or completing a mission can change the game stages we fall back on, so work them out again """
+        self.gameStageCache = {}
+        return True
+    
     @ModMenu.Hook("WillowGame.WillowPlayerController.WillowClientDisableLoadingMovie")
     def SpawnedIn(self, caller: unrealsdk.UObject, function: unrealsdk.UFunction, params: unrealsdk.FStruct) -> bool:
         """ The hooked function gets called when we load any map """
         self.justLoadedIn = True
+        self.setupJob = None
         PC = unrealsdk.GetEngine().GamePlayers[0].Actor
         if not PC.IsPrimaryPlayer() or int(unrealsdk.GetEngine().GetCurrentWorldInfo().NetMode) == 3:
             Log(f"[{__name__}] Either not primary player or a client, so no ambient spawn triggers.")
@@ -458,7 +653,7 @@ class AmbientSpawns(ModMenu.SDKMod):
         self.mapName = PC.WorldInfo.GetStreamingPersistentMapName()
         if self.mapName in BLACKLIST_MAPS:
             Log(f"[{__name__}] {self.mapName} is a blacklisted map. No ambient spawns.")
-            unrealsdk.RemoveHook("WillowGame.WillowPlayerController.PlayerTick", f"{self.Name}.PlayerTick")
+            self.ClearScheduler()
             if popMaster and self.spawnCapSwitch.CurrentValue and self.initialMaxActorCost:
                 popMaster.MaxActorCost = self.initialMaxActorCost
                 self.initialMaxActorCost = None
@@ -469,91 +664,395 @@ class AmbientSpawns(ModMenu.SDKMod):
             self.initialMaxActorCost = popMaster.MaxActorCost
             popMaster.MaxActorCost = popMaster.MaxActorCost * 3
         
-        self.SetupDensAndCustoms(self.mapName, self.currentDLC)
+        # Set up the dens over the next few ticks instead of all at once here
+        self.mapDenInfos = []
+        self.denGrid = None
+        self.setupJob = self.LoadPackagesAndSetup(self.mapName, self.currentDLC)
 
         self.lastTime = caller.WorldInfo.TimeSeconds
         self.timeForNextSpawn = self.GetNewDuration()
+        self.scheduler.ScheduleNextTick(self.SetupTick)
+        self.ScheduleSpawnCheck(self.lastTime + self.timeForNextSpawn)
+        return True
+    
+    def Disable(self) -> None:
+        self.ClearScheduler()
+        self.EndSpawning()
+        super().Disable()
+    
+    def ClearScheduler(self):
+        """Cancels everything we have scheduled, and forgets the events so none of them look pending"""
+        self.scheduler.Clear()
+        self.spawnCheckEvent = None
+        self.spawnTickEvent = None
+        self.frameSampleEvent = None
+        self.CancelPlanning()
+    
+    def IsSpawnWorkPending(self) -> bool:
+        """Whether the map setup, a spawn check or spawns in the pipeline are still to come"""
+        return bool(self.setupJob or self.planJob) or any(
+            event and event.IsPending() for event in (self.spawnCheckEvent, self.spawnTickEvent)
+        )
+    
+    def SetupTick(self, now: float):
+        self.AdvanceSetup()
+        if self.setupJob:
+            self.scheduler.ScheduleNextTick(self.SetupTick)
+    
+    def ScheduleSpawnCheck(self, deadline: float):
+        self.scheduler.Cancel(self.spawnCheckEvent)
+        self.spawnCheckEvent = self.scheduler.Schedule(deadline, self.CheckSpawn)
+        self.StartFrameSampling()
+        # Plan the spawn a bit before the timer runs out, so there's little left to do when it does
+        if not self.planJob:
+            self.scheduler.Cancel(self.planEvent)
+            self.planEvent = self.scheduler.Schedule(deadline - spawn_plan.PLAN_AHEAD, self.StartPlanning)
+    
+    def CheckSpawn(self, now: float):
+        """ The spawn timer has run out, so try a new spawn and schedule the next one """
+        self.spawnCheckEvent = None
+        if not self.mapDenInfos and not self.setupJob:
+            # Nothing can ever spawn here, so let the tick hook go
+            self.CancelPlanning()
+            return
+        if not self.IsSetupReady() or self.pipeline.IsFull() or self.frameBudget.ShouldDefer():
+            self.ScheduleSpawnCheck(now + SPAWN_RECHECK_DELAY)
+            return
+        self.population.Prune()
+        if self.population.IsFull(self.pipeline.GetPendingCount()):
+            # Don't bother picking a den and building a group that can't spawn
+            self.ScheduleSpawnCheck(now + SPAWN_RECHECK_DELAY)
+            return
         
-        def PlayerTick(caller: unrealsdk.UObject, function: unrealsdk.UFunction, params: unrealsdk.FStruct) -> bool:
-            """ We really shouldn't be checking this every tick but I can't get in-game Timers working. """
-            if self.isSpawning:
-                # Continue with the current playing spawn
-                elapsedSpawnTime = caller.WorldInfo.TimeSeconds - self.lastSpawnDelayTime
-                if elapsedSpawnTime >= self.currentSpawnDelay:
-                    self.DoNextSpawn()
-                    self.lastSpawnDelayTime = caller.WorldInfo.TimeSeconds
-            else:
-                # Check for a new spawn
-                elapsedWorldTime = caller.WorldInfo.TimeSeconds - self.lastTime
-                if elapsedWorldTime >= self.timeForNextSpawn:
-                    #Log("Tick " + str(elapsedWorldTime))
-                    #try:
-                    self.DoTheThing()
-                    # except TypeError:
-                    #     Log('Whoops error with spawning!')
-                    self.lastTime = caller.WorldInfo.TimeSeconds
-                    #Log("New World Time " + str(self.lastTime))
+        try:
+            self.DoTheThing()
+        finally:
+            # Even if this spawn failed, keep the timer going so one error doesn't stop spawning for the whole map
+            self.lastTime = now
+            self.ScheduleSpawnCheck(self.lastTime + self.timeForNextSpawn)
+    
+    def StartFrameSampling(self):
+        """Starts sampling the frame time if we have a budget, while there's spawn work to throttle"""
+        if self.frameBudget.budget > 0 and not (self.frameSampleEvent and self.frameSampleEvent.IsPending()) \
+                and self.IsSpawnWorkPending():
+            self.ScheduleFrameSample(unrealsdk.GetEngine().GetCurrentWorldInfo().TimeSeconds)
+    
+    def ScheduleFrameSample(self, now: float):
+        self.scheduler.Cancel(self.frameSampleEvent)
+        self.frameSampleEvent = self.scheduler.Schedule(now + frame_budget.SAMPLE_INTERVAL, self.SampleFrameTime)
+    
+    def SampleFrameTime(self, now: float):
+        """Adds the last frame's time to the frame budget window, and applies its throttling"""
+        self.frameSampleEvent = None
+        if self.frameBudget.budget <= 0:
+            return
+        self.frameBudget.Sample(unrealsdk.GetEngine().GetCurrentWorldInfo().DeltaSeconds)
+        self.UpdateFrameState()
+        # Stop once there's nothing left to throttle, so the tick hook can go - spawning again starts it back up
+        if self.IsSpawnWorkPending():
+            self.ScheduleFrameSample(now)
+    
+    def UpdateFrameState(self):
+        """Passes the frame budget throttling on to the spawn pipeline and spawn cap, and shows it in the options"""
+        self.pipeline.delayScale = self.frameBudget.GetDelayScale()
+        self.frameBudgetSlider.Description = f"{FRAME_BUDGET_DESCRIPTION}\nCurrently: {self.frameBudget.GetStatus()}"
+        state = self.frameBudget.GetState()
+        if state is self.frameState:
+            return
+        if (state is frame_budget.FrameState.OVER) != (self.frameState is frame_budget.FrameState.OVER):
+            self.UpdateSpawnCap(state is not frame_budget.FrameState.OVER)
+        self.frameState = state
+    
+    def UpdateSpawnCap(self, raised: bool):
+        """Drops the increased spawn cap back down while the frame time is way over budget"""
+        if not (self.spawnCapSwitch.CurrentValue and self.initialMaxActorCost):
+            return
+        popMaster = unrealsdk.GetEngine().GamePlayers[0].Actor.GetWillowGlobals().GetPopulationMaster()
+        if popMaster:
+            popMaster.MaxActorCost = self.initialMaxActorCost * 3 if raised else self.initialMaxActorCost
+    
+    def AdvanceSetup(self):
+        """Runs the setup job until it finishes or this frame's budget runs out."""
+        deadline = time.perf_counter() + SETUP_FRAME_BUDGET
+        try:
+            for _ in self.setupJob:
+                if time.perf_counter() >= deadline:
+                    return
+        except Exception as ex:
+            # e.g. a mistake in the spawn data file - drop the job so we don't wait on it forever
+            Log(f"[{__name__}] Map setup failed, only spawning from the {len(self.mapDenInfos)} dens set up so far: {ex!r}")
+        self.setupJob = None
+    
+    def IsSetupReady(self) -> bool:
+        """Whether enough dens have been set up to start spawning. Dens are usable as soon as they are set up."""
+        if not self.setupJob:
             return True
-        
-        unrealsdk.RunHook("WillowGame.WillowPlayerController.PlayerTick", f"{self.Name}.PlayerTick", PlayerTick)
-        return True
+        return len(self.mapDenInfos) > 0 and len(self.mapDenInfos) >= len(self.mapDens) * SETUP_READY_FRACTION
+    
+    def IsLoadingOnDemand(self) -> bool:
+        return PackageLoading[self.packageLoadingSpinner.CurrentValue] is PackageLoading.ON_DEMAND
+    
+    def GetRequiredDLCs(self, biome: DLC) -> List[DLC]:
+        """The DLCs whose packages this map needs when loading on demand, most important first"""
+        requiredDLCs = [biome] if biome else []
+        if self.pool == SpawnPool.GAME:
+            # Enemies from any DLC can spawn anywhere, so we need all of them
+            requiredDLCs.extend(x for x in level_packages.combat_packages_by_DLC if x not in requiredDLCs)
+        elif self.megaMixActive and BaseDLC not in requiredDLCs:
+            requiredDLCs.append(BaseDLC)
+        return [x for x in requiredDLCs if x in level_packages.combat_packages_by_DLC]
     
-    def SetupDensAndCustoms(self, mapName: str, biome: DLC):
+    def GetSetupDLCs(self, biome: DLC) -> List[DLC]:
+        """
+        The DLCs whose packages this map's setup depends on, to key the map cache on.
+        When loading on demand, that's only those this map requires, not whichever others happen to still be loaded.
+        """
+        if not (self.megaMixActive or self.pool >= SpawnPool.DLC):
+            return []
+        if self.IsLoadingOnDemand():
+            return self.GetRequiredDLCs(biome)
+        return list(level_packages.loaded_DLCs)
+    
+    def LoadPackagesAndSetup(self, mapName: str, biome: DLC) -> Iterator[None]:
+        """
+        The setup job for a map. If loading packages on demand, this first loads any that the map needs,
+         one package per step, and releases DLCs we haven't used for a while.
+        """
+        if self.IsLoadingOnDemand() and (self.megaMixActive or self.pool >= SpawnPool.DLC):
+            requiredDLCs = self.GetRequiredDLCs(biome)
+            for requiredDLC in requiredDLCs:
+                for (numLoaded, numPackages) in level_packages.LoadLevelSpawnObjectsJob(requiredDLC):
+                    Log(f"[{__name__}] Loading {requiredDLC.name} spawn packages ({numLoaded}/{numPackages})")
+                    yield
+            level_packages.ReleaseLeastRecentDLCs(requiredDLCs)
+            custom_spawns.PrunePopDefCache()
+            custom_spawns.CacheMegaMixPools()
+            yield
+        yield from self.SetupDensAndCustoms(mapName, biome)
+    
+    def SetupDensAndCustoms(self, mapName: str, biome: DLC) -> Iterator[None]:
         """
         Creates the available den list for the current map, and filters our custom spawn list to those
          available in the loaded map too.
+        Uses the map cache instead if we have been here before with the same settings.
+        This is a generator that yields between each bit of work, for AdvanceSetup to spread over frames.
         """
+        self.mapDenInfos: List[DenSpawnInfo] = []
+        self.denGrid = spatial_index.DenGrid()
+        self.mapPoints = []
         
+        setupPackages = "+".join(sorted(x.name for x in self.GetSetupDLCs(biome)))
+        loadedPackages = setupPackages if self.pool >= SpawnPool.DLC else ""
+        cacheKey = map_cache.MapKey(CURRENT_GAME.name, self.Version, self.pool.name, mapName, loadedPackages)
+        eligibilityKey = map_cache.EligibilityKey(CURRENT_GAME.name, mapName, setupPackages)
+        if self.mapCacheSwitch.CurrentValue and self.SetupFromCache(cacheKey, mapName, eligibilityKey):
+            return
+        
+        self.mapDens = []
         allDens = unrealsdk.FindAll("PopulationOpportunityDen")
-        self.mapDens = [x for x in allDens if
-                        x.Location and x.SpawnPoints and x.SpawnData and (not x.bIsCriticalActor)
-                        and (x.GetAllegiance() and x.GetAllegiance().Name not in BLACKLIST_ALLEGIANCES)
-                        and (x.GameStageRegion and x.GameStageRegion.Name not in BLACKLIST_GAME_STAGES)
-                        and (x.SpawnData.PopulationDefName not in BLACKLIST_POPDEFS)
-                        and any(y for y in x.SpawnPoints)
-                        ]
+        densFingerprint = self.GetDensFingerprint(allDens)
+        yield
+        mapDens = [x for x in allDens if
+                   x.Location and x.SpawnPoints and x.SpawnData and (not x.bIsCriticalActor)
+                   and (x.GetAllegiance() and x.GetAllegiance().Name not in BLACKLIST_ALLEGIANCES)
+                   and (x.GameStageRegion and x.GameStageRegion.Name not in BLACKLIST_GAME_STAGES)
+                   and (x.SpawnData.PopulationDefName not in BLACKLIST_POPDEFS)
+                   and any(y for y in x.SpawnPoints)
+                   ]
+        yield
         
+        self.mapNormalSpawns = []
+        self.mapCustomSpawns = []
+        customSpawnKeys = []    # (DLC name, index in customList) of each mapCustomSpawn, for the map cache
         if self.pool >= SpawnPool.LEVEL:
-            uniquePopDefs = {x.PopulationDef for x in self.mapDens if x.PopulationDef}    # Use a set so it doesn't do duplicates
+            uniquePopDefs = {x.PopulationDef for x in mapDens if x.PopulationDef}    # Use a set so it doesn't do duplicates
             #Log([popDef.Name for popDef in uniquePopDefs])
-            self.mapNormalSpawns = [custom_spawns.CustomSpawnFromPopDef(x) for x in uniquePopDefs]
-            for x in reversed(self.mapNormalSpawns):
-                if not x:
-                    self.mapNormalSpawns.remove(x)
+            for popDef in uniquePopDefs:
+                spawn = custom_spawns.GetSpawnFromPopDef(popDef)
+                if spawn:
+                    self.mapNormalSpawns.append(spawn)
+                yield
             #Log([spawn.name for spawn in self.mapNormalSpawns])
                 
-            self.mapCustomSpawns = []
             if self.pool == SpawnPool.GAME:
-                for dlcCustomSpawns in custom_spawns.customList.values():
-                    self.mapCustomSpawns = self.mapCustomSpawns + [x for x in dlcCustomSpawns if x.LoadObjects(mapName.lower())]
-            elif self.pool >= SpawnPool.LEVEL and biome:
-                self.mapCustomSpawns = self.mapCustomSpawns = [x for x in custom_spawns.customList[biome] if x.LoadObjects(mapName.lower())]
+                spawnDLCs = list(custom_spawns.customList.keys())
+            elif biome:
+                spawnDLCs = [biome]
+            else:
+                spawnDLCs = []
+            # Skip spawns that didn't resolve the last few times we were in this map with the same packages and dens.
+            # They're tried again every so often, incase their objects have turned up since.
+            failedBefore = map_cache.GetFailedSpawns(eligibilityKey, densFingerprint) if self.mapCacheSwitch.CurrentValue else {}
+            resolvedKeys = []
+            failedKeys: Dict[str, int] = {}
+            for spawnDLC in spawnDLCs:
+                for i, x in enumerate(custom_spawns.customList[spawnDLC]):
+                    if not x.IsAllowedInMap(mapName.lower()):
+                        continue
+                    key = x.GetEligibilityKey()
+                    if key in failedBefore and not map_cache.IsFailedSpawnDue(failedBefore[key]):
+                        failedKeys[key] = failedBefore[key] + 1
+                        continue
+                    if x.LoadObjects(mapName.lower()):
+                        self.mapCustomSpawns.append(x)
+                        customSpawnKeys.append((spawnDLC.name, i))
+                        resolvedKeys.append(key)
+                    else:
+                        failedKeys[key] = 0
+                    yield
+            if self.mapCacheSwitch.CurrentValue:
+                map_cache.PutEligibility(eligibilityKey, resolvedKeys, failedKeys, densFingerprint)
             #Log([spawn.name for spawn in self.mapCustomSpawns])
         
-        self.mapDenInfos: List[DenSpawnInfo] = []
+        # Only set mapDens now, so IsSetupReady compares against the whole map
+        self.mapDens = mapDens
         if len(self.mapDens) == 0:
             return
+        self.PackLocations()
+        yield
+        
+        # Index spawns by the BodyTags and PointDefs they need, so each den just looks up what its points support
+        normalSpawnIndex = custom_spawns.SpawnSupportIndex(self.mapNormalSpawns)
+        customSpawnIndex = custom_spawns.SpawnSupportIndex(self.mapCustomSpawns)
+        
         for den in self.mapDens:
             #den.SpawnRadius = den.SpawnRadius * 1.5
-            denInfo = DenSpawnInfo()
-            denInfo.denObject = den
-            self.mapDenInfos.append(denInfo)
-            
-            # Store all blank spawn points for our later FOV checks
-            denInfo.blankPoints = [spawnPoint for spawnPoint in den.SpawnPoints if spawnPoint and not spawnPoint.PointDef]
+            denInfo = self.AddDenInfo(den)
             
             # Store all CustomSpawns that this den supports
-            denInfo.baseSpawn = custom_spawns.CustomSpawnFromPopDef(den.PopulationDef)
-            
-            for customSpawn in self.mapNormalSpawns:
-                if customSpawn.DenSupportsSpawn(den):
-                    denInfo.levelSpawns.append(customSpawn)
+            denInfo.baseSpawn = custom_spawns.GetSpawnFromPopDef(den.PopulationDef)
             
-            for customSpawn in self.mapCustomSpawns:
-                if customSpawn.DenSupportsSpawn(den):
-                    denInfo.customSpawns.append(customSpawn)
+            denPoints = custom_spawns.DenPoints(den)
+            denInfo.levelSpawns = normalSpawnIndex.SupportedSpawnIndexes(denPoints)
+            denInfo.customSpawns = customSpawnIndex.SupportedSpawnIndexes(denPoints)
                     
-            denInfo.FindFOVSpawns()
+            denInfo.FindFOVSpawns(self.mapCustomSpawns)
+            self.denLocations.SetTestFOV(denInfo.index, denInfo.needsFOVCheck)
+            yield
+        
+        if self.mapCacheSwitch.CurrentValue:
+            self.SaveToCache(cacheKey, customSpawnKeys, densFingerprint)
+    
+    def PackLocations(self):
+        """Packs all den and spawn point locations up front, so we can score them in one pass later"""
+        self.denLocations = spawn_geometry.LocationTable(
+            [(den.Location.X, den.Location.Y, den.Location.Z) for den in self.mapDens],
+            [True for den in self.mapDens]
+        )
+        self.denPointIndexes = []
+        for den in self.mapDens:
+            start = len(self.mapPoints)
+            self.mapPoints.extend(point for point in den.SpawnPoints if point and point.Location)
+            self.denPointIndexes.append(range(start, len(self.mapPoints)))
+        self.pointLocations = spawn_geometry.LocationTable(
+            [(point.Location.X, point.Location.Y, point.Location.Z) for point in self.mapPoints],
+            [not point.PointDef for point in self.mapPoints]
+        )
+    
+    def AddDenInfo(self, den) -> DenSpawnInfo:
+        """Creates the DenSpawnInfo for the next den in mapDens, after PackLocations"""
+        denInfo = DenSpawnInfo()
+        denInfo.denObject = den
+        denInfo.index = len(self.mapDenInfos)
+        denInfo.pointIndexes = self.denPointIndexes[denInfo.index]
+        # Including the blank spawn points for our later FOV checks
+        denInfo.PartitionPoints(self.mapPoints)
+        self.denGrid.Insert(denInfo.index, den.Location.X, den.Location.Y)
+        self.mapDenInfos.append(denInfo)
+        return denInfo
+    
+    cacheFingerprint: str = None
+    
+    def GetCacheFingerprint(self) -> str:
+        """Anything that changes which dens and spawns we'd pick for a map needs to go in here"""
+        if not self.cacheFingerprint:
+            self.cacheFingerprint = map_cache.Fingerprint([
+                map_cache.FileFingerprint(custom_spawns.__file__),
+                map_cache.FileFingerprint(custom_spawns.SPAWN_DATA_FILE),
+                BLACKLIST_MAPS,
+                BLACKLIST_POPDEFS,
+                BLACKLIST_ALLEGIANCES,
+                BLACKLIST_GAME_STAGES,
+                POPDEF_PREFIX_EXCLUDED_FROM_FOV_CHECKS,
+            ])
+        return self.cacheFingerprint
+    
+    def GetDensFingerprint(self, allDens: List[object]) -> str:
+        """Hashes the paths of every den in the map, not just those we use, so we can tell when any have been added"""
+        return map_cache.Fingerprint(sorted(den.PathName(den) for den in allDens))
+    
+    def SaveToCache(self, cacheKey: str, customSpawnKeys: List[Tuple[str, int]], densFingerprint: str):
+        dens = []
+        for denInfo in self.mapDenInfos:
+            den = denInfo.denObject
+            dens.append({
+                "path": den.PathName(den),
+                "levelSpawns": list(denInfo.levelSpawns),
+                "customSpawns": list(denInfo.customSpawns),
+                "fovCustomSpawns": list(denInfo.fovCustomSpawns),
+                "needsFOVCheck": denInfo.needsFOVCheck,
+            })
+        map_cache.Put(cacheKey, self.GetCacheFingerprint(), {
+            "normalSpawns": [spawn.popDef for spawn in self.mapNormalSpawns],
+            "customSpawns": customSpawnKeys,
+            "dens": dens,
+            "allDens": densFingerprint,
+        })
+    
+    def SetupFromCache(self, cacheKey: str, mapName: str, eligibilityKey: str) -> bool:
+        """
+        Rehydrates the map's dens and spawns from the map cache with FindObject calls.
+        Returns False if there's no entry, the map's dens have changed (e.g. a mission sublevel has streamed in),
+         spawns that couldn't be found here before are due to be tried again, or anything in it can't be found,
+         so we set up the map from scratch.
+        """
+        entry = map_cache.Get(cacheKey, self.GetCacheFingerprint())
+        if not entry:
+            return False
+        
+        densFingerprint = self.GetDensFingerprint(unrealsdk.FindAll("PopulationOpportunityDen"))
+        if entry["allDens"] != densFingerprint:
+            Log(f"[{__name__}] Map cache for {mapName} is out of date.")
+            return False
+        if not map_cache.SkipFailedSpawns(eligibilityKey, densFingerprint):
+            Log(f"[{__name__}] Trying the spawns that couldn't be found in {mapName} again.")
+            return False
+        
+        mapDens = [unrealsdk.FindObject("PopulationOpportunityDen", x["path"]) for x in entry["dens"]]
+        if not all(mapDens):
+            Log(f"[{__name__}] Map cache for {mapName} is out of date.")
+            return False
+        
+        mapNormalSpawns = []
+        for popDefPath in entry["normalSpawns"]:
+            spawn = custom_spawns.GetSpawnFromPopDef(unrealsdk.FindObject("WillowPopulationDefinition", popDefPath))
+            if not spawn:
+                return False
+            mapNormalSpawns.append(spawn)
+        
+        mapCustomSpawns = []
+        for (dlcName, index) in entry["customSpawns"]:
+            dlcSpawns = custom_spawns.customList.get(DLC[dlcName], [])
+            if index >= len(dlcSpawns) or not dlcSpawns[index].LoadObjects(mapName.lower()):
+                return False
+            mapCustomSpawns.append(dlcSpawns[index])
+        
+        self.mapDens = mapDens
+        self.mapNormalSpawns = mapNormalSpawns
+        self.mapCustomSpawns = mapCustomSpawns
+        if len(self.mapDens) == 0:
+            return True
+        self.PackLocations()
+        
+        for den, denEntry in zip(self.mapDens, entry["dens"]):
+            denInfo = self.AddDenInfo(den)
+            denInfo.baseSpawn = custom_spawns.GetSpawnFromPopDef(den.PopulationDef)
+            denInfo.levelSpawns = array("H", denEntry["levelSpawns"])
+            denInfo.customSpawns = array("H", denEntry["customSpawns"])
+            denInfo.fovCustomSpawns = array("H", denEntry["fovCustomSpawns"])
+            denInfo.needsFOVCheck = denEntry["needsFOVCheck"]
+            self.denLocations.SetTestFOV(denInfo.index, denInfo.needsFOVCheck)
+        return True
     
     def DoTheThing(self):
         PC = unrealsdk.GetEngine().GamePlayers[0].Actor
@@ -565,6 +1064,8 @@ class AmbientSpawns(ModMenu.SDKMod):
         if PC.PlayerInput and PC.PlayerInput.TimeSinceLastMovement > 20:
             #Log("Idle or summin")
             self.timeForNextSpawn = self.timeForNextSpawn + 10
+            # Anything we planned will be out of date by the next try
+            self.CancelPlanning()
             return
 
         # I'm using the menu check as a quick catch-all for whatever
@@ -574,129 +1075,253 @@ class AmbientSpawns(ModMenu.SDKMod):
         ):
             #Log(f"In combat or summin {Pawn.LastCombatActionTime} {Pawn.WorldInfo.TimeSeconds}")
             self.timeForNextSpawn = self.timeForNextSpawn + 10
+            self.CancelPlanning()
             return
         
-        # Find dens close to the player
-        validDens: List[DenSpawnInfo] = []
-        validWeights: List[float] = []
-        for denInfo in self.mapDenInfos:
-            den = denInfo.denObject
-            distance = DistFromPlayer(PC, den.Location)
-            if distance > self.distanceMinSlider.CurrentValue and distance < self.distanceMaxSlider.CurrentValue:
-                weight = GetLocationWeight(PC, den, denInfo.needsFOVCheck)
-                if weight > 0:
-                    validDens.append(denInfo)
-                    validWeights.append(weight)
+        # Usually the spawn was planned over the last few ticks, so we only need to check it still holds
+        plan = self.TakeSpawnPlan(PC)
+        if not plan:
+            for _ in self.PlanSpawn(PC):
+                pass
+            plan = self.spawnPlan
+            self.spawnPlan = None
         
         # Spawn some stuff
-        if validDens and validWeights:
-            chosenDens = random.choices(validDens, validWeights, k=1)
-            for denInfo in chosenDens:
-                self.GenerateSpawnListFromDen(PC, denInfo)
-                
-            if self.currentSpawnList:
-                self.StartSpawning()
+        if plan:
+            den = plan.denInfo.denObject
+            # The entries are lazy so we don't know how many there are - limit the most there could be instead
+            # Smaller groups while the frame time is over budget
+            limit = self.frameBudget.ScaleGroupSize(plan.spawn.GetMaxSpawns())
+            # Only as many as the population caps have room for
+            room = self.population.GetRoom(den, plan.spawn.tag, self.pipeline.GetPendingCount())
+            if room is not None:
+                limit = min(limit, room)
+            if limit <= 0:
+                # The caps filled up since we planned, so try again soon rather than waiting a whole spawn timer
+                self.timeForNextSpawn = SPAWN_RECHECK_DELAY
+                return
+            self.StartSpawning(den, plan.entries, plan.spawn.tag, limit)
         
         self.timeForNextSpawn = self.GetNewDuration()
     
-    def GenerateSpawnListFromDen(self, PC, denInfo: DenSpawnInfo) -> List[Tuple[object, object, float]]:
+    def PlanSpawn(self, PC) -> Iterator[None]:
+        """
+        Works out the next spawn - the den, the spawn and its first spawn point - and stores it in spawnPlan.
+        This is a generator that yields between each bit of work, for AdvancePlan to spread over the ticks
+         before the spawn timer runs out.
+        """
+        self.spawnPlan = None
+        Pawn = PC.Pawn
+        if not Pawn or not self.denGrid:
+            return
+        # Stop counting anything that died since the last spawn, so the caps we plan around are up to date
+        self.population.Prune()
+        # Where the player was when we started, even if they move while we're planning
+        (x, y) = (Pawn.Location.X, Pawn.Location.Y)
+        minDist = self.distanceMinSlider.CurrentValue
+        maxDist = self.distanceMaxSlider.CurrentValue
+        
+        # Find dens close to the player, only checking those that could have moved in or out of range since last time
+        nearbyIndexes = self.denCandidates.Query(self.denGrid, self.denLocations, x, y, minDist, maxDist)
+        yield
+        
+        # Build the camera frustum once for this whole plan
+        frustum = visibility.ViewFrustum.FromPlayer(PC)
+        # The view changes every time though, so weight the dens in range from scratch
+        (validIndexes, validWeights) = self.denLocations.Weights(
+            nearbyIndexes, spawn_geometry.ViewYaw(PC), x, y,
+            visibility=visibility.VisibilityCache(frustum, self.denLocations)
+        )
+        if self.population.maxPerDen > 0 or len(self.pipeline) > 0:
+            # Leave out dens that already have as many spawns alive as they're allowed, or a group still spawning
+            usable = [
+                i for i, index in enumerate(validIndexes)
+                if not self.population.IsDenFull(self.mapDenInfos[index].denObject)
+                and not self.pipeline.IsDenBusy(self.mapDenInfos[index].denObject)
+            ]
+            validIndexes = [validIndexes[i] for i in usable]
+            validWeights = [validWeights[i] for i in usable]
+        if not validIndexes:
+            return
+        yield
+        
+        denInfo = self.mapDenInfos[random.choices(validIndexes, validWeights, k=1)[0]]
+        # Test the den's spawn points against the view in one go
+        self.pointVisibility = visibility.VisibilityCache(frustum, self.pointLocations)
+        self.pointVisibility.Prefetch(denInfo.pointIndexes)
+        yield
+        
+        (spawn, entries) = self.GenerateSpawnsFromDen(PC, denInfo)
+        if spawn:
+            now = unrealsdk.GetEngine().GetCurrentWorldInfo().TimeSeconds
+            self.spawnPlan = spawn_plan.SpawnPlan(
+                denInfo, spawn, entries, x, y, frustum.forward, now
+            )
+    
+    def StartPlanning(self, now: float):
+        """Starts planning the next spawn, unless we already have one planned or on the way"""
+        self.planEvent = None
+        if self.spawnPlan or self.planJob or not self.IsSetupReady():
+            return
+        PC = unrealsdk.GetEngine().GamePlayers[0].Actor
+        self.planJob = self.PlanSpawn(PC)
+        self.PlanTick(now)
+    
+    def PlanTick(self, now: float):
+        self.planEvent = None
+        self.AdvancePlan()
+        if self.planJob:
+            self.planEvent = self.scheduler.ScheduleNextTick(self.PlanTick)
+    
+    def AdvancePlan(self):
+        """Runs the plan job until it finishes or this frame's budget runs out."""
+        deadline = time.perf_counter() + spawn_plan.PLAN_FRAME_BUDGET
+        for _ in self.planJob:
+            if time.perf_counter() >= deadline:
+                return
+        self.planJob = None
+    
+    def CancelPlanning(self):
+        self.scheduler.Cancel(self.planEvent)
+        self.planEvent = None
+        self.planJob = None
+        self.spawnPlan = None
+    
+    def TakeSpawnPlan(self, PC) -> spawn_plan.SpawnPlan:
+        """
+        Returns the planned spawn if it still holds, finishing it off first if it's still being planned.
+        Either way, we don't have a plan afterwards.
+        """
+        if self.planJob:
+            for _ in self.planJob:
+                pass
+        plan = self.spawnPlan
+        self.CancelPlanning()
+        if not plan:
+            return None
+        
+        den = plan.denInfo.denObject
+        if self.population.IsDenFull(den) or self.pipeline.IsDenBusy(den):
+            return None
+        location = PC.Pawn.Location
+        distance = self.denLocations.Distances([plan.denInfo.index], location.X, location.Y)[0]
+        if not (self.distanceMinSlider.CurrentValue < distance < self.distanceMaxSlider.CurrentValue):
+            return None
+        forward = visibility.ViewFrustum.FromPlayer(PC).forward
+        now = unrealsdk.GetEngine().GetCurrentWorldInfo().TimeSeconds
+        if not plan.IsStillValid(location.X, location.Y, forward, now):
+            return None
+        return plan
+    
+    def GenerateSpawnsFromDen(self, PC, denInfo: DenSpawnInfo) -> Tuple[custom_spawns.Spawn, Iterator[spawn_pipeline.SpawnEntry]]:
+        """
+        Picks a spawn for this den, and returns it with a lazy iterator of its (factory, spawn point, delay) entries.
+        Returns (None, None) if the den has nothing it can spawn.
+        """
         den = denInfo.denObject
         denID = den.ObjectInternalInteger
         gameStage = self.GetGameStage(PC, den)
+        cappedTags = self.population.GetCappedTags()
         #Log("Den " + str(denID))
         #Log(str(den.SpawnData.PopulationDefName))
         
         if self.pool > SpawnPool.DEN:
-            # Generate the currentSpawnList from either the level spawns or custom spawns for this den.
-            self.currentSpawnList: List[(object, object)] = []
+            # Generate the spawns from either the level spawns or custom spawns for this den.
             
-            validPoints = []
-            for spawnPoint in den.SpawnPoints:
-                if spawnPoint and spawnPoint.Location:
-                    if GetLocationWeight(PC, spawnPoint, not spawnPoint.PointDef) > 0:
-                        #Log("Valid Point " + str(spawnPoint.PointDef.Name if spawnPoint.PointDef else spawnPoint.Name))
-                        validPoints.append(spawnPoint)
+            # Blank points fail this if they're in view of the player
+            (validIndexes, _) = self.pointLocations.Weights(
+                denInfo.pointIndexes, spawn_geometry.ViewYaw(PC), PC.Pawn.Location.X, PC.Pawn.Location.Y,
+                visibility=self.pointVisibility
+            )
             
-            validCustomSpawns = []
-            if len(validPoints) > 0:
+            validSpawnTable: custom_spawns.TagWeightedTable = None
+            if len(validIndexes) > 0:
                 if len(denInfo.customSpawns) > 0 and random.randint(0, 99) < self.customSpawnSlider.CurrentValue:
-                    validCustomSpawns = denInfo.customSpawns
+                    validSpawnTable = denInfo.GetSpawnTable("customSpawns", self.mapCustomSpawns)
                 else:
-                    validCustomSpawns = denInfo.levelSpawns
+                    validSpawnTable = denInfo.GetSpawnTable("levelSpawns", self.mapNormalSpawns)
             else:
                 # If we have no valid FOV points then we might still have blank spawns we can use in view
                 if len(denInfo.fovCustomSpawns) > 0:
                     #Log("Using BLANK points spawn!")
-                    validPoints = [*denInfo.blankPoints]
-                    validCustomSpawns = denInfo.fovCustomSpawns
+                    validIndexes = denInfo.blankPoints
+                    validSpawnTable = denInfo.GetSpawnTable("fovCustomSpawns", self.mapCustomSpawns)
                 
-            if len(validCustomSpawns) > 0:
-                customSpawnWeights = [custom_spawns.BadassTagWeights[x.tag] for x in validCustomSpawns]
-                if sum(customSpawnWeights) > 0:
-                    customSpawn: custom_spawns.CustomSpawn = random.choices(validCustomSpawns, customSpawnWeights)[0]
+            if validSpawnTable and len(validSpawnTable) > 0:
+                # The table only rebuilds its weights if the badass weight sliders have changed
+                if validSpawnTable.GetTotal() > 0:
+                    # Leave out spawns whose Badass Tag is at its cap, since they couldn't start
+                    customSpawn: custom_spawns.CustomSpawn = validSpawnTable.PickExcluding(cappedTags)
                     
                     if customSpawn:
-                        exclusiveValidPoints = []   # Try to pick a unique spawn point until they've all been used
-                        for (factory, spawnPointDef, delay) in customSpawn.GetNewFactoryList(den, gameStage, megaMix=self.megaMixActive):
-                            if not spawnPointDef:
-                                if len(exclusiveValidPoints) == 0:
-                                    exclusiveValidPoints = [*validPoints]
-                                chosenSpawnPoint = random.choice(exclusiveValidPoints)
-                                exclusiveValidPoints.remove(chosenSpawnPoint)
-                                self.currentSpawnList.append((factory, chosenSpawnPoint, delay))
-                            else:
-                                # Make sure we're choosing only spawnPoints that match this custom def, if defined
-                                customValidPoints = [x for x in validPoints
-                                    if ((not x.PointDef) and spawnPointDef == "None")
-                                    or (x.PointDef.Name == customSpawn.spawnPointDef)
-                                ]
-                                if len(exclusiveValidPoints) == 0:  # Assuming all spawns in a CustomSpawn can use the same PointDefs!
-                                    exclusiveValidPoints = [*customValidPoints]
-                                if len(exclusiveValidPoints) > 0:
-                                    chosenSpawnPoint = random.choice(exclusiveValidPoints)
-                                    #Log(chosenSpawnPoint)
-                                    exclusiveValidPoints.remove(chosenSpawnPoint)
-                                    self.currentSpawnList.append((factory, chosenSpawnPoint, delay))
-                                else:
-                                    # Oh no we can't do all CustomSpawns from this den (player must be looking at all None spawns we can use)
-                                    #Log(f"Oh no can't actually find a spawn point {spawnPointDef} for {customSpawn.name}, you must be looking at a blank point!")
-                                    continue
+                        entries = self.PlaceSpawns(
+                            customSpawn.GetNewFactoryList(den, gameStage, megaMix=self.megaMixActive), denInfo, validIndexes, True
+                        )
+                        # Only the first entry is made now, to check we can actually place any of them
+                        first = next(entries, None)
+                        if first is not None:
+                            return (customSpawn, itertools.chain((first,), entries))
                 
-        if len(self.currentSpawnList) == 0 and denInfo.baseSpawn:
+        if denInfo.baseSpawn and denInfo.baseSpawn.tag not in cappedTags:
             # Default to this den's usual spawn
             #Log(f"Normal Spawn from {denID}")
-            for (factory, spawnPointDef, delay) in denInfo.baseSpawn.GetNewFactoryList(den, gameStage, megaMix=self.megaMixActive):
-                self.currentSpawnList.append((factory, random.choice([point for point in den.SpawnPoints if point]), delay))
-
-        self.currentSpawnDen = den
-        return self.currentSpawnList
+            entries = self.PlaceSpawns(
+                denInfo.baseSpawn.GetNewFactoryList(den, gameStage, megaMix=self.megaMixActive), denInfo, denInfo.pointIndexes
+            )
+            return (denInfo.baseSpawn, entries)
+        
+        return (None, None)
+    
+    def PlaceSpawns(self, factories: Iterator[Tuple[object, str, float]], denInfo: DenSpawnInfo, validIndexes: Sequence[int],
+                    matchPointDefs: bool = False) -> Iterator[spawn_pipeline.SpawnEntry]:
+        """
+        Picks a spawn point for each (factory, spawnPointDef, delay) as the spawn pipeline pulls it,
+         so each pick knows which points are still busy from the spawns before it.
+        validIndexes are the den's points in mapPoints that we can use, e.g. those out of view.
+        If matchPointDefs, entries with a spawnPointDef only use the valid points in that PointDef's partition.
+        """
+        cooldowns = self.pipeline.pointCooldowns
+        validPoints = [self.mapPoints[i] for i in validIndexes]
+        # Try to pick a unique spawn point until they've all been used, preferring those not used recently
+        plannedUses: Dict[object, int] = {}
+        pointDefPoints: Dict[str, List[object]] = {}
+        for (factory, spawnPointDef, delay) in factories:
+            points = validPoints
+            if matchPointDefs and spawnPointDef:
+                # Make sure we're choosing only spawnPoints that match this custom def, if defined
+                points = pointDefPoints.get(spawnPointDef)
+                if points is None:
+                    validSet = set(validIndexes)
+                    points = [self.mapPoints[i] for i in denInfo.pointsByDef.get(spawnPointDef, ()) if i in validSet]
+                    pointDefPoints[spawnPointDef] = points
+            if len(points) == 0:
+                # Oh no we can't do all CustomSpawns from this den (player must be looking at all None spawns we can use)
+                #Log(f"Oh no can't actually find a spawn point {spawnPointDef}, you must be looking at a blank point!")
+                continue
+            now = unrealsdk.GetEngine().GetCurrentWorldInfo().TimeSeconds
+            yield (factory, cooldowns.PickPoint(points, now, plannedUses), delay)
 
     """
     Since in the worst case we will be spawning many enemies from a single spawn point,
-     we add a delay between each spawn using the PlayerTick.
+     we add a delay between each spawn using the scheduler.
     """
-    def StartSpawning(self):
-        self.isSpawning = True
-        self.lastSpawnDelayTime = 0
-        #Log(self.currentSpawnList)
+    def StartSpawning(self, den, entries: Iterator[spawn_pipeline.SpawnEntry], tag: custom_spawns.Tag = None, limit: int = None):
+        now = unrealsdk.GetEngine().GetCurrentWorldInfo().TimeSeconds
+        if self.pipeline.Add(spawn_pipeline.SpawnBatch(den, entries, now, tag, limit)):
+            self.ScheduleSpawnTick()
         #Log("-----Spawning-----")
     
-    def DoNextSpawn(self):
-        (factory, spawn, delay) = self.currentSpawnList.pop(0)
-        
-        if len(self.currentSpawnList) == 0:
-            self.EndSpawning()
-        
+    def DoNextSpawn(self, batch: spawn_pipeline.SpawnBatch, entry: spawn_pipeline.SpawnEntry):
+        (factory, spawn, delay) = entry
         if not factory or not spawn:
             return
         
-        # Try not to spawn enemies on top of eachother by adjusting the delay
-        if len(self.currentSpawnList) > 0:
-            if spawn is self.currentSpawnList[0][1]:
-                delay = delay + 3
-            self.currentSpawnDelay = delay
-        
-        den = self.currentSpawnDen
+        den = batch.den
+        if self.population.GetRoom(den) == 0:
+            # Other spawns came alive since this group started - don't go over the caps.
+            # The point was marked busy when this entry was taken, but nothing is spawning there now.
+            self.pipeline.pointCooldowns.Release(spawn)
+            return
         PC = unrealsdk.GetEngine().GamePlayers[0].Actor
         gameStage = self.GetGameStage(PC, den)
         popMaster = PC.GetWillowGlobals().GetPopulationMaster()
@@ -721,15 +1346,19 @@ class AmbientSpawns(ModMenu.SDKMod):
             False, False
         )
 
+        if not spawnedPawn:
+            self.pipeline.pointCooldowns.Release(spawn)
+        
         # I hope you're not here looking for answers...
         if spawnedPawn:
+            self.population.Add(spawnedPawn, den, batch.tag)
             # Play the SpecialMove spawn animation
             spawn.ActorSpawned(spawnedPawn)
             spawnedPawn.MySpawnPoint = spawn    # Orbital drop ground shake and spawn anims
             
             # If it's the Infected Pods then rotate them to try and stop them overlapping in the same point
             if factory.PathName(factory).startswith("GD_Anemone_InfectedPodTendril.Population.PopDef_InfectedPodTendril"):
-                rotTuple = (rot.Pitch, int(len(self.currentSpawnList) * 7000), rot.Roll)
+                rotTuple = (rot.Pitch, int(batch.numSpawned * 7000), rot.Roll)
                 spawnedPawn.Rotation = rotTuple
             
             # Prevent different allegiance enemies attacking eachother from the same den
@@ -758,8 +1387,28 @@ class AmbientSpawns(ModMenu.SDKMod):
                                 
                     spawnedPawn.PlayTaunt()
     
+    def ScheduleSpawnTick(self):
+        self.scheduler.Cancel(self.spawnTickEvent)
+        self.spawnTickEvent = None
+        deadline = self.pipeline.NextDeadline()
+        if deadline is not None:
+            self.spawnTickEvent = self.scheduler.Schedule(deadline, self.SpawnTick)
+            self.StartFrameSampling()
+    
+    def SpawnTick(self, now: float):
+        self.spawnTickEvent = None
+        for (batch, entry) in self.pipeline.PopDue(now):
+            try:
+                self.DoNextSpawn(batch, entry)
+            except Exception as ex:
+                # Carry on with the rest of the group rather than leaving it stuck in the pipeline
+                Log(f"[{__name__}] Spawn failed: {ex!r}")
+        self.ScheduleSpawnTick()
+    
     def EndSpawning(self):
-        self.isSpawning = False
+        self.pipeline.Clear()
+        self.scheduler.Cancel(self.spawnTickEvent)
+        self.spawnTickEvent = None
         #Log("-----Spawning OVER-----")
 
     def GetNewDuration(self) -> int:
@@ -767,10 +1416,20 @@ class AmbientSpawns(ModMenu.SDKMod):
         duration = self.averageTimeForNextSpawn + randy
         if duration < MIN_TIME_DURATION:
             duration = MIN_TIME_DURATION
+        duration = int(duration * self.frameBudget.GetDelayScale())
         #ShowChatMessage(self.Name, "Next duration " + str(duration))
         return duration
 
     def GetGameStage(self, PC, den=None) -> int:
+        """Cached per den and GameStageRegion, since a group's spawns would all work it out the same way"""
+        key = (den, den.GameStageRegion if den else None)
+        stage = self.gameStageCache.get(key)
+        if stage is None:
+            stage = self.FindGameStage(PC, den)
+            self.gameStageCache[key] = stage
+        return stage
+    
+    def FindGameStage(self, PC, den=None) -> int:
         stage = 0
         if den:
             out = den.GetOpportunityGameStage()
@@ -791,51 +1450,6 @@ class AmbientSpawns(ModMenu.SDKMod):
         return stage
 
 
-def GetLocationWeight(PC, actor, testFOV: bool = False) -> float:
-    """ Returns a weight to choose this spawn point based on player view angle, 0 if invalid, -1 if failed FOV check """
-    viewYaw = PC.CalcViewRotation.Yaw * math.pi / 32768
-    viewVector = [math.cos(viewYaw), math.sin(viewYaw)]
-    # Comparing Yaw only so only care about X,Y plane
-    if not actor.Location:
-        #Log(f"{str(actor)} has no Location!")
-        return 0
-    location = actor.Location
-    normLocation = Normalise([location.X - PC.Pawn.Location.X, location.Y - PC.Pawn.Location.Y])
-    dot = viewVector[0] * normLocation[0] + viewVector[1] * normLocation[1]
-    
-    if testFOV:
-        # Probably has no spawn animation so don't do it in front of player.
-        #  I CBA with 3D Yaw Pitch Roll maths so just comparing Yaw.
-        #  If looking sharply up or down, you might still see these.
-        #  Also we don't just spawn all the enemies at once anymore,
-        #   so the delay means you might turn and see this anyway :/
-        if dot >= 0:
-            return -1
-    
-    # Bias towards points in front of the player
-    return ClampRange(0.2, 1.2, dot + 1)
-    
-
-def DistFromPlayer(PC, location) -> float:
-    """ Returns the distance from the player location on the X and Y planes only """
-    playerLocation = PC.pawn.Location
-    return math.sqrt(
-        (playerLocation.X - location.X)**2 +
-        (playerLocation.Y - location.Y)**2
-    )
-
-    
-def Normalise(vec):
-    magnitude = math.sqrt(sum(x * x for x in vec))
-    return [x / magnitude for x in vec]
-
-
-def ClampRange(min, max, x):
-    if x < min: return min
-    if x > max: return max
-    return x
-
-
 instance = AmbientSpawns()
 
 # Lets us reload the mod in-game using the console command pyexec
@@ -851,7 +1465,17 @@ if __name__ == "__main__":
             # Also reload other files
             from importlib import reload
             reload(custom_spawns)
+            reload(frame_budget)
             reload(level_packages)
+            reload(population)
+            reload(spawn_plan)
+            reload(spatial_index)
+            reload(spawn_geometry)
+            reload(visibility)
+            reload(map_cache)
+            reload(scheduler)
+            reload(spawn_pipeline)
+            reload(weighted_tables)
 
             # Fixes inspect.getfile()
             instance.__class__.__module__ = mod.__class__.__module__
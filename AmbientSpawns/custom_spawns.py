@@ -1,12 +1,15 @@
+from array import array
 import enum
+import json
+import os
 import random
-from typing import Dict, List, Set, Tuple
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
 import unrealsdk
 from unrealsdk import Log
 
 from Mods.AmbientSpawns import level_packages
 from Mods.AmbientSpawns.level_packages import *
-from Mods import ModMenu
+from Mods.AmbientSpawns.weighted_tables import WeightedTable
 
 
 class Tag(enum.IntEnum):
@@ -29,6 +32,42 @@ BadassTagWeights = {
 }
 """Weights for selecting a spawn by Badass Tag"""
 
+badassTagWeightsVersion = 0
+"""Bumped whenever BadassTagWeights changes, so TagWeightedTables know to refresh"""
+
+
+def SetBadassTagWeight(tag: Tag, weight: int):
+    global badassTagWeightsVersion
+    BadassTagWeights[tag] = weight
+    badassTagWeightsVersion = badassTagWeightsVersion + 1
+
+
+class TagWeightedTable(WeightedTable):
+    """A WeightedTable of spawns weighted by BadassTagWeights, which rebuilds itself lazily if those have changed"""
+    __slots__ = ("version",)
+    
+    def __init__(self, spawns: List["Spawn"]) -> None:
+        self.version = badassTagWeightsVersion
+        super().__init__(spawns, [BadassTagWeights[x.tag] for x in spawns])
+    
+    def Refresh(self):
+        if self.version != badassTagWeightsVersion:
+            self.version = badassTagWeightsVersion
+            self.Build(self.items, [BadassTagWeights[x.tag] for x in self.items])
+    
+    def GetTotal(self) -> float:
+        self.Refresh()
+        return super().GetTotal()
+    
+    def PickExcluding(self, excludedTags: Set[Tag]) -> "Spawn":
+        """Returns a random spawn whose tag isn't in excludedTags, or None if none of those have any weight"""
+        if not excludedTags:
+            return self.Pick()
+        weights = [0 if x.tag in excludedTags else BadassTagWeights[x.tag] for x in self.items]
+        if sum(weights) <= 0:
+            return None
+        return random.choices(self.items, weights)[0]
+
 POPDEF_TAG_OVERRIDES = [
     "PopDef_Orchid_SandWormQueen",
     "PopDef_WitchDoctorMix",
@@ -51,13 +90,16 @@ POPDEF_TAG_OVERRIDES = [
 ]
 """PopDefs that aren't caught by our other checks but we want to tag as ULTIMATE_BADASS"""
 
-megaMixCache: List[List[Tuple[object, object]]] = []  # Tuple[AIPawnBalanceDefinition, PopulationFactoryBalancedAIPawn]
+megaMixCache: List[Tuple[Tuple[object, object], ...]] = []  # Tuple[AIPawnBalanceDefinition, PopulationFactoryBalancedAIPawn]
+megaMixPoolsByAIDef: Dict[object, List[Tuple[Tuple[object, object], ...]]] = {}
+"""The cached pools each AIPawnBalanceDefinition is in, so substituting a spawned enemy is a single lookup"""
 
 
 def CacheMegaMixPools():
-    global megaMixCache
+    global megaMixCache, megaMixPoolsByAIDef
     megaMixCache = []
-    for pool in megaMixSubstitutionPools:
+    megaMixPoolsByAIDef = {}
+    for pool in customList.GetMegaMixSubstitutionPools():
         poolCache = []
         poolBodyTag = None
         for factoryPath in pool:
@@ -78,7 +120,21 @@ def CacheMegaMixPools():
                     poolBodyTag = bodyTag
                 poolCache.append((AIDef, factoryObj))
         if len(poolCache) > 1:
+            # Tuples so random.choice is a straight index
+            poolCache = tuple(poolCache)
             megaMixCache.append(poolCache)
+            for (AIDef, factoryObj) in poolCache:
+                megaMixPoolsByAIDef.setdefault(AIDef, []).append(poolCache)
+
+
+def GetMegaMixFactory(factory):
+    """Swaps the factory with a random one from a MegaMix pool its AIPawnBalanceDefinition is in, if any"""
+    pools = megaMixPoolsByAIDef.get(factory.PawnBalanceDefinition)
+    if not pools:
+        return factory
+    (ai, fact) = random.choice(random.choice(pools))
+    #Log(f"MegaMix - swapping factory {factory} with {fact}")
+    return fact
 
 
 # This is how I define all bespoke spawns that aren't using the in-game population points.
@@ -86,7 +142,18 @@ def CacheMegaMixPools():
 #  because not all enemies have a unique PopDef, but they do all have a unique factory.
 
 
+def NormaliseMapNames(mapNames) -> List[str]:
+    """Map lists can be given as a single map name too. We compare them in lowercase."""
+    if not mapNames:
+        return []
+    if isinstance(mapNames, str):
+        mapNames = [mapNames]
+    return [x.lower() for x in mapNames]
+
+
 class Spawn:
+    __slots__ = ("name", "tag", "delayBetweenSpawns", "minDistance", "spawnPointDef", "map_whitelist", "map_blacklist")
+    
     def __init__(self, name: str, tag: Tag, spawnPointDef, map_whitelist: List[str], map_blacklist: List[str]):
         self.name = name
         if tag:
@@ -101,22 +168,51 @@ class Spawn:
          "None" as a string really means None object when we use this."""
         if self.spawnPointDef == "None":
             self.delayBetweenSpawns = 0.1
-        self.map_whitelist = map_whitelist
-        self.map_blacklist = map_blacklist
+        self.map_whitelist = NormaliseMapNames(map_whitelist)
+        self.map_blacklist = NormaliseMapNames(map_blacklist)
+    
+    def IsAllowedInMap(self, mapNameLower) -> bool:
+        """Checks the map white/blacklists, which is cheap compared to LoadObjects"""
+        if not mapNameLower:
+            return True
+        if len(self.map_whitelist) > 0 and mapNameLower not in self.map_whitelist:
+            return False
+        if len(self.map_blacklist) > 0 and mapNameLower in self.map_blacklist:
+            return False
+        return True
         
     def LoadObjects(self, mapNameLower) -> bool:
         raise NotImplementedError
     
-    def DenSupportsSpawn(self, den) -> bool:
+    def GetEligibilityKey(self) -> str:
+        """Identifies this spawn in the eligibility index, by the objects it needs rather than its place in customList"""
+        raise NotImplementedError
+    
+    def GetLeafSpawns(self) -> List["CustomSpawn"]:
+        """Returns all CustomSpawns that make up this spawn, for SpawnSupportIndex"""
+        raise NotImplementedError
+    
+    def SupportedByLeaves(self, supportedLeaves: Set["CustomSpawn"]) -> bool:
+        """Whether a den can use this spawn, given the set of CustomSpawns it supports"""
+        raise NotImplementedError
+    
+    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False) -> Iterator[Tuple[object, str, float]]:
+        """
+        Yields (factory, spawnPointDef, delay) for a random instance of this spawn.
+        This is lazy, so each factory is only picked when the spawn pipeline gets to it.
+        """
         raise NotImplementedError
     
-    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False):
-        """Returns a list of (factory, spawnPointDef, delay) for a random instance of this spawn"""
+    def GetMaxSpawns(self) -> int:
+        """The most entries GetNewFactoryList can yield, since we can't know how many until it's done"""
         raise NotImplementedError
 
 
 class CustomSpawn(Spawn):
     """Spawns a random number of a given popDef or factory."""
+    __slots__ = ("numSpawns", "numSpawnsWeights", "minSpawns", "maxSpawns", "numSpawnsTable",
+                 "popDef", "factory", "factoryObj", "popDefObj", "bodyTagObj")
+    
     def __init__(self, name, tag, numSpawns=None, numSpawnsWeights=None, popDef=None, factory=None, spawnPointDef=None, map_whitelist=[], map_blacklist=[]) -> None:
         super().__init__(name, tag, spawnPointDef, map_whitelist, map_blacklist)
         
@@ -133,6 +229,7 @@ class CustomSpawn(Spawn):
             self.numSpawnsWeights = NullCustomSpawn.numSpawnsWeights
         self.minSpawns = min(self.numSpawns)
         self.maxSpawns = max(self.numSpawns)
+        self.numSpawnsTable = WeightedTable(self.numSpawns, self.numSpawnsWeights)
             
         self.popDef = None
         self.factory = factory
@@ -142,27 +239,21 @@ class CustomSpawn(Spawn):
             else:
                 self.popDef = NullCustomSpawn.popDef
         
-        self.map_blacklist = []
-        self.map_whitelist = []
-        
         self.factoryObj = None
         self.popDefObj = None
         self.bodyTagObj = None
         
-        self.megaMixPools = []
-        
     def GetRandomNumSpawns(self):
         if self.minSpawns == self.maxSpawns:
             return self.minSpawns
-        return random.choices(self.numSpawns, self.numSpawnsWeights)[0]
+        return self.numSpawnsTable.Pick()
     
-    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False):
-        """Returns a list of the single factory if defined, or a random factory from the popDef if not"""
+    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False) -> Iterator[Tuple[object, str, float]]:
+        """Yields the single factory if defined, or a random factory from the popDef if not, a random number of times"""
         thisNumSpawns = self.GetRandomNumSpawns()
         # A random-ish delay makes the Helios groups way better
         delayRange = int(100 * self.delayBetweenSpawns / 3)
         
-        factoryList = []
         for i in range(thisNumSpawns):
             randomDelay = self.delayBetweenSpawns + random.randint(-delayRange, delayRange) / 100
             if self.popDefObj:
@@ -176,82 +267,52 @@ class CustomSpawn(Spawn):
 
             if chosenFactory:
                 if megaMix:
-                    # Swap the factory with one from a megaMix pool
-                    for pool in self.megaMixPools:
-                        if any(chosenFactory.PawnBalanceDefinition is ai for (ai, fact) in pool):
-                            (ai, fact) = random.choice(pool)
-                            #Log(f"MegaMix - swapping factory {chosenFactory} with {fact}")
-                            chosenFactory = fact
-                factoryList.append((chosenFactory, self.spawnPointDef, randomDelay))
-        return factoryList
+                    chosenFactory = GetMegaMixFactory(chosenFactory)
+                yield (chosenFactory, self.spawnPointDef, randomDelay)
+    
+    def GetMaxSpawns(self) -> int:
+        return self.maxSpawns
 
     def LoadObjects(self, mapNameLower) -> bool:
         """
         Tries to load the defined PopDef/Factory object for this spawn.
-        Also tries to store MegaMix PopDef lists, if enabled.
         If mapNameLower is not None, also checks whether the given map is white/blacklisted for this CustomSpawn.
         Returns whether successful (and therefore usable in the current map).
         """
-        if mapNameLower:
-            if len(self.map_whitelist) > 0 and mapNameLower not in self.map_whitelist:
-                return False
-            if len(self.map_blacklist) > 0 and mapNameLower in self.map_blacklist:
-                return False
+        if not self.IsAllowedInMap(mapNameLower):
+            return False
         
         self.factoryObj = None
-        allFactories = []
         if self.factory:
             self.factoryObj = unrealsdk.FindObject("PopulationFactoryBalancedAIPawn", self.factory)
             if not self.factoryObj:
                 #Log(f"{self.factory} not found in this map.")
                 return False
-            allFactories = [self.factoryObj]
         else:
             self.popDefObj = unrealsdk.FindObject("WillowPopulationDefinition", self.popDef)
             if not self.popDefObj:
                 #Log(f"{self.popDef} not found in this map.")
                 return False
-            allFactories = GetAllFactoriesFromPopDef(self.popDefObj)
-            self.factoryObj = [*allFactories][0]  # Assuming all pawns in a factory have the same body tag
+            info = GetPopDefInfo(self.popDefObj)
+            self.factoryObj = info.firstFactory
             #self.factoryObj = self.GetFactoryFromPopDef(self.popDefObj)
             if not self.factoryObj:
                 #Log(f"{self.popDef} has no factory!")
                 return False
+            self.bodyTagObj = info.bodyTag
+            return True
         
         self.bodyTagObj = GetBodyTagFromFactory(self.factoryObj)
-                
-        # Store cached megaMix pools relevant to this spawn by comparing AIPawnBalanceDefinitions
-        self.megaMixPools = GetMegaMixPoolsFromFactoryList(allFactories)
         return True
     
-    def DenSupportsSpawn(self, den) -> bool:
-        """Checks whether this CustomSpawn can use spawn animations for the given den."""
-        if not self.factoryObj:
-            raise ValueError(f"A CustomSpawn {self.name} does not have a factory loaded for DenSupportsSpawn!")
-        
-        for spawn in den.SpawnPoints:
-            if not spawn:
-                continue
-            if not spawn.PointDef:
-                # No spawn anims at all, but we still can't guarantee these are available to spawn if the player is looking at it.
-                if self.spawnPointDef and self.spawnPointDef == "None":
-                    return True
-                continue
-            
-            if self.spawnPointDef:
-                # If we have given a specific spawn point then just check that
-                if self.spawnPointDef == spawn.PointDef.Name:
-                    return True
-            elif self.bodyTagObj:
-                for bodyTag in [animMap.Key for animMap in spawn.PointDef.AnimMap if animMap.Key]:
-                    # Check this tag matches the enemy we want to spawn
-                    if bodyTag is self.bodyTagObj:
-                        return True
-            else:
-                Log(f"{self.name} - Can't find a BodyTag from {self.factoryObj.PathName(self.factoryObj)} for den {den.PathName(den)}.")
-                Log(f"{self.name} - If this pawn actually has BodyTag=None, it needs to use spawnPointDef=\"None\".")
-        
-        return False
+    def GetEligibilityKey(self) -> str:
+        return self.factory if self.factory else self.popDef
+    
+    def GetLeafSpawns(self) -> List["CustomSpawn"]:
+        return [self]
+    
+    def SupportedByLeaves(self, supportedLeaves: Set["CustomSpawn"]) -> bool:
+        return self in supportedLeaves
     
     def IsInDLC(self, DLC: DLC) -> bool:
         if self.factoryObj:
@@ -261,13 +322,76 @@ class CustomSpawn(Spawn):
         return False
 
 
-def GetAllFactoriesFromPopDef(popDef) -> Set:
+class PopDefInfo:
+    """The flattened factory graph of a PopDef, and what we work out from it"""
+    __slots__ = ("factories", "firstFactory", "bodyTag", "numChampions", "numBadasses", "hasVehicle", "isSpawnable")
+
+    def __init__(self, factories: FrozenSet) -> None:
+        self.factories = factories
+        self.firstFactory = next(iter(factories), None)  # Assuming all pawns in a factory have the same body tag
+        self.bodyTag = GetBodyTagFromFactory(self.firstFactory) if self.firstFactory else False
+        self.numChampions = 0
+        self.numBadasses = 0
+        self.hasVehicle = False
+        self.isSpawnable = len(factories) > 0
+        """False if any factory is a critical actor or has nothing we can spawn"""
+        for factory in factories:
+            if not factory or factory.bIsCriticalActor:
+                self.isSpawnable = False
+                break
+            PawnDef = factory.PawnBalanceDefinition
+            if not PawnDef:
+                if factory.VehicleArchetype:
+                    # Tag vehicles as champions so only 1 per spawn
+                    self.hasVehicle = True
+                    self.numChampions = self.numChampions + 1
+                    continue
+                self.isSpawnable = False
+                break
+            if PawnDef.Champion:
+                self.numChampions = self.numChampions + 1
+            elif "badass" in PawnDef.PathName(PawnDef).lower():
+                self.numBadasses = self.numBadasses + 1
+
+
+popDefInfoCache: Dict[object, PopDefInfo] = {}
+"""PopDef object -> PopDefInfo, kept for as long as the PopDef's package is loaded"""
+
+
+def GetPopDefInfo(popDef) -> PopDefInfo:
+    info = popDefInfoCache.get(popDef)
+    if info is None:
+        _ResolveFactories(popDef, set())    # Always caches the PopDef we start from
+        info = popDefInfoCache[popDef]
+    return info
+
+
+def GetAllFactoriesFromPopDef(popDef) -> FrozenSet:
     """
     Some PopDefs list PopulationFactoryPopulationDefinition instead of PopulationFactoryBalancedAIPawn.
     We recurse through these to get the actual PopulationFactoryBalancedAIPawns.
     Some vehicle ones have PopulationFactoryWillowVehicle instead.
     """
+    info = popDefInfoCache.get(popDef)
+    if info is not None:
+        return info.factories
+    return _ResolveFactories(popDef, set())[0]
+
+
+def _ResolveFactories(popDef, visiting: Set) -> Tuple[FrozenSet, bool]:
+    """
+    Returns the factories under popDef, and whether that is the full set.
+    It isn't if we cut off a cycle back to a PopDef further up, so we only cache the complete ones.
+    """
+    info = popDefInfoCache.get(popDef)
+    if info is not None:
+        return (info.factories, True)
+    if popDef in visiting:
+        return (frozenset(), False)
+    
+    visiting.add(popDef)
     allFactories = set()    # Set to discount any duplicates
+    isComplete = True
     for archetype in popDef.ActorArchetypeList:
         spawnFactory = archetype.SpawnFactory
         if spawnFactory:
@@ -276,8 +400,28 @@ def GetAllFactoriesFromPopDef(popDef) -> Set:
                 allFactories.add(spawnFactory)
             elif className == "PopulationFactoryPopulationDefinition":
                 if spawnFactory.PopulationDef:
-                    allFactories = allFactories.union(GetAllFactoriesFromPopDef(spawnFactory.PopulationDef))
-    return allFactories
+                    (subFactories, subComplete) = _ResolveFactories(spawnFactory.PopulationDef, visiting)
+                    allFactories.update(subFactories)
+                    isComplete = isComplete and subComplete
+    visiting.discard(popDef)
+
+    factories = frozenset(allFactories)
+    if isComplete or not visiting:
+        # At the top of the walk the cycle has been fully covered either way
+        popDefInfoCache[popDef] = PopDefInfo(factories)
+        isComplete = True
+    return (factories, isComplete)
+
+
+def PrunePopDefCache():
+    """
+    Forgets every PopDef that isn't kept alive by our loaded packages, along with all its factories.
+    Call on map change, and after unloading any packages.
+    """
+    keptAlive = level_packages.keep_alive_registry.sources
+    for (popDef, info) in list(popDefInfoCache.items()):
+        if popDef not in keptAlive or not all(factory in keptAlive for factory in info.factories):
+            del popDefInfoCache[popDef]
 
 
 def GetBodyTagFromFactory(factory):
@@ -289,10 +433,6 @@ def GetBodyTagFromFactory(factory):
     return AIPawnBalanceDef.AIPawnArchetype.BodyClass.BodyTag
 
 
-def GetMegaMixPoolsFromFactoryList(allFactories) -> List[Tuple[object, object]]:
-    return [pool for pool in megaMixCache if any(x[0] in [f.PawnBalanceDefinition for f in allFactories] for x in pool)]
-
-
 def CustomSpawnFromPopDef(PopDef) -> CustomSpawn:
     if not PopDef:
         return None
@@ -300,35 +440,19 @@ def CustomSpawnFromPopDef(PopDef) -> CustomSpawn:
         return None
     
     tag = Tag.CHUMP
-    allFactories = GetAllFactoriesFromPopDef(PopDef)
-    numBadasses = 0
-    numChampions = 0
-    if len(allFactories) == 0:
+    info = GetPopDefInfo(PopDef)
+    if len(info.factories) == 0:
         #Log(f"{PopDef.PathName(PopDef)} has no factories?!")
         return False
-    
-    for factory in allFactories:
-        if not factory or factory.bIsCriticalActor:
-            return None
-        if not factory.PawnBalanceDefinition:
-            if factory.VehicleArchetype:
-                # Tag vehicles as champions so only 1 per spawn
-                numChampions = numChampions + 1
-                continue
-            return None
-        PawnDef = factory.PawnBalanceDefinition
-        if PawnDef:
-            if PawnDef.Champion:
-                numChampions = numChampions + 1
-            elif "badass" in PawnDef.PathName(PawnDef).lower():
-                numBadasses = numBadasses + 1
+    if not info.isSpawnable:
+        return None
     
     if "unique" in PopDef.PathName(PopDef).lower():
         tag = Tag.MINIBOSS
     # Not accounting for sub-popdef chance but whatevs
-    elif numChampions > len(allFactories) / 2 or PopDef.Name in POPDEF_TAG_OVERRIDES:
+    elif info.numChampions > len(info.factories) / 2 or PopDef.Name in POPDEF_TAG_OVERRIDES:
         tag = Tag.ULTIMATE_BADASS
-    elif numBadasses > len(allFactories) / 2:
+    elif info.numBadasses > len(info.factories) / 2:
         tag = Tag.BADASS
 
     numSpawns = [1]     # Default for Unique enemies
@@ -344,11 +468,10 @@ def CustomSpawnFromPopDef(PopDef) -> CustomSpawn:
         popDef=PopDef.PathName(PopDef)
     )
     spawn.popDefObj = PopDef
-    spawn.factoryObj = [x for x in allFactories][0]
-    spawn.bodyTagObj = GetBodyTagFromFactory(spawn.factoryObj)
+    spawn.factoryObj = info.firstFactory
+    spawn.bodyTagObj = info.bodyTag
     if not spawn.bodyTagObj:
         spawn.spawnPointDef = "None"
-    spawn.megaMixPools = GetMegaMixPoolsFromFactoryList(allFactories)
     return spawn
 
 
@@ -370,6 +493,8 @@ class NullCustomSpawn(CustomSpawn):
 
 class PoolSpawn(Spawn):
     """Spawns a number of CustomSpawns randomly picked from a pool of CustomSpawns"""
+    __slots__ = ("customSpawnList", "customSpawnWeights", "numSpawn", "activeSpawnList", "activeSpawnWeights", "activeSpawnTable")
+    
     def __init__(self, name, tag, numPicks=None, customSpawnList=[], customSpawnWeights=[], spawnPointDef=None, map_whitelist=[], map_blacklist=[]) -> None:
         super().__init__(name, tag, spawnPointDef, map_whitelist, map_blacklist)
         
@@ -386,13 +511,15 @@ class PoolSpawn(Spawn):
             self.numSpawn = 1
         self.activeSpawnList = [*self.customSpawnList]
         self.activeSpawnWeights = [*self.customSpawnWeights]
+        self.activeSpawnTable = WeightedTable(self.activeSpawnList, self.activeSpawnWeights)
+    
+    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False) -> Iterator[Tuple[object, str, float]]:
+        """Yields the factories for 'numPicks' randomly chosen CustomSpawns in this PoolSpawn"""
+        for choice in self.activeSpawnTable.Picks(self.numSpawn):
+            yield from choice.GetNewFactoryList(den, gameStage, rarity, megaMix)
     
-    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False):
-        """Returns the factory list for 'numPicks' randomly chosen CustomSpawns in this PoolSpawn"""
-        factoryList = []
-        for choice in random.choices(self.activeSpawnList, self.activeSpawnWeights, k=self.numSpawn):
-            factoryList = factoryList + choice.GetNewFactoryList(den, gameStage, rarity, megaMix)
-        return factoryList
+    def GetMaxSpawns(self) -> int:
+        return self.numSpawn * max((x.GetMaxSpawns() for x in self.activeSpawnList), default=0)
     
     def LoadObjects(self, mapNameLower) -> bool:
         """ Loads objects in all CustomSpawns.
@@ -401,18 +528,30 @@ class PoolSpawn(Spawn):
         """
         self.activeSpawnList = []
         self.activeSpawnWeights = []
+        if not self.IsAllowedInMap(mapNameLower):
+            self.activeSpawnTable = WeightedTable(self.activeSpawnList, self.activeSpawnWeights)
+            return False
         for i, x in enumerate(self.customSpawnList):
             if x.LoadObjects(mapNameLower):
                 self.activeSpawnList.append(x)
                 self.activeSpawnWeights.append(self.customSpawnWeights[i])
+        self.activeSpawnTable = WeightedTable(self.activeSpawnList, self.activeSpawnWeights)
         return len(self.activeSpawnList) > 0
     
-    def DenSupportsSpawn(self, den) -> bool:
-        return any(x.DenSupportsSpawn(den) for x in self.activeSpawnList)
+    def GetEligibilityKey(self) -> str:
+        return f"{self.name}({','.join(x.GetEligibilityKey() for x in self.customSpawnList)})"
+    
+    def GetLeafSpawns(self) -> List[CustomSpawn]:
+        return [leaf for x in self.activeSpawnList for leaf in x.GetLeafSpawns()]
+    
+    def SupportedByLeaves(self, supportedLeaves: Set[CustomSpawn]) -> bool:
+        return any(x.SupportedByLeaves(supportedLeaves) for x in self.activeSpawnList)
 
 
 class MultiSpawn(Spawn):
     """Spawns a fixed number of each CustomSpawn"""
+    __slots__ = ("customSpawnList", "numSpawn")
+    
     def __init__(self, name, tag, numSpawn=None, customSpawnList=[], spawnPointDef=None, map_whitelist=[], map_blacklist=[]) -> None:
         super().__init__(name, tag, spawnPointDef, map_whitelist, map_blacklist)
         self.minDistance = 2000
@@ -423,705 +562,305 @@ class MultiSpawn(Spawn):
         else:
             self.numSpawn = [1 for x in customSpawnList]
     
-    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False):
-        """Returns the factory list combining each CustomSpawn in this MultiSpawn"""
-        factoryList = []
+    def GetNewFactoryList(self, den, gameStage, rarity=1, megaMix=False) -> Iterator[Tuple[object, str, float]]:
+        """Yields the factories of each CustomSpawn in this MultiSpawn in turn"""
         for i, customSpawn in enumerate(self.customSpawnList):
             for j in range(self.numSpawn[i]):
-                factoryList = factoryList + customSpawn.GetNewFactoryList(den, gameStage, rarity, megaMix)
-        return factoryList
+                yield from customSpawn.GetNewFactoryList(den, gameStage, rarity, megaMix)
+    
+    def GetMaxSpawns(self) -> int:
+        return sum(self.numSpawn[i] * x.GetMaxSpawns() for i, x in enumerate(self.customSpawnList))
     
     def LoadObjects(self, mapNameLower) -> bool:
-        if len(self.map_whitelist) > 0 and mapNameLower not in self.map_whitelist:
-            return False
-        if len(self.map_blacklist) > 0 and mapNameLower in self.map_blacklist:
+        if not self.IsAllowedInMap(mapNameLower):
             return False
         return all(x.LoadObjects(mapNameLower) for x in self.customSpawnList)
     
-    def DenSupportsSpawn(self, den) -> bool:
-        return all(x.DenSupportsSpawn(den) for x in self.customSpawnList)
+    def GetEligibilityKey(self) -> str:
+        return f"{self.name}({','.join(x.GetEligibilityKey() for x in self.customSpawnList)})"
+    
+    def GetLeafSpawns(self) -> List[CustomSpawn]:
+        return [leaf for x in self.customSpawnList for leaf in x.GetLeafSpawns()]
+    
+    def SupportedByLeaves(self, supportedLeaves: Set[CustomSpawn]) -> bool:
+        return all(x.SupportedByLeaves(supportedLeaves) for x in self.customSpawnList)
 
 
-customList: Dict[ModMenu.Game, Dict[str, List[Spawn]]] = {
-    ModMenu.Game.BL2: {
-        DLC.BL2: [
-            # Bandit
-            CustomSpawn("A butt-load of midgets",Tag.CHUMP,range(8,15),[4,5,5,3,2,1,1],popDef="GD_Population_Midget.Population.PopDef_MidgetMix_Regular"),
-            CustomSpawn("Bruisers",Tag.CHUMP,range(1,4),popDef="GD_Population_Bruiser.Population.PopDef_Bruiser"),
-            CustomSpawn("More-rauders",Tag.CHUMP,range(3,7),[2,3,2,1],popDef="GD_Population_Marauder.Population.PopDef_MarauderMix_Regular"),
-            
-            CustomSpawn("Watch Out! Badass Psychos!",Tag.ULTIMATE_BADASS,range(2,4),[3,2],popDef="GD_Population_Psycho.Population.PopDef_PsychoBadass"),
-            CustomSpawn("Badass Marauders",Tag.ULTIMATE_BADASS,range(2,5),[3,3,1],popDef="GD_Population_Bandit.Population.PopDef_BanditBadassMix"),
-            
-            MultiSpawn("Nomad Commander",Tag.BADASS,customSpawnList=[
-                CustomSpawn("Big Nomad",Tag.CHUMP,              popDef="GD_Population_Nomad.Population.PopDef_Nomad_Taskmaster"),
-                CustomSpawn("Minions1",Tag.CHUMP,range(3,4),    popDef="GD_Population_Marauder.Population.PopDef_MarauderGrunt"),
-                CustomSpawn("Minions2",Tag.CHUMP,range(2,4),    popDef="GD_Population_Marauder.Population.PopDef_Marauder"),
-            ]),
-            MultiSpawn("Goliath & Friends",Tag.BADASS,customSpawnList=[
-                CustomSpawn("Big Goliath",Tag.BADASS,           popDef="GD_Population_Goliath.Population.PopDef_GoliathBadass"),
-                CustomSpawn("Minions1",Tag.CHUMP,range(3,4),    popDef="GD_Population_Marauder.Population.PopDef_MarauderMix_Regular"),
-                CustomSpawn("Minions2",Tag.CHUMP,range(2,4),    popDef="GD_Population_Midget.Population.PopDef_MidgetMix_Regular"),
-            ]),
-            MultiSpawn("Friend & Goliaths",Tag.BADASS,customSpawnList=[
-                CustomSpawn("Friend",Tag.CHUMP,                     popDef="GD_Population_Midget.Population.PopDef_MidgetBadass"),
-                CustomSpawn("Goliaths",Tag.MEDIUM,[1,2,3],[2,2,1],  popDef="GD_Population_Goliath.Population.PopDef_GoliathMix_Regular"),
-                CustomSpawn("Big Goliath",Tag.BADASS,               popDef="GD_Population_Goliath.Population.PopDef_GoliathTurret"),
-            ]),
-            MultiSpawn("BBQ Time",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Pyro",Tag.CHUMP,                   factory="GD_Population_Bandit.Population.PopDef_BanditMix_IceCanyon:PopulationFactoryBalancedAIPawn_4"),
-                CustomSpawn("Midgets",Tag.CHUMP,range(2,5),     popDef="GD_Population_Midget.Population.PopDef_FlamingMidget"),
-                CustomSpawn("Fireburn Mix",Tag.CHUMP,range(1,4),popDef="GD_Population_Bandit.Population.PopDef_BanditMix_IceCanyon"),
-            ]),
-            
-            PoolSpawn("Bandit Minibosses",Tag.MINIBOSS,customSpawnList=[    # Not allowed where they spawn normally
-                CustomSpawn("Doc Mercy",Tag.MINIBOSS,popDef="GD_Population_Nomad.Population.Unique.PopDef_MrMercy", map_blacklist=["frost_p"]),
-                CustomSpawn("Mad Mike 'boutta ruin your day",Tag.MINIBOSS,popDef="GD_Population_Nomad.Population.Unique.PopDef_MadMike", map_blacklist=["dam_p"]),
-                CustomSpawn("Prospector",Tag.MINIBOSS,popDef="GD_Population_Nomad.Population.Unique.PopDef_Prospector", map_blacklist="tundraexpress_p"),
-                MultiSpawn("Assassin Tagteam",Tag.BOSS,customSpawnList=[
-                    CustomSpawn("Ass Wot",Tag.MINIBOSS,     popDef="GD_Population_Marauder.Population.Unique.PopDef_Assassin1"),
-                    CustomSpawn("Ass Oney",Tag.MINIBOSS,    popDef="GD_Population_Nomad.Population.Unique.PopDef_Assassin2"),
-                    CustomSpawn("Ass Reeth",Tag.MINIBOSS,   popDef="GD_Population_Psycho.Population.Unique.PopDef_Assassin3"),
-                    CustomSpawn("Ass Rouf",Tag.MINIBOSS,    popDef="GD_Population_Rat.Population.Unique.PopDef_Assassin4"),
-                ], map_blacklist=["southpawfactory_p"]),
-                MultiSpawn("Deputy Winger",Tag.MINIBOSS,customSpawnList=[
-                    CustomSpawn("Deputy",Tag.MINIBOSS,      popDef="GD_Population_Sheriff.Population.Pop_Deputy"),
-                    CustomSpawn("Marshals",Tag.CHUMP,[4,5], popDef="GD_Population_Sheriff.Population.Pop_Marshal"),
-                ], map_blacklist=["grass_lynchwood_p"]),
-            ], customSpawnWeights=[2,2,2,1,2]),
-
-            # Rats
-            MultiSpawn("Mine Rats",Tag.CHUMP,customSpawnList=[
-                CustomSpawn("Tunnel Rats",Tag.CHUMP,range(2,4),     factory="GD_Population_Bandit.Population.PopDef_BanditMix_Lynchwood_RatMiners:PopulationFactoryBalancedAIPawn_6"),
-                CustomSpawn("Miner Rat Mix",Tag.CHUMP,range(2,5),   popDef="GD_Population_Bandit.Population.PopDef_BanditMix_Lynchwood_RatMiners"),
-            ]),
-            MultiSpawn("Laney & Co.",Tag.MINIBOSS,customSpawnList=[
-                CustomSpawn("Laney",Tag.MINIBOSS,   popDef="GD_Population_Rat.Population.Unique.PopDef_Laney"),
-                CustomSpawn("Dwarf1",Tag.MINIBOSS,  popDef="GD_Population_Midget.Population.Unique.PopDef_LaneyDwarf1"),
-                CustomSpawn("Dwarf2",Tag.MINIBOSS,  popDef="GD_Population_Midget.Population.Unique.PopDef_LaneyDwarf2"),
-                CustomSpawn("Dwarf3",Tag.MINIBOSS,  popDef="GD_Population_Midget.Population.Unique.PopDef_LaneyDwarf3"),
-                CustomSpawn("Dwarf4",Tag.MINIBOSS,  popDef="GD_Population_Midget.Population.Unique.PopDef_LaneyDwarf4"),
-                CustomSpawn("Dwarf5",Tag.MINIBOSS,  popDef="GD_Population_Midget.Population.Unique.PopDef_LaneyDwarf5"),
-                CustomSpawn("Dwarf6",Tag.MINIBOSS,  popDef="GD_Population_Midget.Population.Unique.PopDef_LaneyDwarf6"),
-                CustomSpawn("Dwarf7",Tag.MINIBOSS,  popDef="GD_Population_Midget.Population.Unique.PopDef_LaneyDwarf7")
-            ], map_blacklist=["fridge_p"]),
-            MultiSpawn("TMNR",Tag.MINIBOSS,customSpawnList=[
-                CustomSpawn("Dan",Tag.MINIBOSS,                 popDef="GD_Population_Rat.Population.Unique.PopDef_RatDan"),
-                CustomSpawn("Lee",Tag.MINIBOSS,                 popDef="GD_Population_Rat.Population.Unique.PopDef_RatLee"),
-                CustomSpawn("Mick",Tag.MINIBOSS,                popDef="GD_Population_Rat.Population.Unique.PopDef_RatMick"),
-                CustomSpawn("Ralph",Tag.MINIBOSS,               popDef="GD_Population_Rat.Population.Unique.PopDef_RatRalph"),
-                CustomSpawn("Flinter",Tag.MINIBOSS,[0,1],[2,1], popDef="GD_Population_Rat.Population.Unique.PopDef_RatEasterEgg")
-            ], map_blacklist=["dam_p"]),
-            
-            # Hyperion
-            CustomSpawn("Helios ATTACKS!",Tag.MEDIUM,range(8,15),popDef="GD_Population_Loader.Population.PopDef_LoaderMix_Regular",spawnPointDef="PopPointDef_OrbitalDrop"),
-            MultiSpawn("Helios ATTACKS AGAIN (because it's cool)",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("RPG",Tag.CHUMP,[2,3],[1,1],    popDef="GD_Population_Loader.Population.PopDef_LoaderRPG"),
-                CustomSpawn("SGT",Tag.CHUMP,[2,3],[1,1],    popDef="GD_Population_Loader.Population.PopDef_LoaderSGT"),
-                CustomSpawn("WAR",Tag.MEDIUM,[1,2],[4,1],   popDef="GD_Population_Loader.Population.PopDef_LoaderWAR"),
-            ]),
-            CustomSpawn("Helios ATTACKS - Bunker Mix",Tag.MEDIUM,range(6,13),popDef="GD_Population_Loader.Population.PopDef_LoaderMix_BunkerFight",spawnPointDef="PopPointDef_OrbitalDrop"),
-            CustomSpawn("Lookout! Badass Loaders",Tag.BADASS,[2,3,4],[7,4,1],popDef="GD_Population_Loader.Population.PopDef_LoaderBadass"),
-            CustomSpawn("Big Boi Loader",Tag.ULTIMATE_BADASS,[1,2],[4,1],popDef="GD_Population_Loader.Population.PopDef_LoaderSuperBadass"),
-            CustomSpawn("EXPlooooosions",Tag.CHUMP,range(5,11),[1,2,3,3,2,2],popDef="GD_Population_Loader.Population.PopDef_LoaderEXP"),
-            CustomSpawn("LEEEEROYYYYY",Tag.BOSS,factory="GD_Population_Midget.Population.LootMidget.PopDef_LootMidget_HyperionMix:PopulationFactoryBalancedAIPawn_5",spawnPointDef="None"),
-            MultiSpawn("Loaders+Surveyors",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Loaders",Tag.CHUMP,range(3,7),             popDef="GD_Population_Loader.Population.PopDef_LoaderMix_Military"),
-                CustomSpawn("Badass Surveyor",Tag.BADASS,[1,2],[2,1],   popDef="GD_Population_Probe.Population.PopDef_ProbeMix_Badass"),
-                CustomSpawn("Surveyors",Tag.CHUMP,range(2,5),           popDef="GD_Population_Probe.Population.PopDef_ProbeMix_Regular"),
-            ]),
-            MultiSpawn("Loaders+Engis",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Loaders",Tag.CHUMP,range(4,7),     popDef="GD_Population_Loader.Population.PopDef_LoaderMix_Regular"),
-                CustomSpawn("EngiArms",Tag.CHUMP,range(1,3),    popDef="GD_Population_Engineer.Population.PopDef_EngineerArms"),
-                CustomSpawn("EngiFleshy",Tag.CHUMP,range(1,3),  popDef="GD_Population_Engineer.Population.PopDef_Engineer"),
-            ]),
-            MultiSpawn("BlackOps",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Snipers",Tag.CHUMP,range(2,4),     popDef="GD_Population_Engineer.Population.PopDef_BlackOps"),
-                CustomSpawn("Cloakers",Tag.CHUMP,range(2,4),    popDef="GD_Population_Engineer.Population.PopDef_HyperionInfiltrator"),
-            ]),
-            MultiSpawn("Assault",Tag.MEDIUM,customSpawnList=[
-                # Soldier needs allegiance to match the turrets so no den change
-                CustomSpawn("Soldier",Tag.CHUMP,range(2,4),     popDef="GD_Population_Engineer.Population.PopDef_HyperionSoldier"),
-                CustomSpawn("Rockets",Tag.CHUMP,range(1,3),     factory="GD_Population_Hyperion.Population.PopDef_HyperionMix_Fyrestone:PopulationFactoryBalancedAIPawn_4"),
-            ]),
-            MultiSpawn("Flying enemies are fun",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Jets",Tag.CHUMP,range(3,5),        popDef="GD_Population_Loader.Population.PopDef_LoaderJET"),
-                CustomSpawn("Surveyors",Tag.CHUMP,range(2,5),   popDef="GD_Population_Probe.Population.PopDef_ProbeMix_Regular")
-            ]),
-            CustomSpawn("Wilhelm",Tag.BOSS,factory="GD_Population_Loader.Population.Unique.PopDef_Willhelm:PopulationFactoryBalancedAIPawn_1",spawnPointDef="None",map_blacklist=["tundratrain_p"]),
-            
-            # Fauna - some just basic mixes to pad so not only custom minibosses
-            # Rakk attacks don't work in other maps for some reason
-            #CustomSpawn("Release the Rakk!",Tag.CHUMP,[4,8],popDef="GD_Population_Rakk.Population.PopDef_Rakk",spawnPointDef="None"),
-            #CustomSpawn("Skag Mix",Tag.CHUMP,range(4,7),popDef="GD_Population_Skag.Population.PopDef_SkagMix_Regular"),
-            #CustomSpawn("Bullymong Mix",Tag.CHUMP,range(4,7),popDef="GD_Population_PrimalBeast.Population.PopDef_PrimalBeastMix_Ash"),
-            MultiSpawn("Thresher Mix",Tag.CHUMP,customSpawnList=[
-                CustomSpawn("Threshers",Tag.CHUMP,range(4,7),   popDef="GD_Population_Thresher.Population.PopDef_ThresherMix_Regular"),
-                CustomSpawn("Tentacles",Tag.CHUMP,range(4,7),   popDef="GD_Population_Thresher.Population.PopDef_TentacleMix_Regular")
-            ]),
-            CustomSpawn("Spiderant Mix",Tag.CHUMP,range(4,7),popDef="GD_Population_SpiderAnt.Population.PopDef_SpiderantMix_Regular"),
-            CustomSpawn("Sponics",Tag.CHUMP,range(4,10),factory="GD_Population_SpiderAnt.Population.PopDef_SpiderantMix_Regular:PopulationFactoryBalancedAIPawn_2"),
-            PoolSpawn("Stalker Mix",Tag.MEDIUM,numPicks=4,customSpawnList=[
-                CustomSpawn("Stalker",Tag.CHUMP,[1,2],          popDef="GD_Population_Stalker.Population.PopDef_Stalker"),
-                CustomSpawn("Badass",Tag.BADASS,[1],            popDef="GD_Population_Stalker.Population.PopDef_StalkerBadass"),
-                CustomSpawn("Ambush",Tag.ULTIMATE_BADASS,[1],   popDef="GD_Population_Stalker.Population.PopDef_StalkerMix_Ambush"),
-                CustomSpawn("Cyclone",Tag.MEDIUM,[1,2],         popDef="GD_Population_Stalker.Population.PopDef_StalkerMix_Cyclone"),
-                CustomSpawn("Stalker",Tag.CHUMP,[1,2],          popDef="GD_Population_Stalker.Population.PopDef_StalkerMix_Needle"),
-                CustomSpawn("Spring",Tag.CHUMP,[1,2],           popDef="GD_Population_Stalker.Population.PopDef_StalkerMix_Spring"),
-            ], customSpawnWeights=[3,1,1,4,3,3]),
-            
-            MultiSpawn("Skag Ma & Pa",Tag.BADASS,customSpawnList=[
-                CustomSpawn("Badass",Tag.BADASS,[2],        popDef="GD_Population_Skag.Population.PopDef_SkagMix_Badass"),
-                CustomSpawn("Pups",Tag.CHUMP,range(4,10),   popDef="GD_Population_Skag.Population.PopDef_SkagPup")
-            ]),
-            PoolSpawn("Creepers",Tag.MINIBOSS,numPicks=3,customSpawnList=[
-                CustomSpawn("Badass Creeper",Tag.MINIBOSS,[1],     popDef="GD_Population_Creeper.Population.PopDef_CreeperBadass",spawnPointDef="None"),
-                CustomSpawn("Normal Creeper",Tag.MINIBOSS,[1,2],   popDef="GD_Population_Creeper.Population.PopDef_Creeper",spawnPointDef="None"),
-            ], customSpawnWeights=[1,3], spawnPointDef="None"),
-            
-            MultiSpawn("Terramorphous Peek",Tag.BOSS,customSpawnList=[
-                CustomSpawn("Spikes",Tag.MINIBOSS,[1,2],[3,1],  popDef="GD_Population_Thresher.Population.Unique.PopDef_TentacleRaidA",spawnPointDef="None"),
-                CustomSpawn("Rock",Tag.MINIBOSS,[1,2],[3,1],    popDef="GD_Population_Thresher.Population.Unique.PopDef_TentacleRaidC",spawnPointDef="None"),
-                CustomSpawn("Beam",Tag.MINIBOSS,[1,2],[3,1],    popDef="GD_Population_Thresher.Population.Unique.PopDef_TentacleRaidD",spawnPointDef="None"),
-                CustomSpawn("Masher",Tag.MINIBOSS,[1,2],[3,1],  popDef="GD_Population_Thresher.Population.Unique.PopDef_TentacleRaidE",spawnPointDef="None"),
-            ], spawnPointDef="None"),
-            CustomSpawn("Terramorphous Peek Fire",Tag.BOSS,[3,4,5],[2,3,1],popDef="GD_Population_Thresher.Population.Unique.PopDef_TentacleRaidF",spawnPointDef="None"),
+bodyTagsByPointDef: Dict[object, Set[object]] = {}
+"""Cache of the BodyTags that each WillowPopulationPointDefinition has spawn anims for. Many dens share the same PointDefs."""
+
+
+def GetBodyTagsFromPointDef(pointDef) -> Set:
+    bodyTags = bodyTagsByPointDef.get(pointDef)
+    if bodyTags is None:
+        bodyTags = {animMap.Key for animMap in pointDef.AnimMap if animMap.Key}
+        bodyTagsByPointDef[pointDef] = bodyTags
+    return bodyTags
+
+
+spawnAnimLengths: Dict[Tuple[object, object], Optional[float]] = {}
+"""Cache of (PointDef, BodyTag) -> how long that PointDef's spawn anim for that BodyTag lasts, or None if we couldn't find it"""
+
+
+def GetSpawnAnimLength(pointDef, factory) -> Optional[float]:
+    """
+    How long the spawn anim that this PointDef plays for the factory's pawn lasts, in seconds.
+    This is the SpecialMove in the PointDef's AnimMap for the pawn's BodyTag, looked up in the pawn archetype's AnimSets.
+    Returns None if any of that can't be found, e.g. for vehicle factories.
+    """
+    balanceDef = getattr(factory, "PawnBalanceDefinition", None)
+    archetype = balanceDef.AIPawnArchetype if balanceDef else None
+    if not archetype or not archetype.BodyClass:
+        return None
+    bodyTag = archetype.BodyClass.BodyTag
+    key = (pointDef, bodyTag)
+    if key in spawnAnimLengths:
+        return spawnAnimLengths[key]
     
-            # None PointDef padding (so we don't get too many boss spawns here)
-            CustomSpawn("FOV Stalker",Tag.CHUMP,range(2,4),popDef="GD_Population_Stalker.Population.PopDef_StalkerMix_Cyclone",spawnPointDef="None"),
-            CustomSpawn("FOV Thresher",Tag.CHUMP,range(2,4),popDef="GD_Population_Thresher.Population.PopDef_ThresherMix_Regular",spawnPointDef="None"),
-        ],
-        
-        DLC.Scarlett: [
-            # Sandworms just don't work outside of terrain they usually appear :/
-            # MultiSpawn("Sandworm Ambush",Tag.CHUMP,customSpawnList=[
-            #     CustomSpawn("Queen",Tag.MEDIUM,             popDef="GD_Orchid_Pop_SandWorm.Population.PopDef_Orchid_SandWormQueen",spawnPointDef="None"),
-            #     CustomSpawn("Worms",Tag.CHUMP,range(2,6),   popDef="GD_Orchid_Pop_SandWorm.Population.PopDef_Orchid_SandWorm",spawnPointDef="None"),
-            # ],spawnPointDef="None",map_whitelist=["Orchid_OasisTown_P","Orchid_SaltFlats_P"]),
-            # CustomSpawn("Rakk Hive - Outta Nowhere!",Tag.BOSS,popDef="GD_Orchid_Pop_RakkHive.Character.PopDef_Orchid_RakkHive",spawnPointDef="None"),
-            PoolSpawn("Avast or we'll blast ya",Tag.CHUMP,numPicks=6,customSpawnList=[
-                CustomSpawn("Captain",Tag.BADASS,   popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateCaptain"),
-                CustomSpawn("Cursed",Tag.MEDIUM,    popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateCursed"),
-                CustomSpawn("Grenadier",Tag.CHUMP,  popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateGrenadier"),
-                CustomSpawn("Hunter",Tag.CHUMP,     popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateHunter"),
-                CustomSpawn("Marauder",Tag.CHUMP,   popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateMarauder"),
-                CustomSpawn("Ninja",Tag.CHUMP,      popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateNinja"),
-                CustomSpawn("Psycho",Tag.CHUMP,     popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PiratePsycho"),
-            ], customSpawnWeights=[2,3,5,5,5,5,5]),
-            MultiSpawn("Large Lads",Tag.MEDIUM,customSpawnList=[
-                PoolSpawn("Large Lad",Tag.BADASS,customSpawnList=[
-                    CustomSpawn("Anchorman",Tag.BADASS, popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_AnchorMan"),
-                    CustomSpawn("Minelayer",Tag.BADASS, factory="GD_Orchid_Pop_Pirates.MapPopulations.PopDef_Orchid_SpireMix:PopulationFactoryBalancedAIPawn_14"),
-
-                ]),
-                PoolSpawn("Not-so-large Lads",Tag.MEDIUM,numPicks=3,customSpawnList=[
-                    CustomSpawn("Whaler",Tag.MEDIUM,    factory="GD_Orchid_Pop_Pirates.MapPopulations.PopDef_Orchid_SpireMix:PopulationFactoryBalancedAIPawn_12"),
-                    CustomSpawn("Buccaneer",Tag.MEDIUM, popDef="GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_SwordMan"),
-                ])
-            ]),
-            MultiSpawn("Would you kindly harvest this midget",Tag.MINIBOSS,customSpawnList=[
-                CustomSpawn("Mr Bubbles",Tag.MINIBOSS,  popDef="GD_Orchid_Pop_BubblesLilSis.Population.PopDef_Orchid_Bubbles"),
-                CustomSpawn("Little Sis",Tag.MINIBOSS,  popDef="GD_Orchid_Pop_BubblesLilSis.Population.PopDef_Orchid_LittleSis"),
-            ], map_blacklist=["orchid_spire_p"]),
-            MultiSpawn("Scarlett Crew",Tag.ULTIMATE_BADASS,customSpawnList=[
-                CustomSpawn("Lt. White",Tag.BADASS,         popDef="GD_Orchid_Pop_ScarlettCrew.Population.PopDef_Orchid_PirateHenchman"),
-                CustomSpawn("Lt. Hoffman",Tag.BADASS,       popDef="GD_Orchid_Pop_ScarlettCrew.Population.PopDef_Orchid_PirateHenchman2"),
-                CustomSpawn("Crew",Tag.MEDIUM,range(1,4),   popDef="GD_Orchid_Pop_ScarlettCrew.Population.PopDef_Betrayal_Mix"),
-                CustomSpawn("Ninjas",Tag.MEDIUM,range(1,3), popDef="GD_Orchid_Pop_ScarlettCrew.Population.PopDef_Orchid_ScarlettNinja"),
-            ], map_blacklist=["orchid_spire_p"])
-        ],
-        
-        DLC.Torgue: [
-            CustomSpawn("Torgue Loaders",Tag.MEDIUM,range(3,7),popDef="GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge"),
-            MultiSpawn("Arena Goliath & Friends",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Goliath",Tag.MEDIUM,[1,2],[2,1],   popDef="GD_Iris_Population_Goliath.Population.PopDef_Iris_ArenaGoliath"),
-                CustomSpawn("Psychos",Tag.CHUMP,range(0,2),     popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerMidget_Torgue"),
-                CustomSpawn("Midgets",Tag.CHUMP,range(1,3),     popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerPsycho_Torgue"),
-            ]),
-            MultiSpawn("Mommas Gang",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Enforcer",Tag.MEDIUM,[1,2],[2,1],  popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_BigBiker_Angels"),
-                CustomSpawn("Angel Mix",Tag.MEDIUM,range(2,6),  popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_Biker_Gang_AngelsMix"),
-            ]),
-            MultiSpawn("Burner Gang",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Enforcer",Tag.MEDIUM,[1,2],[2,1],  popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_BigBiker_Dragon"),
-                CustomSpawn("Demon Mix",Tag.MEDIUM,range(2,6),  popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_Biker_Gang_DragonMix"),
-            ]),
-            MultiSpawn("Torgue Gang",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Enforcer",Tag.MEDIUM,[1,2],[2,1],  popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_BigBiker_Torgue"),
-                CustomSpawn("Torgue Mix",Tag.MEDIUM,range(2,6), popDef="GD_Iris_Population_Biker.Gangs.PopDef_Iris_Biker_Gang_TorgueMix"),
-            ]),
-        ],
-        
-        DLC.Hammerlock: [
-            CustomSpawn("Elite Savages",Tag.ULTIMATE_BADASS,[2,3,4],[1,2,2],popDef="GD_Sage_Pop_Natives.Population.PopDef_Native_Elite"),
-            CustomSpawn("Spore Pinata Party",Tag.CHUMP,[3,4,5],popDef="GD_Sage_Pop_Spore.Population.PopDef_Sage_GiantSpore_Mix",spawnPointDef="None"),
-            MultiSpawn("FOV Scaylions",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Champion",Tag.BADASS,      popDef="GD_Sage_Pop_Scaylion.Population.PopDef_Sage_ScaylionMix_Champion",spawnPointDef="None"),
-                CustomSpawn("Mix",Tag.CHUMP,range(2,5), popDef="GD_Sage_Pop_Scaylion.Population.PopDef_Sage_ScaylionMix_Regular",spawnPointDef="None"),
-            ], spawnPointDef="None"),
-            MultiSpawn("FOV Boraks",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Badass",Tag.BADASS,        popDef="GD_Sage_Pop_Rhino.Population.PopDef_RhinoMix_Badass",spawnPointDef="None"),
-                CustomSpawn("Baby",Tag.CHUMP,range(2,5), popDef="GD_Sage_Pop_Rhino.Population.PopDef_Sage_RhinoBaby",spawnPointDef="None"),
-            ], spawnPointDef="None")
-        ],
-        
-        DLC.DragonKeep: [
-            # Orcs
-            CustomSpawn("Handsome Tower ATTACKS!",Tag.MEDIUM,range(6,15),popDef="GD_Aster_Pop_Orcs.Population.PopDef_OrcsDen_Regular",spawnPointDef="PopPointDef_Orc_OrbitalDrop"),
-            CustomSpawn("Orcsplooooosions",Tag.CHUMP,range(5,11),[1,2,3,3,2,2],popDef="GD_Aster_Pop_Orcs.Population.PopDef_OrcsDen_Kamikaze"),
-            MultiSpawn("Orc Warlord Party",Tag.ULTIMATE_BADASS,customSpawnList=[
-                PoolSpawn("Warlord",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    #CustomSpawn("Grug",Tag.ULTIMATE_BADASS,popDef="GD_Aster_Pop_Orcs.Population.PopDef_Orc_WarlordGrug"),
-                    CustomSpawn("Slog",Tag.ULTIMATE_BADASS,popDef="GD_Aster_Pop_Orcs.Population.PopDef_Orc_WarlordSlog"),
-                    CustomSpawn("Turge",Tag.ULTIMATE_BADASS,popDef="GD_Aster_Pop_Orcs.Population.PopDef_Orc_WarlordTurge")
-                ]),
-                CustomSpawn("Grunts",Tag.CHUMP,range(2,6),popDef="GD_Aster_Pop_Orcs.Population.PopDef_Orc_Grunt"),
-                CustomSpawn("Bashers",Tag.CHUMP,range(1,4),popDef="GD_Aster_Pop_Orcs.Population.PopDef_Orc_Basher"),
-                CustomSpawn("Zerkers",Tag.MEDIUM,range(0,3),popDef="GD_Aster_Pop_Orcs.Population.PopDef_Orczerker"),
-            ]),
-            # Spiders
-            MultiSpawn("Arachne Hunting Party",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Reapers",Tag.MEDIUM,range(4,8),    popDef="GD_Aster_Pop_Spiders.Population.PopDef_Arachne"),
-                CustomSpawn("Minions",Tag.CHUMP,range(4,8),     popDef="GD_Aster_Pop_Spiders.Population.PopDef_SpiderDen_Regular")
-            ]),
-            # CBA load Dark Forest and fix stumpy materials just for this
-            #CustomSpawn("Pixie",Tag.BOSS,popDef="GD_Aster_Pop_Wisp.Population.PopDef_Aster_Wisp",spawnPointDef="None"),
-            # Knights
-            MultiSpawn("Target Practise",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Badass Archer",Tag.BADASS,popDef="GD_Aster_Pop_Knights.Population.PopDef_Knight_BadassFireArcher"),
-                CustomSpawn("Archers",Tag.CHUMP,range(2,5),popDef="GD_Aster_Pop_Knights.Population.PopDef_Knight_Archer")
-            ]),
-            MultiSpawn("Paladins",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Paladins",Tag.MEDIUM,[3],popDef="GD_Aster_Pop_Knights.Population.PopDef_Knight_Paladin"),
-                CustomSpawn("Chumps",Tag.CHUMP,range(3,7),popDef="GD_Aster_Pop_Knights.Population.PopDef_KnightsDen_Regular")
-            ]),
-            CustomSpawn("It's time to CLEAN THE FLOOR WITH YOU",Tag.BOSS,range(5,11),popDef="GD_Aster_Pop_Knights.Population.PopDef_Knight_Broomstick",spawnPointDef="None"),
-            # Skeletons
-            MultiSpawn("Immortals",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Immortal",Tag.MEDIUM,[3],popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonImmortal"),
-                PoolSpawn("Distractions",Tag.CHUMP,numPicks=4,customSpawnList=[
-                    CustomSpawn("Skellys",Tag.CHUMP,popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonCrystal"),
-                    CustomSpawn("Suiciders",Tag.CHUMP,popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonSuicide"),
-                    CustomSpawn("Crystals",Tag.CHUMP,popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonCrystal"),
-                    CustomSpawn("Warriors",Tag.CHUMP,popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonWarrior")
-                ])
-            ]),
-            PoolSpawn("Skeleton King",Tag.MINIBOSS,customSpawnList=[
-                CustomSpawn("Aliah",Tag.MINIBOSS,   popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonKing_Aliah"),
-                CustomSpawn("Crono",Tag.MINIBOSS,   popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonKing_Crono"),
-                CustomSpawn("Nazar",Tag.MINIBOSS,   popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonKing_Nazar"),
-                CustomSpawn("Seth",Tag.MINIBOSS,    popDef="GD_Aster_Pop_Skeletons.Population.PopDef_SkeletonKing_Seth")
-            ], map_blacklist="dead_forest_p"),
-            # Wizards
-            CustomSpawn("Wizards",Tag.MEDIUM,[2,3],[3,1],popDef="GD_Aster_Pop_Wizards.Population.PopDef_WizardsDen_Regular"),
-            CustomSpawn("AbracaMAGIC",Tag.BADASS,popDef="GD_Aster_Pop_Wizards.Population.PopDef_WizardsDen_Badass"),
-            # MultiSpawn("Familial Reconciliation",Tag.MINIBOSS,customSpawnList=[
-            #     CustomSpawn("Edgar",Tag.MINIBOSS,popDef="GD_Aster_Pop_Wizards.Population.PopDef_Wizard_DeadBrotherEdgar"),
-            #     CustomSpawn("Simon",Tag.MINIBOSS,popDef="GD_Aster_Pop_Wizards.Population.PopDef_Wizard_DeadBrotherSimon"),
-            # ]),
-            # Mines
-            CustomSpawn("Dwarfzerkers",Tag.CHUMP,range(4,7),popDef="GD_Aster_Pop_Dwarves.Population.PopDef_Dwarfzerker"),
-            MultiSpawn("Golem Wranglers",Tag.MEDIUM,customSpawnList=[
-                PoolSpawn("Golem Choice",Tag.MEDIUM,customSpawnList=[
-                    CustomSpawn("Golem",Tag.MEDIUM,         popDef="GD_Aster_Pop_Golems.Population.PopDef_GolemRock",spawnPointDef="None"),
-                    CustomSpawn("Badass Golem",Tag.BADASS,  popDef="GD_Aster_Pop_Golems.Population.PopDef_Golem_Badass",spawnPointDef="None"),
-                ], customSpawnWeights=[2,1], spawnPointDef="None"),
-                CustomSpawn("Dwarfs",Tag.CHUMP,range(3,6),  popDef="GD_Aster_Pop_Dwarves.Population.PopDef_DwarfsDen_Regular",spawnPointDef="None"),
-                CustomSpawn("Badass Dwarf",Tag.BADASS,[0,1],popDef="GD_Aster_Pop_Dwarves.Population.PopDef_Dwarf_Badass",spawnPointDef="None")
-            ], spawnPointDef="None"),
-            CustomSpawn("Flying Golems",Tag.MEDIUM,range(2,5),popDef="GD_Aster_Pop_Golems.Population.PopDef_GolemFlying"),
-            CustomSpawn("Maxibillion",Tag.MINIBOSS,popDef="GD_Aster_Pop_Golems.Population.PopDef_GolemFlying_Maxibillion"),
-        ],
-        
-        DLC.FFS: [
-            CustomSpawn("Sanctuary ATTACKS!",Tag.MEDIUM,range(4,11),popDef="GD_Anemone_InfectedPodTendril.Population.PopDef_InfectedPodTendril",spawnPointDef="PopPointDef_OrbitalDrop_Infection_Test"),
-            MultiSpawn("Golem Skag Walking Service",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("Golem",Tag.BADASS,popDef="GD_Anemone_Pop_Infected.Population.PopDef_InfectedGolem_Badass",spawnPointDef="None"),
-                CustomSpawn("Skags",Tag.CHUMP,range(3,6),popDef="GD_Anemone_Pop_WildLife.Population.PopDef_Infected_SkagMIX",spawnPointDef="None"),
-            ], spawnPointDef="None"),
-            PoolSpawn("Sentient Mutating Funguys In My Grill",Tag.MEDIUM,numPicks=4,customSpawnList=[
-                CustomSpawn("Bruisers",Tag.MEDIUM,[1,2],    popDef="GD_Anemone_Pop_Infected.Population.PopDef_InfectedBruiser"),
-                CustomSpawn("Psychos",Tag.CHUMP,[1,2],      popDef="GD_Anemone_Pop_Infected.Population.PopDef_InfectedCurse"),
-                CustomSpawn("Suiciders",Tag.CHUMP,[1,2],    popDef="GD_Anemone_Pop_Infected.Population.PopDef_InfectedCurse"),
-                CustomSpawn("Midgets",Tag.CHUMP,[1,2],      popDef="GD_Anemone_Pop_Infected.Population.PopDef_InfectedMidget"),
-                CustomSpawn("Goliath",Tag.MEDIUM,[1],       popDef="GD_Anemone_Pop_Infected.Population.PopDef_InfectedGoliath"),
-            ], customSpawnWeights=[3,3,2,3,1]),
-            PoolSpawn("New Pandora Chumps",Tag.MEDIUM,numPicks=4,customSpawnList=[
-                CustomSpawn("Flamer",Tag.CHUMP,[1,2],       factory="GD_Anemone_Pop_NP.Population.PopDef_NewPandoraMix_Basic:PopulationFactoryBalancedAIPawn_4"),
-                CustomSpawn("Commander",Tag.MEDIUM,[1,2],   popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Commander"),
-                CustomSpawn("Enforcer",Tag.CHUMP,[1,2],     popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Enforcer"),
-                CustomSpawn("Recruit",Tag.CHUMP,[1,2,3],    popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Enlisted"),
-                CustomSpawn("Infecto",Tag.CHUMP,[1],        factory="GD_Anemone_Pop_NP.Population.PopDef_NewPandoraMIX_Supports:PopulationFactoryBalancedAIPawn_5"),
-                CustomSpawn("Medic",Tag.CHUMP,[1],          popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Medic"),
-                CustomSpawn("Sniper",Tag.CHUMP,[1,2],       popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_sniper"),
-            ], customSpawnWeights=[3,1,3,3,3,1,2]),
-            MultiSpawn("New Pandora Lieutenant Squad",Tag.MINIBOSS,customSpawnList=[
-                PoolSpawn("Lieutenant",Tag.MINIBOSS,customSpawnList=[
-                    CustomSpawn("Angvar",Tag.MINIBOSS,  popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Lt_Angvar"),
-                    CustomSpawn("Bolson",Tag.MINIBOSS,  popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Lt_Bolson"),
-                    CustomSpawn("Hoffman",Tag.MINIBOSS, popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Lt_Hoffman"),
-                    CustomSpawn("Tetra",Tag.MINIBOSS,   popDef="GD_Anemone_Pop_NP.Population.PopDef_NP_Lt_Tetra"),
-                ]),
-                CustomSpawn("Grunts",Tag.CHUMP,range(3,6),popDef="GD_Anemone_Pop_NP.Population.PopDef_NewPandoraMIX_Grunts"),
-            ]),
-            MultiSpawn("Dark Web",Tag.MINIBOSS,customSpawnList=[
-                CustomSpawn("Dark Web",Tag.MINIBOSS,popDef="GD_Anemone_A_Queen_Digi.Population.PopDef_Anemone_TheDarkWeb"),
-                CustomSpawn("Minions",Tag.CHUMP,[4],popDef="GD_Anemone_DarkWeb_Minions.Population.PopDef_Anemone_DarkWeb_Minions"),
-            ], map_blacklist=["olddust_p"]),
-            CustomSpawn("Cassius",Tag.BOSS,popDef="GD_Anemone_Pop_Cassius.GD_Anemone_PopDef_Cassius",spawnPointDef="None",map_blacklist=["ResearchCenter_P"]),
-            
-            CustomSpawn("FOV Infected Pods",Tag.MEDIUM,range(3,8),popDef="GD_Anemone_InfectedPodTendril.Population.PopDef_InfectedPodTendril",spawnPointDef="None"),
-        ],
-        
-        DLC.Headhunters: [
-            MultiSpawn("Send It, Chefs",Tag.ULTIMATE_BADASS,customSpawnList=[
-                PoolSpawn("ButcherBoss",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Gouda Remsay",Tag.ULTIMATE_BADASS, popDef="GD_ButcherBoss.Balance.PopDef_ButcherBoss"),
-                    CustomSpawn("Brulee",Tag.ULTIMATE_BADASS,       popDef="GD_ButcherBoss2.Balance.PopDef_ButcherBoss2"),
-                    CustomSpawn("Bork Bork",Tag.ULTIMATE_BADASS,    popDef="GD_ButcherBoss3.Balance.PopDef_ButcherBoss3"),
-                    CustomSpawn("Rat Chef",Tag.ULTIMATE_BADASS,     popDef="GD_RatChef.Balance.PopDef_RatChef")
-                ]),
-                CustomSpawn("Butchers",Tag.CHUMP,range(3,6),popDef="GD_Butcher.Balance.PopDef_Butcher")
-            ], map_blacklist=["Hunger_P"]),
-            PoolSpawn("Tribute Pair",Tag.ULTIMATE_BADASS,customSpawnList=[
-                MultiSpawn("Tributes of Sawtooth",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Female",Tag.BADASS,    popDef="GD_CraterFemale.Balance.PopDef_CraterFemale"),
-                    CustomSpawn("Male",Tag.BADASS,      popDef="GD_CraterMale.Balance.PopDef_CraterMale")
-                ]),
-                MultiSpawn("Tributes of Opportunity",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Female",Tag.BADASS,    popDef="GD_EngineeFemale.Balance.PopDef_EngineerFemale"),
-                    CustomSpawn("Male",Tag.BADASS,      popDef="GD_EngineerMale.Balance.PopDef_EngineerMale")
-                ]),
-                MultiSpawn("Tributes of Southern Shelf",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Female",Tag.BADASS,    popDef="GD_FleshripperFemale.Balance.PopDef_FleshripperFemale"),
-                    CustomSpawn("Male",Tag.BADASS,      popDef="GD_FleshripperMale.Balance.PopDef_FleshripperMale")
-                ]),
-                MultiSpawn("Tributes of Frostburn",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Female",Tag.BADASS,    popDef="GD_IncineratorFemale.Balance.PopDef_IncineratorFemale"),
-                    CustomSpawn("Male",Tag.BADASS,      popDef="GD_IncineratorMale.Balance.PopDef_IncineratorMale")
-                ]),
-                MultiSpawn("Tributes of Lynchwood",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Female",Tag.BADASS,    factory="GD_Population_AlliumHunger.Population.PopDef_TurkeyTributeMix:PopulationFactoryBalancedAIPawn_4"),
-                    CustomSpawn("Male",Tag.BADASS,      factory="GD_Population_AlliumHunger.Population.PopDef_TurkeyTributeMix:PopulationFactoryBalancedAIPawn_5")
-                ]),
-                MultiSpawn("Tributes of Sanctuary",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Female",Tag.BADASS,    factory="GD_Population_AlliumHunger.Population.PopDef_TurkeyTributeMix:PopulationFactoryBalancedAIPawn_6"),
-                    CustomSpawn("Male",Tag.BADASS,      factory="GD_Population_AlliumHunger.Population.PopDef_TurkeyTributeMix:PopulationFactoryBalancedAIPawn_7")
-                ]),
-                MultiSpawn("Tributes of Wurmwater",Tag.ULTIMATE_BADASS,customSpawnList=[
-                    CustomSpawn("Female",Tag.BADASS,    popDef="GD_SandFemale.Balance.PopDef_SandFemale"),
-                    CustomSpawn("Male",Tag.BADASS,      popDef="GD_SandMale.Balance.PopDef_SandMale")
-                ]),
-            ], map_blacklist=["hunger_p"]),
-            PoolSpawn("Love Thresher",Tag.MINIBOSS,customSpawnList=[
-                CustomSpawn("Blue",Tag.BADASS,     popDef="GD_Nast_ThresherShared.Population.PopDef_Nast_ThresherBlue", spawnPointDef="None"),
-                CustomSpawn("Green",Tag.MEDIUM,    popDef="GD_Nast_ThresherShared.Population.PopDef_Nast_ThresherGreen", spawnPointDef="None"),
-                CustomSpawn("Orange",Tag.BOSS,     popDef="GD_Nast_ThresherShared.Population.PopDef_Nast_ThresherOrange", spawnPointDef="None"),
-                CustomSpawn("Purple",Tag.MINIBOSS, popDef="GD_Nast_ThresherShared.Population.PopDef_Nast_ThresherPurple", spawnPointDef="None"),
-                CustomSpawn("White",Tag.CHUMP,     popDef="GD_Nast_ThresherShared.Population.PopDef_Nast_ThresherWhite", spawnPointDef="None"),
-            ], map_blacklist=["Distillery_P"], spawnPointDef="None"),
-            MultiSpawn("Crabworms",Tag.CHUMP,customSpawnList=[
-                CustomSpawn("Craboid",Tag.CHUMP,range(0,3),     popDef="GD_Population_Crabworms.Population.PopDef_Craboid"),
-                CustomSpawn("CraboidGiant",Tag.MEDIUM,[0,1],    popDef="GD_Population_Crabworms.Population.PopDef_CraboidGiant"),
-                CustomSpawn("Crabworm",Tag.CHUMP,range(1,4),    popDef="GD_Population_Crabworms.Population.PopDef_Crabworm"),
-                CustomSpawn("Crawthumper",Tag.CHUMP,range(0,4), popDef="GD_Population_Crabworms.Population.PopDef_CrawThumper"),
-            ])
-        ],
-        
-        DLC.Digistruct: [
-        ]
-    },
-    ModMenu.Game.TPS: {
-        DLC.TPS: [
-            CustomSpawn("Shy Shuggy",Tag.MEDIUM,popDef="GD_Population_HiveFlyer.Population.PopDef_HiveMind",spawnPointDef="PopDef_HiveFlyerRodunk"),
-            PoolSpawn("Badass Shuggy",Tag.BADASS,customSpawnList=[
-                CustomSpawn("Fire",Tag.BADASS,popDef="GD_Population_HiveFlyer.Population.PopDef_BadassHive"),
-                CustomSpawn("Cryo",Tag.BADASS,popDef="GD_Population_HiveFlyer.Population.PopDef_GiantCryoHive"),
-            ]),
-            
-            MultiSpawn("An actually-fun amount of Kraggons",Tag.CHUMP,customSpawnList=[
-                PoolSpawn("Pebbles",Tag.CHUMP,numPicks=3,customSpawnList=[
-                    CustomSpawn("Rock",Tag.CHUMP,[2,3], popDef="GD_Cork_Population_EleBeast.Population.PopDef_FrostBeast_Small"),
-                    CustomSpawn("Frost",Tag.CHUMP,[2,3],popDef="GD_Cork_Population_EleBeast.Population.PopDef_Frostbeast_Mini"),
-                ]),
-                PoolSpawn("Kraggon",Tag.CHUMP,numPicks=2,customSpawnList=[
-                    CustomSpawn("Rock",Tag.CHUMP,[1,2], popDef="GD_Cork_Population_EleBeast.Population.PopDef_ElementalBeast"),
-                    CustomSpawn("Frost",Tag.CHUMP,[1,2],popDef="GD_Cork_Population_EleBeast.Population.PopDef_FrostBeast"),
-                ]),
-            ]),
-            CustomSpawn("Kraggon Badass",Tag.BADASS,popDef="GD_Cork_Population_EleBeast.Population.PopDef_ElementalSpitterBadass"),
-            PoolSpawn("Kraggon Family Tree",Tag.BADASS,numPicks=3,customSpawnList=[
-                CustomSpawn("Charger",Tag.BADASS,   popDef="GD_Cork_Population_EleBeast.Population.PopDef_ElementalCharger"),
-                CustomSpawn("Immolator",Tag.MEDIUM, popDef="GD_Cork_Population_EleBeast.Population.PopDef_ElementalSpitter"),
-                CustomSpawn("Avalanche",Tag.MEDIUM, popDef="GD_Cork_Population_EleBeast.Population.PopDef_FrostBeast"),
-                CustomSpawn("Eruptor",Tag.BADASS,   popDef="GD_Cork_Population_EleBeast.Population.PopDef_ElementalMama"),
-            ]),
-            PoolSpawn("Kraggon-zilla",Tag.BOSS,customSpawnList=[
-                CustomSpawn("Volcantis",Tag.BOSS,   popDef="GD_Cork_Population_EleBeast.Population.PopDef_Lavazilla"),
-                CustomSpawn("Odjurymir",Tag.BOSS,   popDef="GD_Cork_Population_EleBeast.Population.PopDef_Frostzilla"),
-                CustomSpawn("Iwajira",Tag.BOSS,     popDef="GD_Cork_Population_EleBeast.Population.PopDef_Rockzilla"),
-                CustomSpawn("Phonic",Tag.MINIBOSS,      popDef="GD_Cork_Population_EleBeast.Population.PopDef_ElementalPhonic"),
-            ]),
-            
-            MultiSpawn("Rocketmen",Tag.CHUMP,customSpawnList=[
-                CustomSpawn("Suiciders",Tag.CHUMP,range(3,7),popDef="GD_Population_Scavengers.Population.PopDef_ScavSuicidePsycho"),
-                CustomSpawn("Oscar",Tag.CHUMP,[0,1],[2,1],popDef="GD_Population_Scavengers.Population.PopDef_ScavSuicidePsycho_Oscar"),
-            ]),
-            PoolSpawn("Spacemen",Tag.BADASS,numPicks=3,customSpawnList=[
-                CustomSpawn("Badass",Tag.BADASS,popDef="GD_Population_Scavengers.Population.PopDef_BadassSpaceman"),
-                CustomSpawn("Armored",Tag.BADASS,popDef="GD_Population_Scavengers.Population.PopDef_ScavCombatSpaceman"),
-                #CustomSpawn("Midget",Tag.MEDIUM,popDef="GD_Population_Scavengers.Population.PopDef_ScavMidgetSpaceman"),
-                CustomSpawn("Midget",Tag.MEDIUM,factory="GD_Population_Scavengers.Mixes.PopDef_ScavGroundMix_Spacemen:PopulationFactoryBalancedAIPawn_19"),
-                CustomSpawn("Ground",Tag.MEDIUM,popDef="GD_Population_Scavengers.Population.PopDef_ScavNomad"),
-            ],customSpawnWeights=[1,3,4,2]),
-            MultiSpawn("Welcome to the Darkside",Tag.BADASS,customSpawnList=[
-                CustomSpawn("Acolytes",Tag.CHUMP,numSpawns=range(4,8),popDef="GD_Population_Scavengers.Mixes.PopDef_ScavGroundMix_Darksiders"),
-                PoolSpawn("Badass Bandit",Tag.MINIBOSS,customSpawnList=[
-                    CustomSpawn("Fair Diknum",Tag.MINIBOSS,[0,1],[2,3],popDef="GD_Population_Darksiders.Population.PopDef_DarksiderBadassPsycho"),
-                    CustomSpawn("Wally Wrong",Tag.MINIBOSS,[0,1],[2,3], popDef="GD_Population_Darksiders.Population.PopDef_BadassDarksiderBandit"),
-                    CustomSpawn("Magma Rivers",Tag.MINIBOSS,[0,1],[2,3],popDef="GD_Population_Darksiders.Population.PopDef_LittleDarksiderBadassBandit"),
-                ]),
-            ]),
-            
-            MultiSpawn("Lost Legion Squad",Tag.MEDIUM,customSpawnList=[
-                PoolSpawn("Leader",Tag.BADASS,customSpawnList=[
-                    CustomSpawn("Bob",Tag.MINIBOSS,popDef="GD_Population_Dahl.Population.PopDef_DahlMarine_CentralTerm"),
-                    CustomSpawn("Sergeant",Tag.MEDIUM,popDef="GD_Population_Dahl.Population.PopDef_DahlSergeant"),
-                    CustomSpawn("Badass",Tag.BADASS,popDef="GD_Population_Dahl.Population.PopDef_BadassDahlMarine"),
-                ]),
-                CustomSpawn("Squaddies",Tag.CHUMP,numSpawns=range(5,8),popDef="GD_Population_Dahl.Population.PopDef_DahlMix_NoPowerSuits"),
-            ],map_blacklist=["innercore_p"]),
-            
-            MultiSpawn("Boils",Tag.CHUMP,customSpawnList=[
-                CustomSpawn("Boils",Tag.CHUMP,range(3,6),  popDef="GD_Population_Boils.Population.PopDef_BoilMix_All"),
-                CustomSpawn("Guards",Tag.CHUMP,range(3,6), popDef="GD_Population_Boils.Population.PopDef_HypRatMix"),
-            ]),
-            
-            # Holodome enemies are just going in the base game...
-            PoolSpawn("Power Suits",Tag.BADASS,customSpawnList=[
-                CustomSpawn("Scav",Tag.BADASS,range(1,4),[3,3,1],popDef="GD_Population_Scavengers.Population.PopDef_ScavPowerSuit"),
-                CustomSpawn("Dahl",Tag.BADASS,range(1,4),[3,3,1],popDef="GD_Population_Dahl.Squads.PopDef_PowerSuitMix_Laser"),
-                CustomSpawn("Eternal",Tag.BADASS,range(1,4),[3,3,1],popDef="GD_Pet_Population_Dahl.Mixes.PopDef_Mix_EternalPowersuits"),
-            ]),
-            CustomSpawn("This is Pondorous, man...",Tag.BADASS,range(2,5),[3,3,1],popDef="GD_Pet_Population_Guardians.Population.PopDef_GuardianPondor"),
-            MultiSpawn("Eridian Incursion",Tag.BADASS,customSpawnList=[
-                PoolSpawn("Bosses",Tag.MINIBOSS,customSpawnList=[
-                    CustomSpawn("Opha Superior",Tag.MINIBOSS,[0,1],   popDef="GD_Population_Eridian_OphaBoss.Population.PopDef_Eridian_OphaBoss"),
-                    CustomSpawn("Virtuous Opha",Tag.BADASS,   popDef="GD_Population_Eridian_Opha.Population.PopDef_Opha_BadAss"),
-                ]),
-                PoolSpawn("Badasses",Tag.BADASS,numPicks=2,customSpawnList=[
-                    CustomSpawn("Elder Opha",Tag.BADASS,        popDef="GD_Population_Eridian_Opha.Population.PopDef_Opha_Heavy"),
-                    CustomSpawn("Virutous Opha",Tag.BADASS,     popDef="GD_Population_Guardians.Opha.Population.PopDef_Virtuous_Opha"),
-                    CustomSpawn("Cheru",Tag.BADASS,[1,2],       popDef="GD_Population_Guardians.Cheru.Population.PopDef_Cheru_BadAss"),
-                    CustomSpawn("Sara",Tag.BADASS,[1,2],        popDef="GD_Population_Guardians.Sera.Population.PopDef_Sara_Badass"),
-                    CustomSpawn("Arch Guardian",Tag.BADASS,     popDef="GD_Population_Guardians.Sera.Population.PopDef_Arch_Guardian"),
-                    CustomSpawn("Pondor",Tag.BADASS,[1,2],[1,2],popDef="GD_Pet_Population_Guardians.Population.PopDef_GuardianPondor"),
-                ]),
-                PoolSpawn("Chumps",Tag.CHUMP,customSpawnList=[
-                    CustomSpawn("Cheru",Tag.CHUMP,range(3,6),   popDef="GD_Population_Guardians.Cheru.Population.PopDef_Cheru"),
-                    CustomSpawn("Reaper",Tag.CHUMP,range(3,5),  popDef="GD_Population_Guardians.Cheru.Population.PopDef_Guardian_Reaper"),
-                    CustomSpawn("Wraith",Tag.CHUMP,range(3,5),  popDef="GD_Population_Guardians.Cheru.Population.PopDef_Guardian_Wraith"),
-                    CustomSpawn("Sara",Tag.CHUMP,range(3,6),    popDef="GD_Population_Guardians.Sera.Population.PopDef_Sara"),
-                ]),
-            ])
-        ],
-        DLC.Claptastic: [
-            MultiSpawn("Release the DAWGS",Tag.CHUMP,customSpawnList=[
-                CustomSpawn("Puppy",Tag.CHUMP,range(4,9),   popDef="GD_Ma_Pop_ClaptrapForces.Population.PopDef_ClapPuppy"),
-                CustomSpawn("Dawg",Tag.CHUMP,[1,2],[3,1],   popDef="GD_Ma_Pop_ClaptrapForces.Population.PopDef_ClapDawg"),
-                CustomSpawn("Badass",Tag.BADASS,[0,1],       popDef="GD_Ma_Pop_ClaptrapForces.Population.PopDef_BadassClapDawg"),
-            ]),
-            MultiSpawn("Tassitrons",Tag.MEDIUM,customSpawnList=[
-                CustomSpawn("BlackOps",Tag.CHUMP,range(1,4),    popDef="GD_Ma_Pop_Engineer.Population.PopDef_BlackOps"),
-                CustomSpawn("Engineer",Tag.CHUMP,range(2,5),    popDef="GD_Ma_Pop_Engineer.Population.PopDef_Engineer"),
-                CustomSpawn("EngineerArms",Tag.CHUMP,range(2,5),popDef="GD_Ma_Pop_Engineer.Population.PopDef_EngineerArms"),
-            ]),
-            CustomSpawn("ShadowClone",Tag.MINIBOSS,range(3,6),  popDef="GD_Ma_Pop_ClaptrapForces.Population.Uniques.PopDef_ShadowClone_Eos"),
-        ],
-    }
-}[ModMenu.Game.GetCurrent()]
-
-megaMixSubstitutionPools: List[List[str]] = {
-    ModMenu.Game.BL2:[
-        # Loaders
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderBUL:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_1",
-        ],
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderEXP:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderBadass:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_2",
-        ],
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderGUN:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_3",
-        ],
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderHOT:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_4",
-        ],
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderJET:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_5",
-        ],
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderPWR:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_6",
-        ],
-        [
-            "GD_Population_Loader.Population.PopDef_LoaderRPG:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Loader.Population.PopDef_Iris_LoaderMix_Forge:PopulationFactoryBalancedAIPawn_7",
-        ],
-        [   # JNK with ARR
-            "GD_Population_Loader.Population.PopDef_LoaderJunk:PopulationFactoryBalancedAIPawn_1",
-            "GD_Orchid_Pop_Loader.Population.PopDef_Orchid_Loader_RefineryMix:PopulationFactoryBalancedAIPawn_4",
-        ],
-        [   # Psychos
-            "GD_Population_Psycho.Population.PopDef_Psycho:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_Psycho.Population.PopDef_PsychoBurning:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_Psycho.Population.PopDef_PsychoSnow:PopulationFactoryBalancedAIPawn_0",
-            "GD_Allium_PsychoKitchen.Balance.PopDef_PsychoKitchen:PopulationFactoryBalancedAIPawn_0",
-            "GD_Anemone_Pop_Bandits.Balance.PopDef_Ini_Psycho:PopulationFactoryBalancedAIPawn_0",
-            "GD_HodunkPsycho.Balance.PopDef_HodunkPsycho:PopulationFactoryBalancedAIPawn_0",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerPsycho_Angels:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerPsycho_Dragon:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerPsycho_Torgue:PopulationFactoryBalancedAIPawn_1",
-            "GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PiratePsycho:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_AlliumXmas.Population.PopDef_SnowPsychos:PopulationFactoryBalancedAIPawn_1",
-            "GD_HodunkPsycho.Balance.PopDef_HodunkPsycho:PopulationFactoryBalancedAIPawn_0",
-            "GD_Nast_Zaford_Grunt.Balance.PopDef_Nast_ZafordMix:PopulationFactoryBalancedAIPawn_0",
-            "GD_Psycho_Digi.Population.PopDef_Psycho_Digi:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Suicide Psychos
-            "GD_Population_Psycho.Population.PopDef_PsychoMix_Regular:PopulationFactoryBalancedAIPawn_32",
-            "GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_MarauderMix:PopulationFactoryBalancedAIPawn_9",
-        ],
-        [   # Badass Psychos
-            "GD_Population_Psycho.Population.PopDef_PsychoBadass:PopulationFactoryBalancedAIPawn_0",
-            "GD_Iris_Population_Psycho.Population.PopDef_Iris_PsychoBadassBiker:PopulationFactoryBalancedAIPawn_4",
-            "GD_Lobelia_TannisPops.Population.PopDef_BanditMixture:PopulationFactoryBalancedAIPawn_18",
-        ],
-        [   # Marauders
-            "GD_Population_Marauder.Population.PopDef_Marauder:PopulationFactoryBalancedAIPawn_0",
-            "GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateMarauder:PopulationFactoryBalancedAIPawn_0",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_Biker_Angels:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_Biker_Dragon:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_Biker_Torgue:PopulationFactoryBalancedAIPawn_1",
-            "GD_MarauderRegular_Digi.Population.PopDef_Marauder_Regular_Digi:PopulationFactoryBalancedAIPawn_2",
-        ],
-        [   # Marauder Grunts (Can't use cover)
-            "GD_Population_Marauder.Population.PopDef_MarauderGrunt:PopulationFactoryBalancedAIPawn_0",
-            "GD_Nast_Hodunk_Grunt.Balance.PopDef_Nast_HodunkGrunt:PopulationFactoryBalancedAIPawn_0",
-            "GD_Nast_Zaford_Grunt.Balance.PopDef_Nast_ZafordGrunt:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_AlliumXmas.Population.PopDef_SnowMarauders:PopulationFactoryBalancedAIPawn_0",
-            "GD_Allium_MarauderKitchen.Balance.PopDef_MarauderKitchen:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Badass Marauders
-            "GD_Population_Marauder.Population.PopDef_MarauderBadass:PopulationFactoryBalancedAIPawn_0",
-            "GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_PirateCaptain:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_AlliumXmas.Population.PopDef_SnowBanditMix:PopulationFactoryBalancedAIPawn_3",
-            "GD_HodunkBadass.Balance.PopDef_HodunkBadass:PopulationFactoryBalancedAIPawn_0",
-            "GD_ZafordBadass.Balance.PopDef_ZafordBadass:PopulationFactoryBalancedAIPawn_0",
-            "GD_MarauderBadass_Digi.Population.PopDef_MarauderBadass_Digi:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Midgets
-            "GD_Population_Midget.Population.PopDef_MidgetMix_Regular:PopulationFactoryBalancedAIPawn_11",
-            #"GD_Population_Midget.Population.PopDef_MidgetBone1:PopulationFactoryBalancedAIPawn_0",    # Fridge package not loaded
-            "GD_Orchid_Pop_Pirates.Population.PopDef_Orchid_MarauderMix:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerMidget_Angels:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerMidget_Dragon:PopulationFactoryBalancedAIPawn_1",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerMidget_Torgue:PopulationFactoryBalancedAIPawn_1",
-            "GD_Allium_Butcher_Midget.Balance.PopDef_ButcherMidget:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_AlliumXmas.Population.PopDef_SnowBanditMix:PopulationFactoryBalancedAIPawn_2",
-            "GD_PsychoMidget_Digi.Population.PopDef_PsychoMidget_Digi:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Bruisers
-            "GD_Population_Bruiser.Population.PopDef_Bruiser:PopulationFactoryBalancedAIPawn_0",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_BikerBruiser_Dragon:PopulationFactoryBalancedAIPawn_3",
-            "GD_Iris_Population_Bruiser.Population.PopDef_Iris_BikerBruiser:PopulationFactoryBalancedAIPawn_3",
-            "GD_Anemone_Pop_Infected.Population.PopDef_Infected_MIX:PopulationFactoryBalancedAIPawn_4",
-        ],
-        [   # Nomads
-            "GD_Population_Nomad.Population.PopDef_NomadMix_Regular:PopulationFactoryBalancedAIPawn_3",
-            "GD_Lobelia_TannisPops.Population.PopDef_BanditMixture:PopulationFactoryBalancedAIPawn_2",
-        ],
-        [   # Goliaths
-            "GD_Population_Goliath.Population.PopDef_Goliath:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_AlliumXmas.Population.PopDef_SnowBanditMix:PopulationFactoryBalancedAIPawn_4",
-            "GD_Anemone_Pop_Infected.Population.PopDef_InfectedGoliath:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Goliath Blaster with Arena Goliath
-            "GD_Population_Goliath.Population.PopDef_GoliathMix_Regular:PopulationFactoryBalancedAIPawn_14",
-            "GD_Iris_Population_Goliath.Population.PopDef_Iris_ArenaGoliath:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Stalker with Tri-tail stalker - Ambush or Needle?
-            "GD_Population_Stalker.Population.PopDef_StalkerMix_Needle:PopulationFactoryBalancedAIPawn_0",
-            "GD_Orchid_Pop_Stalker.Population.PopDef_Orchid_StalkerMix_Regular:PopulationFactoryBalancedAIPawn_3",
-        ],
-        [   # Hyperion Engineer with Torgue Engineer
-            "GD_Population_Engineer.Population.PopDef_EngineerArms:PopulationFactoryBalancedAIPawn_0",
-            "GD_Iris_Population_Biker.Gangs.PopDef_Iris_EngineerArmsBarrel_Torgue:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Slag Skag with Digi Skag
-            "GD_Population_Skag.Population.PopDef_SkagMix_Badass:PopulationFactoryBalancedAIPawn_3",
-            "GD_SkagBadassSlag_Digi.Population.PopDef_SkagBadassSlag_Digi:PopulationFactoryBalancedAIPawn_2",
-        ],
-        [   # Slagged Spore with Infected Spore
-            "GD_Sage_Pop_Spore.Population.PopDef_Sage_GiantSpore_Mix:PopulationFactoryBalancedAIPawn_4",
-            "GD_Anemone_Pop_WildLife.Population.PopDef_SporeMIX_OldDust2:PopulationFactoryBalancedAIPawn_5",
-        ],
-        [   # Varkids (but not Bloods) with Tropical Varkids
-            "GD_Population_BugMorph.Population.PopDef_BugMorphMix_Regular:PopulationFactoryBalancedAIPawn_1",
-            "GD_Population_BugMorphs.Population.PopDef_BugMorph_TropicalMix:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_BugMorphs.Population.PopDef_BugMorph_TropicalMix:PopulationFactoryBalancedAIPawn_1",
-            "GD_Population_BugMorphs.Population.PopDef_BugMorph_TropicalMix:PopulationFactoryBalancedAIPawn_2",
-        ],
-        [   # Crystalisk with Blue Crystalisk
-            "GD_Population_Crystalisk.Population.PopDef_CrystaliskMix_Regular:PopulationFactoryBalancedAIPawn_1",
-            "GD_Orchid_Pop_Crystalisk.Population.PopDef_Orchid_CrystaliskAqua:PopulationFactoryBalancedAIPawn_1",
-        ]
-    ],
-    ModMenu.Game.TPS:[
-        [   # Scavs with Darksiders
-            "GD_Population_Scavengers.Population.PopDef_ScavengerBandit:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_Scavengers.Mixes.PopDef_ScavGroundMix_Darksiders:PopulationFactoryBalancedAIPawn_1",
-        ],
-        [   # Psycho
-            "GD_Population_Scavengers.Population.PopDef_ScavengerPsycho:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_Scavengers.Mixes.PopDef_ScavGroundMix_Darksiders:PopulationFactoryBalancedAIPawn_7",
-        ],
-        [   # Midget
-            "GD_Population_Scavengers.Population.PopDef_ScavMidget:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_Scavengers.Mixes.PopDef_ScavGroundMix_Darksiders:PopulationFactoryBalancedAIPawn_2",
-        ],
-        [   # Midget Psycho
-            "GD_Population_Scavengers.Population.PopDef_ScavPsychoMidget:PopulationFactoryBalancedAIPawn_0",
-            "GD_Population_Scavengers.Mixes.PopDef_ScavGroundMix_Darksiders:PopulationFactoryBalancedAIPawn_8",
-        ],
-        [   # Clapdog
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_ClapPuppy:PopulationFactoryBalancedAIPawn_0",
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_VeryInsecureClapPuppy:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Patroltrap
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_InsecurityBot:PopulationFactoryBalancedAIPawn_0",
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_VeryInsecureBot:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Snipertrap
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_InsecuritySniper:PopulationFactoryBalancedAIPawn_0",
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_VeryInsecureSniper:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Flytrap
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_PermFlyTrap:PopulationFactoryBalancedAIPawn_0",
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_VeryInsecureFlight:PopulationFactoryBalancedAIPawn_0",
-        ],
-        [   # Badasstrap
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_CleanupRuntime:PopulationFactoryBalancedAIPawn_0",
-            "GD_Ma_Pop_ClaptrapForces.Population.PopDef_VeryInsecureBadass:PopulationFactoryBalancedAIPawn_0",
-        ],
-    ]
-}[ModMenu.Game.GetCurrent()]
-"""Each list is a pool of PopulationFactoryBalancedAIPawn - we can get the AIPawnBalanceDefinition from the factory here to compare"""
+    length = None
+    specialMove = next((animMap.Value for animMap in pointDef.AnimMap if animMap.Key == bodyTag), None)
+    animName = getattr(specialMove, "AnimName", None) if specialMove else None
+    mesh = getattr(archetype, "Mesh", None)
+    if animName and mesh:
+        playRate = getattr(specialMove, "PlayRate", 1) or 1
+        for animSet in mesh.AnimSets:
+            sequence = next((x for x in animSet.Sequences if x and str(x.SequenceName) == str(animName)), None) if animSet else None
+            if sequence and sequence.SequenceLength > 0:
+                length = sequence.SequenceLength / ((sequence.RateScale or 1) * playRate)
+                break
+    spawnAnimLengths[key] = length
+    return length
+
+
+spawnsByPopDef: Dict[object, CustomSpawn] = {}
+"""PopDef object -> its CustomSpawn in the current map, so every den with the same PopDef shares one"""
+
+
+def GetSpawnFromPopDef(PopDef) -> CustomSpawn:
+    """Same as CustomSpawnFromPopDef, but only builds one CustomSpawn per PopDef until the map changes"""
+    if PopDef in spawnsByPopDef:
+        return spawnsByPopDef[PopDef]
+    spawn = CustomSpawnFromPopDef(PopDef)
+    if PopDef:
+        spawnsByPopDef[PopDef] = spawn
+    return spawn
+
+
+def ClearMapCaches():
+    """Clears everything cached from objects in the current map, since they are gone after a map change."""
+    bodyTagsByPointDef.clear()
+    spawnAnimLengths.clear()
+    spawnsByPopDef.clear()
+    PrunePopDefCache()
+
+
+class DenPoints:
+    """Everything about a den's spawn points that decides which spawns it supports"""
+    def __init__(self, den) -> None:
+        self.hasBlankPoint = False
+        """No spawn anims at all, but we still can't guarantee these are available to spawn if the player is looking at it."""
+        self.pointDefNames: Set[str] = set()
+        self.bodyTags: Set[object] = set()
+        for point in den.SpawnPoints:
+            if not point:
+                continue
+            if not point.PointDef:
+                self.hasBlankPoint = True
+                continue
+            self.pointDefNames.add(point.PointDef.Name)
+            self.bodyTags.update(GetBodyTagsFromPointDef(point.PointDef))
+
+
+class SpawnSupportIndex:
+    """
+    Indexes the CustomSpawns within a list of spawns by the BodyTag or PointDef name they need,
+     so we can find all spawns that a den supports with set lookups instead of checking every spawn point.
+    """
+    def __init__(self, spawns: List[Spawn]) -> None:
+        self.spawns = spawns
+        self.blankLeaves: Set[CustomSpawn] = set()
+        self.leavesByPointDef: Dict[str, Set[CustomSpawn]] = {}
+        self.leavesByBodyTag: Dict[object, Set[CustomSpawn]] = {}
+        for spawn in spawns:
+            for leaf in spawn.GetLeafSpawns():
+                if not leaf.factoryObj:
+                    raise ValueError(f"A CustomSpawn {leaf.name} does not have a factory loaded for SpawnSupportIndex!")
+                if leaf.spawnPointDef == "None":
+                    self.blankLeaves.add(leaf)
+                elif leaf.spawnPointDef:
+                    # If we have given a specific spawn point then just check that
+                    self.leavesByPointDef.setdefault(leaf.spawnPointDef, set()).add(leaf)
+                elif leaf.bodyTagObj:
+                    self.leavesByBodyTag.setdefault(leaf.bodyTagObj, set()).add(leaf)
+                else:
+                    Log(f"{leaf.name} - Can't find a BodyTag from {leaf.factoryObj.PathName(leaf.factoryObj)}.")
+                    Log(f"{leaf.name} - If this pawn actually has BodyTag=None, it needs to use spawnPointDef=\"None\".")
+    
+    def SupportedSpawnIndexes(self, denPoints: DenPoints) -> array:
+        """Returns the indexes of all spawns in this index that can use spawn animations for the given den, in order."""
+        supportedLeaves = set(self.blankLeaves) if denPoints.hasBlankPoint else set()
+        for name in denPoints.pointDefNames:
+            supportedLeaves.update(self.leavesByPointDef.get(name, ()))
+        for bodyTag in denPoints.bodyTags:
+            supportedLeaves.update(self.leavesByBodyTag.get(bodyTag, ()))
+        if not supportedLeaves:
+            return array("H")
+        return array("H", (i for i, spawn in enumerate(self.spawns) if spawn.SupportedByLeaves(supportedLeaves)))
+
+
+SPAWN_DATA_FILE = os.path.join(os.path.dirname(__file__), f"spawns_{CURRENT_GAME.name.lower()}.json")
+"""The custom spawns and MegaMix pools for the current game"""
+SPAWN_DATA_FORMAT = 1
+
+SPAWN_TYPES = {
+    "CustomSpawn": CustomSpawn,
+    "PoolSpawn": PoolSpawn,
+    "MultiSpawn": MultiSpawn,
+}
+SPAWN_FIELDS = {
+    "CustomSpawn": {"numSpawns", "numSpawnsWeights", "popDef", "factory"},
+    "PoolSpawn": {"numPicks", "customSpawnList", "customSpawnWeights"},
+    "MultiSpawn": {"numSpawn", "customSpawnList"},
+}
+"""The fields each spawn type takes on top of COMMON_SPAWN_FIELDS, named after its constructor arguments"""
+COMMON_SPAWN_FIELDS = {"type", "name", "tag", "spawnPointDef", "map_whitelist", "map_blacklist"}
+
+
+def _CheckIntList(data: dict, field: str, path: str):
+    if field in data:
+        values = data[field]
+        if not isinstance(values, list) or not values or not all(isinstance(x, int) for x in values):
+            raise ValueError(f"{path}.{field} should be a list of whole numbers, not {values!r}")
+
+
+def ValidateSpawnData(data, path: str):
+    """Checks one spawn from the data file against the schema, raising a ValueError saying where it's wrong"""
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} should be an object, not {data!r}")
+    spawnType = data.get("type")
+    if spawnType not in SPAWN_TYPES:
+        raise ValueError(f"{path}.type should be one of {list(SPAWN_TYPES)}, not {spawnType!r}")
+    unknownFields = set(data) - COMMON_SPAWN_FIELDS - SPAWN_FIELDS[spawnType]
+    if unknownFields:
+        raise ValueError(f"{path} has unknown fields for a {spawnType}: {sorted(unknownFields)}")
+    if not isinstance(data.get("name"), str):
+        raise ValueError(f"{path}.name should be a string")
+    if data.get("tag") not in Tag.__members__ or data["tag"] == Tag._LENGTH.name:
+        raise ValueError(f"{path}.tag should be one of {[x.name for x in Tag if x is not Tag._LENGTH]}, not {data.get('tag')!r}")
+    for field in ("spawnPointDef", "popDef", "factory"):
+        if field in data and not isinstance(data[field], str):
+            raise ValueError(f"{path}.{field} should be an object path string")
+    for field in ("map_whitelist", "map_blacklist"):
+        if field in data and not (isinstance(data[field], list) and all(isinstance(x, str) for x in data[field])):
+            raise ValueError(f"{path}.{field} should be a list of map names")
+    for field in ("numSpawns", "numSpawnsWeights", "customSpawnWeights", "numSpawn"):
+        _CheckIntList(data, field, path)
+    if "numPicks" in data and not isinstance(data["numPicks"], int):
+        raise ValueError(f"{path}.numPicks should be a whole number")
+    
+    if spawnType == "CustomSpawn":
+        if "popDef" not in data and "factory" not in data:
+            raise ValueError(f"{path} needs a popDef or a factory")
+        if "numSpawnsWeights" in data and len(data["numSpawnsWeights"]) != len(data.get("numSpawns", [])):
+            raise ValueError(f"{path}.numSpawnsWeights don't match numSpawns")
+    else:
+        children = data.get("customSpawnList")
+        if not isinstance(children, list) or not children:
+            raise ValueError(f"{path}.customSpawnList should be a list of spawns")
+        for field in ("customSpawnWeights", "numSpawn"):
+            if field in data and len(data[field]) != len(children):
+                raise ValueError(f"{path}.{field} should have one number for each of the {len(children)} customSpawnList spawns")
+
+
+def ValidateSpawnTree(data, path: str):
+    """Checks a spawn and every spawn inside it, without building any of them"""
+    ValidateSpawnData(data, path)
+    for i, x in enumerate(data.get("customSpawnList", [])):
+        ValidateSpawnTree(x, f"{path}.customSpawnList[{i}]")
+
+
+def SpawnFromData(data, path: str) -> Spawn:
+    """Builds a Spawn (and any spawns inside it) from its entry in the data file"""
+    ValidateSpawnData(data, path)
+    kwargs = {field: value for field, value in data.items() if field != "type"}
+    kwargs["tag"] = Tag[data["tag"]]
+    if "customSpawnList" in data:
+        kwargs["customSpawnList"] = [SpawnFromData(x, f"{path}.customSpawnList[{i}]") for i, x in enumerate(data["customSpawnList"])]
+    return SPAWN_TYPES[data["type"]](**kwargs)
+
+
+class SpawnCatalogue:
+    """
+    The custom spawns for the current game, keyed by DLC like a dict.
+    The data file is only read the first time we need it, and each DLC's spawns are only built
+     the first time that DLC is looked up.
+    Every spawn in the file is validated when it's read though, so a mistake shows up straight away
+     rather than whenever its DLC first comes up.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data: dict = None
+        self.spawnsByDLC: Dict[DLC, List[Spawn]] = {}
+    
+    def LoadData(self) -> dict:
+        if self.data is None:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+            if not isinstance(data, dict) or data.get("format") != SPAWN_DATA_FORMAT:
+                raise ValueError(f"{self.path} isn't a format {SPAWN_DATA_FORMAT} spawn data file")
+            if not isinstance(data.get("spawns"), dict):
+                raise ValueError(f"{self.path} spawns should be an object of DLC names to spawn lists")
+            for DLCName, spawns in data["spawns"].items():
+                if DLCName not in DLC.__members__:
+                    raise ValueError(f"{self.path} has spawns for unknown DLC {DLCName!r}")
+                if not isinstance(spawns, list):
+                    raise ValueError(f"{self.path} spawns.{DLCName} should be a list of spawns")
+            pools = data.get("megaMixSubstitutionPools", [])
+            if not isinstance(pools, list) or not all(
+                isinstance(pool, dict) and isinstance(pool.get("factories"), list)
+                and all(isinstance(x, str) for x in pool["factories"]) for pool in pools
+            ):
+                raise ValueError(f"{self.path} megaMixSubstitutionPools should be a list of objects with factory path lists")
+            for DLCName, spawns in data["spawns"].items():
+                for i, x in enumerate(spawns):
+                    ValidateSpawnTree(x, f"{DLCName}[{i}]")
+            self.data = data
+        return self.data
+    
+    def __getitem__(self, DLC: DLC) -> List[Spawn]:
+        spawns = self.spawnsByDLC.get(DLC)
+        if spawns is None:
+            spawnData = self.LoadData()["spawns"][DLC.name]
+            spawns = [SpawnFromData(x, f"{DLC.name}[{i}]") for i, x in enumerate(spawnData)]
+            self.spawnsByDLC[DLC] = spawns
+        return spawns
+    
+    def get(self, DLC: DLC, default=None) -> List[Spawn]:
+        if DLC not in self:
+            return default
+        return self[DLC]
+    
+    def __contains__(self, DLC: DLC) -> bool:
+        return DLC.name in self.LoadData()["spawns"]
+    
+    def __iter__(self) -> Iterator[DLC]:
+        return iter(self.keys())
+    
+    def __len__(self) -> int:
+        return len(self.LoadData()["spawns"])
+    
+    def keys(self) -> List[DLC]:
+        return [DLC[name] for name in self.LoadData()["spawns"]]
+    
+    def values(self) -> List[List[Spawn]]:
+        return [self[x] for x in self.keys()]
+    
+    def items(self) -> List[Tuple[DLC, List[Spawn]]]:
+        return [(x, self[x]) for x in self.keys()]
+    
+    def GetMegaMixSubstitutionPools(self) -> List[List[str]]:
+        """Each list is a pool of PopulationFactoryBalancedAIPawn - we can get the AIPawnBalanceDefinition from the factory here to compare"""
+        return [pool["factories"] for pool in self.LoadData().get("megaMixSubstitutionPools", [])]
+
+
+customList = SpawnCatalogue(SPAWN_DATA_FILE)
@@ -0,0 +1,95 @@
+import enum
+from collections import deque
+from typing import Deque
+
+
+SAMPLE_INTERVAL = 0.25
+"""World time between frame time samples"""
+WINDOW_SIZE = 20
+"""How many samples we average over, i.e. the last 5 seconds"""
+MAX_DELAY_SCALE = 3
+"""The most we stretch the delays between spawns by"""
+DEFER_PRESSURE = 1.5
+"""Frame time over the budget by this factor stops new spawns until it recovers"""
+
+
+class FrameState(enum.IntEnum):
+    OFF = enum.auto()
+    """No budget set"""
+    OK = enum.auto()
+    """Frame time is within the budget"""
+    STRAINED = enum.auto()
+    """Over the budget - spawns are slowed down and groups are smaller"""
+    OVER = enum.auto()
+    """Way over the budget - new spawns wait until it recovers"""
+
+
+class FrameBudget:
+    """
+    Keeps a sliding window of frame times, and works out how much to throttle spawning
+     when the average goes over the user's frame time budget.
+    """
+    def __init__(self, budgetMilliseconds: float = 0) -> None:
+        self.budget = budgetMilliseconds / 1000
+        """Target seconds per frame, or 0 to never throttle"""
+        self.samples: Deque[float] = deque(maxlen=WINDOW_SIZE)
+        self.total: float = 0
+        """Running sum of samples, so the average doesn't need to sum the window"""
+        self.pressure: float = 0
+        """Average frame time divided by the budget"""
+
+    def SetBudget(self, budgetMilliseconds: float):
+        self.budget = budgetMilliseconds / 1000
+        self.UpdatePressure()
+
+    def Reset(self):
+        """Forgets every sample, e.g. after a map change where the loading frames would skew it"""
+        self.samples.clear()
+        self.total = 0
+        self.pressure = 0
+
+    def Sample(self, deltaSeconds: float):
+        if len(self.samples) == self.samples.maxlen:
+            self.total = self.total - self.samples[0]
+        self.samples.append(deltaSeconds)
+        self.total = self.total + deltaSeconds
+        self.UpdatePressure()
+
+    def UpdatePressure(self):
+        if self.budget <= 0 or not self.samples:
+            self.pressure = 0
+        else:
+            self.pressure = self.GetAverageFrameTime() / self.budget
+
+    def GetAverageFrameTime(self) -> float:
+        return self.total / len(self.samples) if self.samples else 0
+
+    def GetState(self) -> FrameState:
+        if self.budget <= 0:
+            return FrameState.OFF
+        if self.pressure >= DEFER_PRESSURE:
+            return FrameState.OVER
+        if self.pressure > 1:
+            return FrameState.STRAINED
+        return FrameState.OK
+
+    def GetDelayScale(self) -> float:
+        """How much to stretch delays by - as much as we're over the budget, up to MAX_DELAY_SCALE"""
+        if self.pressure <= 1:
+            return 1
+        return min(self.pressure, MAX_DELAY_SCALE)
+
+    def ScaleGroupSize(self, size: int) -> int:
+        """Shrinks a group by as much as we're over the budget, keeping at least 1"""
+        if self.pressure <= 1:
+            return size
+        return max(1, int(size / self.pressure))
+
+    def ShouldDefer(self) -> bool:
+        return self.GetState() is FrameState.OVER
+
+    def GetStatus(self) -> str:
+        state = self.GetState()
+        if state is FrameState.OFF or not self.samples:
+            return state.name
+        return f"{state.name} - averaging {self.GetAverageFrameTime() * 1000:.1f}ms per frame"
@@ -1,4 +1,5 @@
 import enum
+from typing import Dict, Iterator, List, Set, Tuple
 import unrealsdk
 from unrealsdk import Log
 from Mods import ModMenu
@@ -425,42 +426,164 @@ def GetCurrentDLC(PC) -> str:
     return None
 
 
-kept_alive_objects_by_class_name: dict = {}
+KEEP_ALIVE_CLASSES = ["WillowPopulationDefinition", "PopulationFactoryBalancedAIPawn"]
 
-def KeepAliveAllClass(class_name: str):
-    objects = unrealsdk.FindAll(class_name)
-    for object in objects:
-        unrealsdk.KeepAlive(object)
-    kept_alive_objects_by_class_name[class_name] = objects
+APPROX_OBJECT_BYTES = {
+    "WillowPopulationDefinition": 256,
+    "PopulationFactoryBalancedAIPawn": 192,
+}
+"""Rough size of each kept alive object, only for reporting how much we're holding on to"""
+
+
+def GetOutermostName(object) -> str:
+    """The name of the package an object belongs to, e.g. Dam_Combat"""
+    while object.Outer:
+        object = object.Outer
+    return str(object.Name)
+
+
+class KeepAliveRegistry:
+    """
+    Tracks every object we have kept alive, with the DLC that first loaded it, so we can release them per DLC later.
+    An object belongs to a DLC if it's in one of the DLC's packages, even if it was already resident
+     (e.g. the current map's own combat package when loading its biome), or if loading the DLC's packages brought it in
+     (e.g. GD_ objects cooked into them). Anything else that was already resident isn't ours, so it's left alone.
+    """
+    def __init__(self) -> None:
+        self.sources: Dict[object, DLC] = {}
+        """The DLC that each tracked object came from"""
+        self.objects_by_DLC: Dict[DLC, List[Tuple[str, object]]] = {}
+        """(class name, object) for every object that belongs to each DLC"""
+
+    def Snapshot(self) -> Set[object]:
+        """Every object of KEEP_ALIVE_CLASSES that is resident right now, to pass to TrackNew after loading"""
+        return {object for class_name in KEEP_ALIVE_CLASSES for object in unrealsdk.FindAll(class_name)}
+
+    def TrackNew(self, resident: Set[object], DLC: DLC, package_names: List[str]) -> int:
+        """
+        Keeps alive every object of KEEP_ALIVE_CLASSES that belongs to the DLC and that we aren't tracking yet,
+         charging them to the DLC. package_names are the DLC's packages loaded so far. Returns how many were new.
+        """
+        packages = {x.lower() for x in package_names}
+        DLC_objects = self.objects_by_DLC.setdefault(DLC, [])
+        num_new = 0
+        for class_name in KEEP_ALIVE_CLASSES:
+            for object in unrealsdk.FindAll(class_name):
+                if object in self.sources:
+                    continue
+                if object in resident:
+                    if GetOutermostName(object).lower() not in packages:
+                        continue
+                    if object.ObjectFlags.A & 0x4000:
+                        continue    # Something else is already keeping it alive, so it isn't ours to release
+                unrealsdk.KeepAlive(object)
+                self.sources[object] = DLC
+                DLC_objects.append((class_name, object))
+                num_new = num_new + 1
+        return num_new
+
+    def Release(self, DLC: DLC) -> int:
+        """Removes KeepAlive from every object that the DLC's packages added. Returns how many were released."""
+        released = self.objects_by_DLC.pop(DLC, [])
+        for (class_name, object) in released:
+            object.ObjectFlags.A &= ~0x4000     # Remove KeepAlive
+            self.sources.pop(object, None)
+        return len(released)
 
+    def ReleaseAll(self):
+        for DLC in list(self.objects_by_DLC):
+            self.Release(DLC)
 
-def UnKeepAliveAllClass(class_name: str):
-    objects = kept_alive_objects_by_class_name.pop(class_name)
-    for object in objects:
-        object.ObjectFlags.A &= ~0x4000     # Remove KeepAlive
+    def GetCounts(self, DLC: DLC = None) -> Dict[str, int]:
+        """Number of tracked objects by class, for one DLC or all of them"""
+        counts = {class_name: 0 for class_name in KEEP_ALIVE_CLASSES}
+        for (DLC_key, objects) in self.objects_by_DLC.items():
+            if DLC and DLC_key is not DLC:
+                continue
+            for (class_name, object) in objects:
+                counts[class_name] = counts[class_name] + 1
+        return counts
 
+    def GetEstimatedBytes(self, DLC: DLC = None) -> int:
+        return sum(APPROX_OBJECT_BYTES.get(class_name, 0) * count for (class_name, count) in self.GetCounts(DLC).items())
+
+    def GetReport(self, DLC: DLC = None) -> str:
+        counts = self.GetCounts(DLC)
+        return ", ".join(f"{count} {class_name}" for (class_name, count) in counts.items()) \
+            + f" (~{self.GetEstimatedBytes(DLC) // 1024} KB)"
+
+
+keep_alive_registry = KeepAliveRegistry()
+
+
+loaded_DLCs: List[DLC] = []
+"""DLCs whose combat packages are loaded, least recently used first"""
+
+MAX_ON_DEMAND_DLCS = 3
+"""How many DLCs' packages we keep loaded when loading on demand"""
 
-loaded_DLCs = []
 
 def LoadLevelSpawnObjects(DLC: DLC):
-    global loaded_DLCs
+    for _ in LoadLevelSpawnObjectsJob(DLC):
+        pass
+
+
+def LoadLevelSpawnObjectsJob(DLC: DLC) -> Iterator[Tuple[int, int]]:
+    """
+    Loads each of the DLC's combat packages in turn, yielding (packages loaded, total packages) after each one
+     so the loading can be spread over several frames.
+    Each package's objects are kept alive straight after loading it, so garbage collection between frames can't take them.
+    If the job is dropped part way, whatever it kept alive is released again, so the DLC loads from scratch next time.
+    """
     if DLC in loaded_DLCs:
         #Log(f"DLC {DLC.name} levels are already loaded!")
+        TouchDLC(DLC)
         return
     
-    for package_name in combat_packages_by_DLC[DLC]:
-        unrealsdk.LoadPackage(package_name)
-        KeepAliveAllClass("WillowPopulationDefinition")
-        KeepAliveAllClass("PopulationFactoryBalancedAIPawn")
-        
-        #unrealsdk.GetEngine().GetCurrentWorldInfo().ForceGarbageCollection(True)
+    package_names = combat_packages_by_DLC[DLC]
+    # Anything already here only belongs to this DLC if it's in one of its packages
+    resident = keep_alive_registry.Snapshot()
+    try:
+        for i, package_name in enumerate(package_names):
+            unrealsdk.LoadPackage(package_name)
+            keep_alive_registry.TrackNew(resident, DLC, package_names[:i + 1])
+            #unrealsdk.GetEngine().GetCurrentWorldInfo().ForceGarbageCollection(True)
+            yield (i + 1, len(package_names))
+    except GeneratorExit:
+        keep_alive_registry.Release(DLC)
+        raise
 
     loaded_DLCs.append(DLC)
-    
-    
-def UnloadLevelSpawnObjects():
+    Log(f"[{__name__}] Loaded {DLC.name} spawn objects: {keep_alive_registry.GetReport(DLC)}")
+
+
+def TouchDLC(DLC: DLC):
+    """Marks the DLC as the most recently used"""
+    if DLC in loaded_DLCs:
+        loaded_DLCs.remove(DLC)
+        loaded_DLCs.append(DLC)
+
+
+def ReleaseLeastRecentDLCs(keep: List[DLC], max_loaded: int = MAX_ON_DEMAND_DLCS):
+    """Unloads the least recently used DLCs until only max_loaded are left, never unloading those in keep"""
+    for DLC in list(loaded_DLCs):
+        if len(loaded_DLCs) <= max_loaded:
+            break
+        if DLC not in keep:
+            UnloadLevelSpawnObjects(DLC)
+
+
+def UnloadLevelSpawnObjects(DLC: DLC = None):
+    """Releases the objects from one DLC's packages, or from all of them if DLC is None"""
     global loaded_DLCs
+    if DLC:
+        if DLC not in loaded_DLCs:
+            return
+        num_released = keep_alive_registry.Release(DLC)
+        loaded_DLCs.remove(DLC)
+        Log(f"[{__name__}] Released {num_released} {DLC.name} spawn objects")
+        return
+    
     if loaded_DLCs:
-        UnKeepAliveAllClass("WillowPopulationDefinition")
-        UnKeepAliveAllClass("PopulationFactoryBalancedAIPawn")
+        keep_alive_registry.ReleaseAll()
         loaded_DLCs = []
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+from unrealsdk import Log
+
+
+CACHE_FILE = os.path.join(os.path.dirname(__file__), "map_cache.json")
+CACHE_FORMAT = 5
+"""Bump this whenever the structure of the cached map entries changes"""
+FAILED_SPAWN_RETRY_SETUPS = 5
+"""How many setups of a map skip a spawn that didn't resolve there, before we try it again incase its objects turned up"""
+
+_cache: Optional[dict] = None
+"""The cache file contents, loaded the first time we need them"""
+
+
+def MapKey(game: str, modVersion: str, pool: str, mapName: str, loadedPackages: str = "") -> str:
+    """loadedPackages lists the DLCs with packages loaded, since that changes which spawns can be found"""
+    return f"{game}|{modVersion}|{pool}|{loadedPackages}|{mapName.lower()}"
+
+
+def EligibilityKey(game: str, mapName: str, loadedPackages: str = "") -> str:
+    """Which spawns resolve only depends on the map and the loaded packages, not the mod settings"""
+    return f"{game}|{loadedPackages}|{mapName.lower()}"
+
+
+def Fingerprint(parts: Iterable) -> str:
+    """Hashes anything that would change the cached tables, e.g. the custom spawn list and the blacklists"""
+    hasher = hashlib.md5()
+    for part in parts:
+        if isinstance(part, bytes):
+            hasher.update(part)
+        else:
+            hasher.update(repr(part).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def FileFingerprint(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return hashlib.md5(file.read()).digest()
+
+
+def _Load(fingerprint: Optional[str]) -> dict:
+    """Pass None as the fingerprint to use the cache without checking the map tables"""
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if os.path.exists(CACHE_FILE):
+            try:
+                with open(CACHE_FILE, "r") as file:
+                    _cache = json.load(file)
+            except (OSError, ValueError) as ex:
+                Log(f"[{__name__}] Couldn't read the map cache, starting a new one: {ex}")
+                _cache = {}
+    if _cache.get("format") != CACHE_FORMAT:
+        _cache = {"format": CACHE_FORMAT, "fingerprint": fingerprint, "maps": {}, "eligibility": {}}
+    elif fingerprint is not None and _cache.get("fingerprint") != fingerprint:
+        # The custom spawns or blacklists have changed, so none of the map tables can be trusted.
+        # The eligibility index is keyed by each spawn's objects, so that can stay.
+        _cache["fingerprint"] = fingerprint
+        _cache["maps"] = {}
+    return _cache
+
+
+def _Write(cache: dict):
+    try:
+        with open(CACHE_FILE, "w") as file:
+            json.dump(cache, file, separators=(",", ":"))
+    except OSError as ex:
+        Log(f"[{__name__}] Couldn't write the map cache: {ex}")
+
+
+def Get(key: str, fingerprint: str) -> Optional[Dict]:
+    """Returns the cached tables for the given map key, or None if we haven't cached them"""
+    return _Load(fingerprint)["maps"].get(key)
+
+
+def Put(key: str, fingerprint: str, entry: Dict):
+    """Stores the tables for the given map key and writes the cache file"""
+    cache = _Load(fingerprint)
+    cache["maps"][key] = entry
+    _Write(cache)
+
+
+def GetFailedSpawns(key: str, densFingerprint: str) -> Dict[str, int]:
+    """
+    Returns the eligibility keys of the spawns that didn't resolve last time we set up this map,
+     each with how many setups have skipped it since. None are returned if the map's dens have changed since then.
+    """
+    entry = _Load(None)["eligibility"].get(key)
+    if not entry or entry.get("dens") != densFingerprint:
+        return {}
+    return dict(entry["failed"])
+
+
+def IsFailedSpawnDue(skips: int) -> bool:
+    """Whether a spawn that failed before has been skipped for long enough that it should be tried again"""
+    return skips >= FAILED_SPAWN_RETRY_SETUPS
+
+
+def SkipFailedSpawns(key: str, densFingerprint: str) -> bool:
+    """
+    Counts another setup of this map that skips the spawns that didn't resolve here, e.g. one from the cached tables.
+    Returns False instead if any of them are due to be tried again, so the map should be set up from scratch.
+    """
+    failed = GetFailedSpawns(key, densFingerprint)
+    if not failed:
+        return True
+    if any(IsFailedSpawnDue(skips) for skips in failed.values()):
+        return False
+    cache = _Load(None)
+    cache["eligibility"][key]["failed"] = {spawnKey: skips + 1 for (spawnKey, skips) in failed.items()}
+    _Write(cache)
+    return True
+
+
+def PutEligibility(key: str, resolved: List[str], failed: Dict[str, int], densFingerprint: str):
+    """
+    Records which spawns resolved in this map, and how many setups each failed one has been skipped for,
+     only writing the cache file if that has changed
+    """
+    cache = _Load(None)
+    entry = {"resolved": sorted(resolved), "failed": failed, "dens": densFingerprint}
+    if cache["eligibility"].get(key) != entry:
+        cache["eligibility"][key] = entry
+        _Write(cache)
+
+
+def Clear():
+    """Forgets every cached map and the eligibility index, and deletes the cache file"""
+    global _cache
+    _cache = None
+    if os.path.exists(CACHE_FILE):
+        try:
+            os.remove(CACHE_FILE)
+        except OSError as ex:
+            Log(f"[{__name__}] Couldn't delete the map cache: {ex}")
@@ -0,0 +1,108 @@
+from typing import Dict, Optional, Set
+import unrealsdk
+
+from Mods.AmbientSpawns.custom_spawns import Tag
+
+
+TAG_CAPS: Dict[Tag, int] = {
+    Tag.ULTIMATE_BADASS: 6,
+    Tag.MINIBOSS: 3,
+    Tag.BOSS: 1,
+}
+"""
+Once this many ambient spawns of a Badass Tag are alive, no new groups of that tag can start.
+Groups that have already started aren't cut short, so e.g. a whole MultiSpawn boss group still spawns.
+Tags not in here are only limited by the other caps.
+"""
+
+
+class TrackedPawn:
+    """
+    One of our ambient spawns. We only keep its name rather than the UObject,
+     since the pawn can be destroyed and garbage collected under us.
+    """
+    __slots__ = ("className", "den", "tag")
+
+    def __init__(self, className: str, den, tag: Tag) -> None:
+        self.className = className
+        self.den = den
+        self.tag = tag
+
+
+class PopulationTracker:
+    """
+    Counts our ambient spawns that are still alive - globally, per den and per Badass Tag -
+     so we can stop spawning when a cap is full instead of letting the PopulationMaster refuse them.
+    """
+    def __init__(self, maxTotal: int = 0, maxPerDen: int = 0, tagCaps: Dict[Tag, int] = TAG_CAPS) -> None:
+        self.maxTotal = maxTotal
+        """0 for no cap"""
+        self.maxPerDen = maxPerDen
+        """0 for no cap"""
+        self.tagCaps = tagCaps
+        self.pawns: Dict[str, TrackedPawn] = {}
+        """Path name of each pawn we spawned -> what it counts towards"""
+        self.countsByDen: Dict[object, int] = {}
+        self.countsByTag: Dict[Tag, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.pawns)
+
+    def Add(self, pawn, den, tag: Tag):
+        path = pawn.PathName(pawn)
+        if path in self.pawns:
+            return
+        self.pawns[path] = TrackedPawn(str(pawn.Class.Name), den, tag)
+        self.countsByDen[den] = self.countsByDen.get(den, 0) + 1
+        self.countsByTag[tag] = self.countsByTag.get(tag, 0) + 1
+
+    def Remove(self, path: str):
+        tracked = self.pawns.pop(path, None)
+        if not tracked:
+            return
+        self.countsByDen[tracked.den] = self.countsByDen[tracked.den] - 1
+        self.countsByTag[tracked.tag] = self.countsByTag[tracked.tag] - 1
+
+    def Prune(self):
+        """Stops counting any pawns that have died or been despawned"""
+        for (path, tracked) in list(self.pawns.items()):
+            pawn = unrealsdk.FindObject(tracked.className, path)
+            if not pawn or not pawn.IsAliveAndWell():
+                self.Remove(path)
+
+    def Clear(self):
+        self.pawns = {}
+        self.countsByDen = {}
+        self.countsByTag = {}
+
+    def GetDenCount(self, den) -> int:
+        return self.countsByDen.get(den, 0)
+
+    def GetTagCount(self, tag: Tag) -> int:
+        return self.countsByTag.get(tag, 0)
+
+    def GetCappedTags(self) -> Set[Tag]:
+        """The Badass Tags that can't start any new groups right now"""
+        return {tag for (tag, cap) in self.tagCaps.items() if self.GetTagCount(tag) >= cap}
+
+    def GetRoom(self, den=None, tag: Tag = None, pending: int = 0) -> Optional[int]:
+        """
+        How many more pawns we can spawn before hitting a cap, or None if nothing caps it.
+        pending counts spawns that are queued up but not alive yet, towards the global cap.
+        Pass a tag when starting a new group, since the tag caps only stop new groups.
+        """
+        if tag in self.tagCaps and self.GetTagCount(tag) >= self.tagCaps[tag]:
+            return 0
+        room = None
+        if self.maxTotal > 0:
+            room = self.maxTotal - len(self.pawns) - pending
+        if den is not None and self.maxPerDen > 0:
+            denRoom = self.maxPerDen - self.GetDenCount(den)
+            room = denRoom if room is None else min(room, denRoom)
+        return None if room is None else max(room, 0)
+
+    def IsFull(self, pending: int = 0) -> bool:
+        return self.GetRoom(pending=pending) == 0
+
+    def IsDenFull(self, den) -> bool:
+        return self.maxPerDen > 0 and self.GetDenCount(den) >= self.maxPerDen
@@ -0,0 +1,98 @@
+import heapq
+import itertools
+from typing import Callable, List, Tuple
+import unrealsdk
+from unrealsdk import Log
+
+
+TICK_FUNCTION = "WillowGame.WillowPlayerController.PlayerTick"
+
+NEXT_TICK = float("-inf")
+"""Deadline for events that should run on the next tick, whatever the world time is"""
+
+
+class ScheduledEvent:
+    """A callback waiting in the Scheduler. Keep hold of it to cancel it."""
+    __slots__ = ("deadline", "callback", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[[float], None]) -> None:
+        self.deadline = deadline
+        self.callback = callback
+        """Called with the current world time once the deadline has passed"""
+        self.cancelled = False
+        """Also set once the event has run"""
+
+    def IsPending(self) -> bool:
+        return not self.cancelled
+
+
+class Scheduler:
+    """
+    A priority queue of world time deadlines, driven by the PlayerTick hook.
+    The hook is only registered while something is scheduled, and until the earliest deadline passes,
+     all it does is compare it against the world time.
+    """
+    def __init__(self, hookName: str) -> None:
+        self.hookName = hookName
+        self.queue: List[Tuple[float, int, ScheduledEvent]] = []
+        self.order = itertools.count()
+        """Keeps events with the same deadline in the order they were scheduled"""
+        self.isHooked = False
+
+    def Schedule(self, deadline: float, callback: Callable[[float], None]) -> ScheduledEvent:
+        event = ScheduledEvent(deadline, callback)
+        heapq.heappush(self.queue, (deadline, next(self.order), event))
+        if not self.isHooked:
+            unrealsdk.RunHook(TICK_FUNCTION, self.hookName, self.Tick)
+            self.isHooked = True
+        return event
+
+    def ScheduleNextTick(self, callback: Callable[[float], None]) -> ScheduledEvent:
+        return self.Schedule(NEXT_TICK, callback)
+
+    def Cancel(self, event: ScheduledEvent):
+        if event:
+            event.cancelled = True
+            self.DropCancelled()
+
+    def Clear(self):
+        """Cancels everything and removes the tick hook"""
+        for (_, _, event) in self.queue:
+            event.cancelled = True
+        self.queue = []
+        self.Unhook()
+
+    def IsEmpty(self) -> bool:
+        return len(self.queue) == 0
+
+    def DropCancelled(self):
+        """Pops cancelled events off the front of the queue, and removes the hook if nothing is left"""
+        while self.queue and self.queue[0][2].cancelled:
+            heapq.heappop(self.queue)
+        if not self.queue:
+            self.Unhook()
+
+    def Unhook(self):
+        if self.isHooked:
+            unrealsdk.RemoveHook(TICK_FUNCTION, self.hookName)
+            self.isHooked = False
+
+    def Tick(self, caller: unrealsdk.UObject, function: unrealsdk.UFunction, params: unrealsdk.FStruct) -> bool:
+        now = caller.WorldInfo.TimeSeconds
+        if not self.queue or self.queue[0][0] > now:
+            return True
+
+        # Take everything that is due first, so events scheduled by these callbacks wait for the next tick
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            due.append(heapq.heappop(self.queue)[2])
+        for event in due:
+            if not event.cancelled:
+                event.cancelled = True  # So cancelling it after it has run does nothing
+                try:
+                    event.callback(now)
+                except Exception as ex:
+                    # Don't lose the rest of this tick's events to one that failed
+                    Log(f"[{__name__}] Scheduled {getattr(event.callback, '__name__', event.callback)} failed: {ex!r}")
+        self.DropCancelled()
+        return True
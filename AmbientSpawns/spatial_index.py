@@ -0,0 +1,140 @@
+import bisect
+import math
+from typing import Dict, List, Tuple
+
+
+DEFAULT_CELL_SIZE = 2500
+"""Unreal units per grid cell. The default Max Distance covers about 8x8 cells."""
+
+
+class DenGrid:
+    """
+    A uniform grid over den locations on the X and Y planes (same as DistFromPlayer),
+     so we can find the dens within a distance ring without checking every den in the map.
+    Den locations don't move, so this is built once in SetupDensAndCustoms and lives for the whole map.
+    """
+    def __init__(self, cellSize: float = DEFAULT_CELL_SIZE) -> None:
+        self.cellSize = cellSize
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        """Den indexes in each cell, keyed by cell coordinates"""
+        self.numDens = 0
+
+    def CellOf(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.cellSize), math.floor(y / self.cellSize))
+
+    def Insert(self, index: int, x: float, y: float):
+        """Adds the den at the given index in mapDenInfos to the grid"""
+        self.cells.setdefault(self.CellOf(x, y), []).append(index)
+        self.numDens = self.numDens + 1
+
+    def QueryRing(self, x: float, y: float, minDist: float, maxDist: float) -> List[int]:
+        """
+        Returns the den indexes in all cells that overlap the ring between minDist and maxDist around (x, y).
+        Cells entirely inside minDist or entirely outside maxDist are skipped,
+         but the caller still needs to check the exact distance of each den.
+        """
+        size = self.cellSize
+        (minCellX, minCellY) = self.CellOf(x - maxDist, y - maxDist)
+        (maxCellX, maxCellY) = self.CellOf(x + maxDist, y + maxDist)
+        minDistSq = minDist * minDist
+        maxDistSq = maxDist * maxDist
+
+        indexes = []
+        for cellX in range(minCellX, maxCellX + 1):
+            left = cellX * size
+            right = left + size
+            # Nearest and farthest X distance from the point to this column of cells
+            nearX = max(left - x, 0, x - right)
+            farX = max(abs(x - left), abs(x - right))
+            for cellY in range(minCellY, maxCellY + 1):
+                cell = self.cells.get((cellX, cellY))
+                if not cell:
+                    continue
+                bottom = cellY * size
+                top = bottom + size
+                nearY = max(bottom - y, 0, y - top)
+                if nearX * nearX + nearY * nearY > maxDistSq:
+                    continue
+                farY = max(abs(y - bottom), abs(y - top))
+                if farX * farX + farY * farY < minDistSq:
+                    continue
+                indexes.extend(cell)
+        return indexes
+
+
+CANDIDATE_MARGIN = DEFAULT_CELL_SIZE
+"""How far outside the distance ring CandidateRing keeps dens, i.e. how far the player can move before a full rescan"""
+
+
+class CandidateRing:
+    """
+    The dens from the last full DenGrid scan, sorted by their distance from where the player was at the time.
+    The player usually hasn't moved far between two spawn attempts, so while they stay within the margin of that spot,
+     only dens whose distance could have crossed minDist or maxDist need checking again.
+    The rest are still inside the ring, or still too far outside it to matter.
+    """
+    def __init__(self, margin: float = CANDIDATE_MARGIN) -> None:
+        self.margin = margin
+        self.Clear()
+
+    def Clear(self):
+        self.grid: DenGrid = None
+        self.numDens = 0
+        """How many dens the grid had when we scanned it, since it fills up over a few ticks while setting up"""
+        self.originX: float = 0
+        self.originY: float = 0
+        self.minDist: float = None
+        self.maxDist: float = None
+        self.indexes: List[int] = []
+        self.distances: List[float] = []
+        """Distance from the origin of each den in indexes, ascending"""
+
+    def IsValid(self, grid: DenGrid, x: float, y: float, minDist: float, maxDist: float) -> bool:
+        return (
+            self.grid is grid and self.numDens == grid.numDens
+            and self.minDist == minDist and self.maxDist == maxDist
+            and math.hypot(x - self.originX, y - self.originY) <= self.margin
+        )
+
+    def Rescan(self, grid: DenGrid, locations, x: float, y: float, minDist: float, maxDist: float):
+        """Finds every den within the margin of the ring around (x, y) from scratch"""
+        innerDist = max(minDist - self.margin, 0)
+        outerDist = maxDist + self.margin
+        indexes = grid.QueryRing(x, y, innerDist, outerDist)
+        dens = sorted(
+            (dist, index) for (index, dist) in zip(indexes, locations.Distances(indexes, x, y))
+            if innerDist < dist < outerDist
+        )
+        self.grid = grid
+        self.numDens = grid.numDens
+        self.originX = x
+        self.originY = y
+        self.minDist = minDist
+        self.maxDist = maxDist
+        self.indexes = [index for (_, index) in dens]
+        self.distances = [dist for (dist, _) in dens]
+
+    def Query(self, grid: DenGrid, locations, x: float, y: float, minDist: float, maxDist: float) -> List[int]:
+        """
+        Returns the indexes of the dens strictly between minDist and maxDist from (x, y), using the last scan if we can.
+        locations is the spawn_geometry.LocationTable of every den in the grid.
+        """
+        if self.IsValid(grid, x, y, minDist, maxDist):
+            moved = math.hypot(x - self.originX, y - self.originY)
+        else:
+            self.Rescan(grid, locations, x, y, minDist, maxDist)
+            moved = 0
+        # Anything this far inside the ring from the origin can't have left it, having moved at most that far
+        first = bisect.bisect_right(self.distances, minDist + moved)
+        last = bisect.bisect_left(self.distances, maxDist - moved)
+        if first >= last:
+            # Moved far enough that no den is certain, so check all of them
+            (first, last) = (0, 0)
+        inside = self.indexes[first:last]
+        if moved > 0:
+            band = self.indexes[:first] + self.indexes[last:]
+            inside.extend(
+                index for (index, dist) in zip(band, locations.Distances(band, x, y))
+                if minDist < dist < maxDist
+            )
+        return inside
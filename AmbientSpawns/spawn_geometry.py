@@ -0,0 +1,120 @@
+import math
+from array import array
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy isn't shipped with the SDK, so everything here has a pure Python fallback.
+    np = None
+
+
+class LocationTable:
+    """
+    Actor locations packed into contiguous arrays when the map loads,
+     so we can score many dens or spawn points against the player's view in one pass.
+    Each location also has a flag for whether it needs the FOV check (e.g. blank spawn points).
+    """
+    def __init__(self, locations: Sequence[Tuple[float, float, float]], testFOV: Sequence[bool]) -> None:
+        if len(locations) != len(testFOV):
+            raise ValueError(f"Number of locations {len(locations)} doesn't match number of FOV flags {len(testFOV)}!")
+        if np is not None:
+            packed = np.array(locations, dtype=np.float64).reshape(-1, 3)
+            self.xs = packed[:, 0].copy()
+            self.ys = packed[:, 1].copy()
+            self.zs = packed[:, 2].copy()
+            self.testFOV = np.array(testFOV, dtype=bool)
+        else:
+            self.xs = array("d", (loc[0] for loc in locations))
+            self.ys = array("d", (loc[1] for loc in locations))
+            self.zs = array("d", (loc[2] for loc in locations))
+            self.testFOV = array("b", testFOV)
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def SetTestFOV(self, index: int, testFOV: bool):
+        self.testFOV[index] = testFOV
+
+    def Distances(self, indexes: Sequence[int], originX: float, originY: float) -> List[float]:
+        """The distance (on the X and Y planes) from the origin to each location at the given indexes"""
+        if len(indexes) == 0:
+            return []
+        if np is not None:
+            indexes = np.asarray(indexes, dtype=np.intp)
+            return np.hypot(self.xs[indexes] - originX, self.ys[indexes] - originY).tolist()
+        return [math.hypot(self.xs[index] - originX, self.ys[index] - originY) for index in indexes]
+
+    def Weights(self, indexes: Sequence[int], viewYaw: float, originX: float, originY: float,
+                minDist: float = None, maxDist: float = None, visibility=None) -> Tuple[List[int], List[float]]:
+        """
+        Scores the locations at the given indexes like GetLocationWeight used to, biased towards the view direction.
+        If minDist and maxDist are given, locations outside that distance (on the X and Y planes) are dropped.
+        Locations that need the FOV check are dropped if they are in view - tested against the camera frustum if
+         a visibility.VisibilityCache is given, or just in front of the player on the X and Y planes if not.
+        Returns the surviving indexes and their weights.
+        """
+        if len(indexes) == 0:
+            return ([], [])
+        if np is not None:
+            return self._WeightsNumPy(indexes, viewYaw, originX, originY, minDist, maxDist, visibility)
+        return self._WeightsPython(indexes, viewYaw, originX, originY, minDist, maxDist, visibility)
+
+    def _WeightsNumPy(self, indexes, viewYaw, originX, originY, minDist, maxDist, visibility):
+        indexes = np.asarray(indexes, dtype=np.intp)
+        dx = self.xs[indexes] - originX
+        dy = self.ys[indexes] - originY
+        distSq = dx * dx + dy * dy
+        if minDist is not None and maxDist is not None:
+            mask = (distSq > minDist * minDist) & (distSq < maxDist * maxDist)
+        else:
+            mask = np.ones(len(indexes), dtype=bool)
+        dist = np.sqrt(distSq)
+        # Comparing Yaw only so only care about X,Y plane
+        dot = np.divide(math.cos(viewYaw) * dx + math.sin(viewYaw) * dy, dist,
+                        out=np.zeros_like(dist), where=dist > 0)
+        # Probably has no spawn animation so don't do it in view of the player.
+        testFOV = self.testFOV[indexes]
+        if visibility is not None:
+            inView = np.zeros(len(indexes), dtype=bool)
+            inView[testFOV] = visibility.Test(indexes[testFOV].tolist())
+            mask &= ~inView
+        else:
+            mask &= ~(testFOV & (dot >= 0))
+        # Bias towards points in front of the player
+        weights = np.clip(dot[mask] + 1, 0.2, 1.2)
+        return (indexes[mask].tolist(), weights.tolist())
+
+    def _WeightsPython(self, indexes, viewYaw, originX, originY, minDist, maxDist, visibility):
+        viewX = math.cos(viewYaw)
+        viewY = math.sin(viewYaw)
+        checkDistance = minDist is not None and maxDist is not None
+        validIndexes = []
+        weights = []
+        for index in indexes:
+            dx = self.xs[index] - originX
+            dy = self.ys[index] - originY
+            dist = math.sqrt(dx * dx + dy * dy)
+            if checkDistance and not (minDist < dist < maxDist):
+                continue
+            dot = (viewX * dx + viewY * dy) / dist if dist > 0 else 0
+            if self.testFOV[index]:
+                if visibility is not None:
+                    if visibility.Test([index])[0]:
+                        continue
+                elif dot >= 0:
+                    continue
+            validIndexes.append(index)
+            weights.append(ClampRange(0.2, 1.2, dot + 1))
+        return (validIndexes, weights)
+
+
+def ViewYaw(PC) -> float:
+    """ The player's view yaw in radians """
+    return PC.CalcViewRotation.Yaw * math.pi / 32768
+
+
+def ClampRange(min, max, x):
+    if x < min: return min
+    if x > max: return max
+    return x
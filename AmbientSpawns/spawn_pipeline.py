@@ -0,0 +1,200 @@
+from collections import deque
+import itertools
+import random
+from typing import Deque, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from Mods.AmbientSpawns import custom_spawns
+
+
+MAX_CONCURRENT_BATCHES = 3
+"""How many groups can be spawning at once, from different dens"""
+MAX_SPAWNS_PER_SECOND = 4
+"""Cap across all batches, so big groups don't all land in the same frame"""
+SPAWN_ANIM_LENGTH = 3
+"""
+How long a spawn point is busy after spawning from it, so enemies don't spawn on top of eachother.
+Only used when we can't find the length of the point's actual spawn anim for the enemy.
+"""
+BLANK_POINT_COOLDOWN = 1
+"""Blank points have no spawn anim, so just long enough for the last enemy to move out of the way"""
+
+SpawnEntry = Tuple[object, object, float]
+"""(factory, spawn point, delay after this spawn)"""
+
+
+class PointCooldowns:
+    """The world time each spawn point was last used in this map, and how long it's busy for after that"""
+    def __init__(self) -> None:
+        self.points: Dict[object, Tuple[float, float]] = {}
+        """Spawn point -> (last used world time, spawn anim length)"""
+    
+    def Clear(self):
+        self.points = {}
+    
+    def Use(self, point, now: float, factory=None):
+        """Marks the point busy for as long as the spawn anim it plays for the factory's enemy"""
+        if not point.PointDef:
+            length = BLANK_POINT_COOLDOWN
+        else:
+            length = (factory and custom_spawns.GetSpawnAnimLength(point.PointDef, factory)) or SPAWN_ANIM_LENGTH
+        self.points[point] = (now, length)
+    
+    def Release(self, point):
+        """Frees the point straight away, for when the spawn we marked it busy for didn't happen after all"""
+        self.points.pop(point, None)
+    
+    def FreeAt(self, point) -> float:
+        """The world time the point is free to spawn from again"""
+        used = self.points.get(point)
+        if not used:
+            return float("-inf")
+        return used[0] + used[1]
+    
+    def IsFree(self, point, now: float) -> bool:
+        return self.FreeAt(point) <= now
+    
+    def PickPoint(self, points: Sequence, now: float, planned: Dict[object, int]):
+        """
+        Picks a random point for the next spawn in a group, preferring those the group has used the least,
+         then those that are free right now. planned counts the group's uses of each point so far, and is updated.
+        """
+        best = []
+        bestKey = None
+        for point in points:
+            key = (planned.get(point, 0), not self.IsFree(point, now))
+            if bestKey is None or key < bestKey:
+                best = [point]
+                bestKey = key
+            elif key == bestKey:
+                best.append(point)
+        chosen = random.choice(best)
+        planned[chosen] = planned.get(chosen, 0) + 1
+        return chosen
+
+
+class SpawnBatch:
+    """
+    One group of spawns from a den, with its own delay cursor.
+    Entries are pulled from an iterator as they come due, so a big group costs nothing until each enemy spawns.
+    """
+    def __init__(self, den, entries: Iterable[SpawnEntry], startTime: float, tag=None, limit: int = None) -> None:
+        self.den = den
+        self.tag = tag
+        """The Badass Tag of the spawn this group came from, for the population caps"""
+        self.entries: Iterator[SpawnEntry] = iter(entries) if limit is None else itertools.islice(entries, limit)
+        self.remaining = limit
+        """At most how many entries are left, including next. None if there's no limit."""
+        self.numSpawned = 0
+        self.next: SpawnEntry = None
+        """The entry due at nextTime, pulled ahead so we know which point it wants"""
+        self.nextTime = startTime
+        """World time that the next entry is due"""
+        self.PullNext()
+
+    def PullNext(self):
+        self.next = next(self.entries, None)
+        if self.next is None:
+            self.remaining = 0
+
+    def IsDone(self) -> bool:
+        return self.next is None
+
+    def GetMaxRemaining(self) -> int:
+        """At most how many entries are left - just the one we've pulled if we weren't given a limit"""
+        if self.next is None:
+            return 0
+        return self.remaining if self.remaining is not None else 1
+
+    def Pop(self, now: float, cooldowns: PointCooldowns, delayScale: float = 1) -> SpawnEntry:
+        """
+        Takes the next entry and moves the delay cursor on, stretching the delay by delayScale.
+        The entry after is pulled now, so its spawn point is picked knowing this one is in use.
+        If that point is still busy, we wait for it so enemies don't spawn on top of eachother.
+        """
+        entry = self.next
+        (factory, spawn, delay) = entry
+        if spawn:
+            cooldowns.Use(spawn, now, factory)
+        self.numSpawned = self.numSpawned + 1
+        if self.remaining is not None:
+            self.remaining = self.remaining - 1
+        self.PullNext()
+        self.nextTime = now + delay * delayScale
+        if self.next is not None:
+            self.nextTime = max(self.nextTime, cooldowns.FreeAt(self.next[1]))
+        return entry
+
+
+class SpawnPipeline:
+    """
+    Holds several in-flight SpawnBatches from different dens, so groups don't have to wait behind eachother,
+     and caps the overall spawn rate across all of them.
+    """
+    def __init__(self, maxBatches: int = MAX_CONCURRENT_BATCHES, maxSpawnsPerSecond: int = MAX_SPAWNS_PER_SECOND) -> None:
+        self.maxBatches = maxBatches
+        self.maxSpawnsPerSecond = maxSpawnsPerSecond
+        self.batches: List[SpawnBatch] = []
+        self.recentSpawnTimes: Deque[float] = deque()
+        """World times of spawns in the last second, for the rate cap"""
+        self.delayScale: float = 1
+        """Stretches the delays between spawns, e.g. while the frame time is over budget"""
+        self.pointCooldowns = PointCooldowns()
+        """Shared by every batch, so groups from different dens don't use the same point at once either"""
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def IsFull(self) -> bool:
+        return len(self.batches) >= self.maxBatches
+    
+    def GetPendingCount(self) -> int:
+        """At most how many entries are still waiting to spawn across all batches"""
+        return sum(batch.GetMaxRemaining() for batch in self.batches)
+
+    def IsDenBusy(self, den) -> bool:
+        """Whether a group from this den is still spawning"""
+        return any(batch.den == den for batch in self.batches)
+
+    def Add(self, batch: SpawnBatch) -> bool:
+        """
+        Adds the batch, unless it's empty or a group from the same den is still spawning,
+         since the batches are meant to be from different dens. Returns whether it was added.
+        """
+        if batch.IsDone() or self.IsDenBusy(batch.den):
+            return False
+        self.batches.append(batch)
+        return True
+
+    def Clear(self):
+        """Drops every batch, and forgets the point cooldowns since they're only for the current map"""
+        self.batches = []
+        self.recentSpawnTimes.clear()
+        self.pointCooldowns.Clear()
+
+    def NextDeadline(self) -> float:
+        """When the next entry of any batch can spawn, including waiting for the rate cap. None if we're empty."""
+        if not self.batches:
+            return None
+        deadline = min(batch.nextTime for batch in self.batches)
+        if len(self.recentSpawnTimes) >= self.maxSpawnsPerSecond:
+            deadline = max(deadline, self.recentSpawnTimes[0] + 1)
+        return deadline
+
+    def PopDue(self, now: float) -> List[Tuple[SpawnBatch, SpawnEntry]]:
+        """Takes every entry that is due now, oldest first, until we hit the rate cap"""
+        while self.recentSpawnTimes and self.recentSpawnTimes[0] <= now - 1:
+            self.recentSpawnTimes.popleft()
+
+        due = []
+        for batch in sorted((x for x in self.batches if x.nextTime <= now), key=lambda x: x.nextTime):
+            if len(self.recentSpawnTimes) >= self.maxSpawnsPerSecond:
+                break
+            freeAt = self.pointCooldowns.FreeAt(batch.next[1])
+            if freeAt > now:
+                # Another group has used this point since - wait for it to be free
+                batch.nextTime = freeAt
+                continue
+            due.append((batch, batch.Pop(now, self.pointCooldowns, self.delayScale)))
+            self.recentSpawnTimes.append(now)
+        self.batches = [x for x in self.batches if not x.IsDone()]
+        return due
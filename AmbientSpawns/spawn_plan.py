@@ -0,0 +1,43 @@
+import math
+from typing import Iterator, Tuple
+
+
+PLAN_AHEAD = 2
+"""World time before the spawn timer runs out that we start planning the next spawn"""
+PLAN_FRAME_BUDGET = 0.002
+"""Seconds of each frame that planning can use, so it doesn't hitch like doing it all in one tick could"""
+MAX_PLAN_AGE = 10
+"""A plan older than this is thrown away, e.g. if the timer kept getting pushed back while in combat"""
+MAX_PLAN_MOVE = 300
+"""How far the player can move (on the X and Y planes) before the plan's den and points might not suit them anymore"""
+MAX_PLAN_TURN_DEGREES = 10
+"""How far the view can turn before the plan's points might be in view - the same as the view frustum's margin"""
+
+
+class SpawnPlan:
+    """
+    The next spawn worked out ahead of time - the den, the spawn and its entries with the first point already picked -
+     along with where the player was and where they were looking, to check it still holds when the timer runs out.
+    """
+    __slots__ = ("denInfo", "spawn", "entries", "originX", "originY", "forward", "madeAt")
+
+    def __init__(self, denInfo, spawn, entries: Iterator, originX: float, originY: float,
+                 forward: Tuple[float, float, float], madeAt: float) -> None:
+        self.denInfo = denInfo
+        self.spawn = spawn
+        self.entries = entries
+        """The lazy (factory, spawn point, delay) entries from GenerateSpawnsFromDen"""
+        self.originX = originX
+        self.originY = originY
+        self.forward = forward
+        """The view direction when we planned, from visibility.ViewFrustum"""
+        self.madeAt = madeAt
+
+    def IsStillValid(self, x: float, y: float, forward: Tuple[float, float, float], now: float) -> bool:
+        """Whether the player is close enough to where they were, looking the same way, for the plan to still hold"""
+        if now - self.madeAt > MAX_PLAN_AGE:
+            return False
+        if math.hypot(x - self.originX, y - self.originY) > MAX_PLAN_MOVE:
+            return False
+        dot = forward[0] * self.forward[0] + forward[1] * self.forward[1] + forward[2] * self.forward[2]
+        return dot >= math.cos(math.radians(MAX_PLAN_TURN_DEGREES))
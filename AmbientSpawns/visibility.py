@@ -0,0 +1,100 @@
+import math
+from typing import Dict, List, Sequence
+
+from Mods.AmbientSpawns.spawn_geometry import LocationTable, np
+
+
+ASPECT_RATIO = 16 / 9
+"""We can't easily get the viewport size, so assume widescreen for the vertical FOV"""
+FOV_MARGIN_DEGREES = 10
+"""Added to each side of the view, so spawns just off the edge of the screen don't pop in when you turn slightly"""
+NEAR_DISTANCE = 0
+"""Anything this far in front of the camera or closer is behind the near plane"""
+
+
+def UnrealAngleToRadians(angle: int) -> float:
+    """Rotator angles are 65536 per turn, and pitch can come through as either -16384 or 49152"""
+    angle = angle & 65535
+    if angle > 32767:
+        angle = angle - 65536
+    return angle * math.pi / 32768
+
+
+class ViewFrustum:
+    """
+    The player's camera view as a forward, right and up axis with half-angle tangents,
+     so testing a point is a few dot products instead of trig.
+    """
+    def __init__(self, x: float, y: float, z: float, pitch: float, yaw: float, fovDegrees: float,
+                 aspectRatio: float = ASPECT_RATIO, marginDegrees: float = FOV_MARGIN_DEGREES) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
+        cosPitch = math.cos(pitch)
+        sinPitch = math.sin(pitch)
+        cosYaw = math.cos(yaw)
+        sinYaw = math.sin(yaw)
+        # Unreal is left-handed: X forward, Y right, Z up
+        self.forward = (cosPitch * cosYaw, cosPitch * sinYaw, sinPitch)
+        self.right = (-sinYaw, cosYaw, 0.0)
+        self.up = (-sinPitch * cosYaw, -sinPitch * sinYaw, cosPitch)
+
+        halfFOV = math.radians(min(fovDegrees / 2 + marginDegrees, 89))
+        self.tanHorizontal = math.tan(halfFOV)
+        halfVerticalFOV = math.atan(math.tan(math.radians(fovDegrees / 2)) / aspectRatio) + math.radians(marginDegrees)
+        self.tanVertical = math.tan(min(halfVerticalFOV, math.radians(89)))
+
+    @classmethod
+    def FromPlayer(cls, PC) -> "ViewFrustum":
+        loc = PC.CalcViewLocation
+        rot = PC.CalcViewRotation
+        return cls(loc.X, loc.Y, loc.Z, UnrealAngleToRadians(rot.Pitch), UnrealAngleToRadians(rot.Yaw), PC.GetFOVAngle())
+
+    def Contains(self, x: float, y: float, z: float) -> bool:
+        dx = x - self.x
+        dy = y - self.y
+        dz = z - self.z
+        f = dx * self.forward[0] + dy * self.forward[1] + dz * self.forward[2]
+        if f <= NEAR_DISTANCE:
+            return False
+        r = dx * self.right[0] + dy * self.right[1]
+        u = dx * self.up[0] + dy * self.up[1] + dz * self.up[2]
+        return abs(r) <= f * self.tanHorizontal and abs(u) <= f * self.tanVertical
+
+    def ContainsMany(self, table: LocationTable, indexes: Sequence[int]) -> List[bool]:
+        """Tests the locations at the given indexes all in one pass"""
+        if len(indexes) == 0:
+            return []
+        if np is None:
+            return [self.Contains(table.xs[i], table.ys[i], table.zs[i]) for i in indexes]
+        indexes = np.asarray(indexes, dtype=np.intp)
+        dx = table.xs[indexes] - self.x
+        dy = table.ys[indexes] - self.y
+        dz = table.zs[indexes] - self.z
+        f = dx * self.forward[0] + dy * self.forward[1] + dz * self.forward[2]
+        r = dx * self.right[0] + dy * self.right[1]
+        u = dx * self.up[0] + dy * self.up[1] + dz * self.up[2]
+        visible = (f > NEAR_DISTANCE) & (np.abs(r) <= f * self.tanHorizontal) & (np.abs(u) <= f * self.tanVertical)
+        return visible.tolist()
+
+
+class VisibilityCache:
+    """
+    Which locations in a LocationTable were in view when the frustum was built.
+    We build one per spawn attempt, so a whole group is planned against the same view.
+    """
+    def __init__(self, frustum: ViewFrustum, table: LocationTable) -> None:
+        self.frustum = frustum
+        self.table = table
+        self.visible: Dict[int, bool] = {}
+
+    def Test(self, indexes: Sequence[int]) -> List[bool]:
+        """Returns whether each location is in view, only testing those we haven't already"""
+        untested = [i for i in indexes if i not in self.visible]
+        if untested:
+            self.visible.update(zip(untested, self.frustum.ContainsMany(self.table, untested)))
+        return [self.visible[i] for i in indexes]
+
+    def Prefetch(self, indexes: Sequence[int]):
+        """Tests every location that needs the FOV check in one pass, ready for later lookups"""
+        self.Test([i for i in indexes if self.table.testFOV[i]])
@@ -0,0 +1,38 @@
+import itertools
+import random
+from typing import List, Sequence
+
+
+class WeightedTable:
+    """
+    Items with their cumulative weights, built once instead of on every random.choices call,
+     so each draw is just a random number and a bisect.
+    """
+    __slots__ = ("items", "cumWeights")
+    
+    def __init__(self, items: Sequence, weights: Sequence[float]) -> None:
+        self.Build(items, weights)
+
+    def Build(self, items: Sequence, weights: Sequence[float]):
+        if len(items) != len(weights):
+            raise ValueError(f"Number of weights {len(weights)} doesn't match number of items {len(items)}!")
+        self.items = tuple(items)
+        self.cumWeights = list(itertools.accumulate(weights))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def GetTotal(self) -> float:
+        return self.cumWeights[-1] if self.cumWeights else 0
+
+    def Pick(self):
+        """Returns a random item, or None if every weight is 0"""
+        if self.GetTotal() <= 0:
+            return None
+        return random.choices(self.items, cum_weights=self.cumWeights)[0]
+
+    def Picks(self, k: int) -> List:
+        """Returns k random items (with replacement), or none if every weight is 0"""
+        if self.GetTotal() <= 0:
+            return []
+        return random.choices(self.items, cum_weights=self.cumWeights, k=k)
@@ -0,0 +1,208 @@
+"""
+Compares the memory and setup time of DenSpawnInfo's slotted index array layout against the old layout,
+ where each den was a plain object holding lists of the spawn and spawn point objects themselves.
+The old layout gets the same spawn points by PointDef as the new one, only as lists of the points, so both hold the same data.
+Dens are built the way SetupFromCache builds them, from a synthetic map using the real spawns from spawns_bl2.json.
+Run from the repository root with: python tests/AmbientSpawns/benchmark_den_spawns.py [number of dens]
+"""
+from array import array
+import ast
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from typing import Dict, List
+
+from sdk_stubs import MOD_DIR
+from Mods.AmbientSpawns import custom_spawns
+
+
+POINTS_PER_DEN = 8
+BLANK_POINTS_PER_DEN = 2
+LEVEL_SPAWNS_PER_DEN = (5, 20)
+CUSTOM_SPAWNS_PER_DEN = (10, 40)
+NUM_LEVEL_SPAWNS = 40
+TIMING_NUMBER = 10
+TIMING_REPEATS = 7
+
+
+def LoadModDefinitions(*names: str) -> dict:
+    """Runs just these top level definitions from the mod's __init__.py, since importing it registers the mod"""
+    with open(os.path.join(MOD_DIR, "__init__.py")) as file:
+        tree = ast.parse(file.read())
+    nodes = [
+        node for node in tree.body
+        if (isinstance(node, ast.ClassDef) and node.name in names)
+        or (isinstance(node, ast.Assign) and any(getattr(x, "id", None) in names for x in node.targets))
+    ]
+    namespace = {"array": array, "Dict": Dict, "List": List, "custom_spawns": custom_spawns}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), "__init__.py", "exec"), namespace)
+    return namespace
+
+
+MOD = LoadModDefinitions("DenSpawnInfo", "POPDEF_PREFIX_EXCLUDED_FROM_FOV_CHECKS")
+DenSpawnInfo = MOD["DenSpawnInfo"]
+POPDEF_PREFIX_EXCLUDED_FROM_FOV_CHECKS = MOD["POPDEF_PREFIX_EXCLUDED_FROM_FOV_CHECKS"]
+
+
+class LegacyDenSpawnInfo:
+    """DenSpawnInfo as it was before it used __slots__ and index arrays, with its points sorted by PointDef the same way"""
+    def __init__(self) -> None:
+        self.denObject: object
+        self.index: int = 0
+        self.needsFOVCheck: bool = True
+        self.baseSpawn: custom_spawns.CustomSpawn
+        self.levelSpawns: List[custom_spawns.CustomSpawn] = []
+        self.customSpawns: List[custom_spawns.CustomSpawn] = []
+        self.fovCustomSpawns: List[custom_spawns.CustomSpawn] = []
+        self.blankPoints: List[object] = []
+        self.pointIndexes: range = range(0)
+        self.pointsByDef: Dict[str, List[object]] = {}
+        self.spawnTables: Dict[str, custom_spawns.TagWeightedTable] = {}
+
+    def GetSpawnTable(self, listName: str) -> custom_spawns.TagWeightedTable:
+        table = self.spawnTables.get(listName)
+        if not table:
+            table = custom_spawns.TagWeightedTable(getattr(self, listName))
+            self.spawnTables[listName] = table
+        return table
+
+    def PartitionPoints(self, mapPoints: List[object]):
+        self.pointsByDef = {}
+        for i in self.pointIndexes:
+            point = mapPoints[i]
+            name = point.PointDef.Name if point.PointDef else "None"
+            self.pointsByDef.setdefault(name, []).append(point)
+        self.blankPoints = self.pointsByDef.get("None", [])
+
+    def FindFOVSpawns(self):
+        if len(self.blankPoints) == 0:
+            self.needsFOVCheck = False
+            return
+        self.needsFOVCheck = True
+        for spawn in self.customSpawns:
+            if isinstance(spawn, custom_spawns.CustomSpawn):
+                if spawn.popDef:
+                    path = spawn.popDef
+                else:
+                    path = spawn.factory
+                if any(x in path for x in POPDEF_PREFIX_EXCLUDED_FROM_FOV_CHECKS):
+                    self.fovCustomSpawns.append(spawn)
+                    self.needsFOVCheck = False
+
+
+class FakePointDef:
+    def __init__(self, name: str) -> None:
+        self.Name = name
+
+
+class FakePoint:
+    def __init__(self, pointDef: FakePointDef) -> None:
+        self.PointDef = pointDef
+
+
+class FakeDen:
+    def __init__(self, points: List[FakePoint]) -> None:
+        self.SpawnPoints = points
+
+
+class SyntheticMap:
+    """A map's dens, spawn points and spawn lists, with a cache entry for each den like map_cache stores"""
+    def __init__(self, numDens: int, seed: int = 0) -> None:
+        rng = random.Random(seed)
+        catalogue = custom_spawns.SpawnCatalogue(os.path.join(MOD_DIR, "spawns_bl2.json"))
+        catalogue.LoadData()
+        allSpawns = [spawn for (_, spawns) in catalogue.items() for spawn in spawns]
+        self.mapNormalSpawns = rng.sample(allSpawns, NUM_LEVEL_SPAWNS)
+        self.mapCustomSpawns = allSpawns
+
+        pointDefs = [FakePointDef(f"PopPointDef_{i}") for i in range(6)]
+        self.mapPoints: List[FakePoint] = []
+        self.dens: List[FakeDen] = []
+        self.denPointIndexes: List[range] = []
+        self.cacheEntries: List[dict] = []
+        for _ in range(numDens):
+            points = [FakePoint(None) for _ in range(BLANK_POINTS_PER_DEN)]
+            points += [FakePoint(rng.choice(pointDefs)) for _ in range(POINTS_PER_DEN - BLANK_POINTS_PER_DEN)]
+            self.denPointIndexes.append(range(len(self.mapPoints), len(self.mapPoints) + len(points)))
+            self.mapPoints.extend(points)
+            self.dens.append(FakeDen(points))
+            self.cacheEntries.append({
+                "levelSpawns": sorted(rng.sample(range(len(self.mapNormalSpawns)), rng.randint(*LEVEL_SPAWNS_PER_DEN))),
+                "customSpawns": sorted(rng.sample(range(len(self.mapCustomSpawns)), rng.randint(*CUSTOM_SPAWNS_PER_DEN))),
+            })
+
+    def BuildLegacyDens(self) -> List[LegacyDenSpawnInfo]:
+        denInfos = []
+        for (i, (den, denEntry)) in enumerate(zip(self.dens, self.cacheEntries)):
+            denInfo = LegacyDenSpawnInfo()
+            denInfo.denObject = den
+            denInfo.index = i
+            denInfo.pointIndexes = self.denPointIndexes[i]
+            denInfo.PartitionPoints(self.mapPoints)
+            denInfo.levelSpawns = [self.mapNormalSpawns[x] for x in denEntry["levelSpawns"]]
+            denInfo.customSpawns = [self.mapCustomSpawns[x] for x in denEntry["customSpawns"]]
+            denInfo.FindFOVSpawns()
+            denInfos.append(denInfo)
+        return denInfos
+
+    def BuildDens(self) -> List[DenSpawnInfo]:
+        denInfos = []
+        for (i, (den, denEntry)) in enumerate(zip(self.dens, self.cacheEntries)):
+            denInfo = DenSpawnInfo()
+            denInfo.denObject = den
+            denInfo.index = i
+            denInfo.pointIndexes = self.denPointIndexes[i]
+            denInfo.PartitionPoints(self.mapPoints)
+            denInfo.levelSpawns = array("H", denEntry["levelSpawns"])
+            denInfo.customSpawns = array("H", denEntry["customSpawns"])
+            denInfo.FindFOVSpawns(self.mapCustomSpawns)
+            denInfos.append(denInfo)
+        return denInfos
+
+
+def MeasureBytes(build) -> int:
+    """Bytes still allocated by build's result, including the spawn tables it builds when we pick from it"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    return sum(x.size_diff for x in after.compare_to(before, "filename"))
+
+
+def Main(numDens: int):
+    synthetic = SyntheticMap(numDens)
+
+    def BuildLegacyWithTables():
+        denInfos = synthetic.BuildLegacyDens()
+        for denInfo in denInfos:
+            denInfo.GetSpawnTable("levelSpawns")
+            denInfo.GetSpawnTable("customSpawns")
+        return denInfos
+
+    def BuildWithTables():
+        denInfos = synthetic.BuildDens()
+        for denInfo in denInfos:
+            denInfo.GetSpawnTable("levelSpawns", synthetic.mapNormalSpawns)
+            denInfo.GetSpawnTable("customSpawns", synthetic.mapCustomSpawns)
+        return denInfos
+
+    print(f"{numDens} dens, {len(synthetic.mapNormalSpawns)} level spawns, {len(synthetic.mapCustomSpawns)} custom spawns"
+          f", Python {sys.version.split()[0]}")
+    print(f"{'':<28}{'before':>12}{'after':>12}")
+    rows = [
+        ("bytes per den", MeasureBytes(synthetic.BuildLegacyDens), MeasureBytes(synthetic.BuildDens)),
+        ("bytes per den with tables", MeasureBytes(BuildLegacyWithTables), MeasureBytes(BuildWithTables)),
+    ]
+    for (name, before, after) in rows:
+        print(f"{name:<28}{before / numDens:>12.0f}{after / numDens:>12.0f}")
+    before = min(timeit.repeat(synthetic.BuildLegacyDens, number=TIMING_NUMBER, repeat=TIMING_REPEATS)) / TIMING_NUMBER
+    after = min(timeit.repeat(synthetic.BuildDens, number=TIMING_NUMBER, repeat=TIMING_REPEATS)) / TIMING_NUMBER
+    print(f"{'setup ms':<28}{before * 1000:>12.2f}{after * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    Main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,51 @@
+"""
+Just enough of unrealsdk and ModMenu to import AmbientSpawns' modules outside the game.
+Importing this installs them, so import it before anything from Mods.AmbientSpawns.
+"""
+import enum
+import os
+import sys
+import types
+
+
+MOD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "AmbientSpawns")
+
+
+def InstallStubs():
+    """Just enough of unrealsdk and ModMenu for our modules to import, without running the mod itself"""
+    unrealsdk = types.ModuleType("unrealsdk")
+    unrealsdk.Log = lambda *args: None
+    unrealsdk.FindObject = lambda *args: None
+    unrealsdk.FindAll = lambda *args: []
+    unrealsdk.KeepAlive = lambda *args: None
+    unrealsdk.LoadPackage = lambda *args: None
+    unrealsdk.RunHook = lambda *args: None
+    unrealsdk.RemoveHook = lambda *args: None
+    unrealsdk.GetEngine = lambda: None
+    for type_name in ("UObject", "UFunction", "FStruct"):
+        setattr(unrealsdk, type_name, type(type_name, (), {}))
+    sys.modules["unrealsdk"] = unrealsdk
+
+    class Game(enum.Enum):
+        BL2 = enum.auto()
+        TPS = enum.auto()
+
+        @staticmethod
+        def GetCurrent():
+            return Game.BL2
+
+    ModMenu = types.ModuleType("Mods.ModMenu")
+    ModMenu.Game = Game
+    Mods = types.ModuleType("Mods")
+    Mods.__path__ = []
+    Mods.ModMenu = ModMenu
+    sys.modules["Mods"] = Mods
+    sys.modules["Mods.ModMenu"] = ModMenu
+
+    # Import our modules without running __init__, which registers the mod
+    AmbientSpawns = types.ModuleType("Mods.AmbientSpawns")
+    AmbientSpawns.__path__ = [MOD_DIR]
+    sys.modules["Mods.AmbientSpawns"] = AmbientSpawns
+
+
+InstallStubs()
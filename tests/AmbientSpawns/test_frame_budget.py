@@ -0,0 +1,72 @@
+"""
+Tests the FrameBudget's sliding window going over and back under the budget, and how much it throttles spawning.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import unittest
+
+import sdk_stubs
+from Mods.AmbientSpawns import frame_budget
+from Mods.AmbientSpawns.frame_budget import FrameBudget, FrameState
+
+
+class FrameBudgetTests(unittest.TestCase):
+    def setUp(self):
+        # 10ms per frame
+        self.budget = FrameBudget(10)
+
+    def Fill(self, deltaSeconds: float, count: int = frame_budget.WINDOW_SIZE):
+        for _ in range(count):
+            self.budget.Sample(deltaSeconds)
+
+    def test_off_without_a_budget(self):
+        budget = FrameBudget(0)
+        budget.Sample(1)
+        self.assertIs(budget.GetState(), FrameState.OFF)
+        self.assertEqual(budget.GetDelayScale(), 1)
+        self.assertEqual(budget.ScaleGroupSize(4), 4)
+        self.assertFalse(budget.ShouldDefer())
+
+    def test_over_and_back_under(self):
+        self.Fill(0.008)
+        self.assertIs(self.budget.GetState(), FrameState.OK)
+        self.Fill(0.012)
+        self.assertIs(self.budget.GetState(), FrameState.STRAINED)
+        self.assertFalse(self.budget.ShouldDefer())
+        self.Fill(0.015)
+        self.assertIs(self.budget.GetState(), FrameState.OVER)
+        self.assertTrue(self.budget.ShouldDefer())
+        # Recovering takes until the slow frames have mostly left the window
+        self.Fill(0.001, 7)
+        self.assertIs(self.budget.GetState(), FrameState.STRAINED)
+        self.Fill(0.001, 1)
+        self.assertIs(self.budget.GetState(), FrameState.OK)
+        self.Fill(0.001)
+        self.assertAlmostEqual(self.budget.GetAverageFrameTime(), 0.001)
+
+    def test_one_slow_frame_is_averaged_out(self):
+        self.Fill(0.005)
+        self.budget.Sample(0.1)
+        self.assertIs(self.budget.GetState(), FrameState.OK)
+
+    def test_throttling(self):
+        self.Fill(0.020)
+        self.assertAlmostEqual(self.budget.GetDelayScale(), 2)
+        self.assertEqual(self.budget.ScaleGroupSize(5), 2)
+        self.assertEqual(self.budget.ScaleGroupSize(1), 1)
+        self.Fill(0.1)
+        self.assertEqual(self.budget.GetDelayScale(), frame_budget.MAX_DELAY_SCALE)
+        self.assertEqual(self.budget.ScaleGroupSize(5), 1)
+
+    def test_set_budget_and_reset(self):
+        self.Fill(0.015)
+        self.budget.SetBudget(20)
+        self.assertIs(self.budget.GetState(), FrameState.OK)
+        self.budget.SetBudget(5)
+        self.assertIs(self.budget.GetState(), FrameState.OVER)
+        self.budget.Reset()
+        self.assertIs(self.budget.GetState(), FrameState.OK)
+        self.assertEqual(self.budget.GetStatus(), "OK")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests which objects KeepAliveRegistry keeps alive and charges to each DLC.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import unittest
+from unittest import mock
+
+import sdk_stubs
+from Mods.AmbientSpawns import level_packages
+from Mods.AmbientSpawns.level_packages import DLC
+
+
+class FakeFlags:
+    def __init__(self) -> None:
+        self.A = 0
+
+
+class FakeObject:
+    def __init__(self, name: str, outer: "FakeObject" = None) -> None:
+        self.Name = name
+        self.Outer = outer
+        self.ObjectFlags = FakeFlags()
+
+
+class FakeWorld:
+    """The objects FindAll returns, with KeepAlive setting the flag the registry checks and clears"""
+    def __init__(self) -> None:
+        self.objects = {class_name: [] for class_name in level_packages.KEEP_ALIVE_CLASSES}
+
+    def Add(self, class_name: str, package: str) -> FakeObject:
+        object = FakeObject(f"{class_name}_{len(self.objects[class_name])}", FakeObject("Population", FakeObject(package)))
+        self.objects[class_name].append(object)
+        return object
+
+    def FindAll(self, class_name: str):
+        return list(self.objects.get(class_name, []))
+
+    def KeepAlive(self, object: FakeObject):
+        object.ObjectFlags.A |= 0x4000
+
+
+class KeepAliveRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.world = FakeWorld()
+        patcher = mock.patch.multiple(level_packages.unrealsdk, FindAll=self.world.FindAll, KeepAlive=self.world.KeepAlive)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = level_packages.KeepAliveRegistry()
+
+    def test_new_objects_are_tracked(self):
+        resident = self.registry.Snapshot()
+        cooked = self.world.Add("WillowPopulationDefinition", "GD_Population_Bandit")
+        self.assertEqual(self.registry.TrackNew(resident, DLC.Torgue, ["Iris_Hub_Combat"]), 1)
+        self.assertIs(self.registry.sources[cooked], DLC.Torgue)
+
+    def test_resident_objects_from_our_packages_are_tracked(self):
+        ours = self.world.Add("PopulationFactoryBalancedAIPawn", "Dam_Combat")
+        theirs = self.world.Add("PopulationFactoryBalancedAIPawn", "Dam_P")
+        resident = self.registry.Snapshot()
+        self.registry.TrackNew(resident, DLC.BL2, ["dam_combat"])
+        self.assertIn(ours, self.registry.sources)
+        self.assertNotIn(theirs, self.registry.sources)
+
+    def test_objects_kept_alive_elsewhere_are_not_ours(self):
+        other = self.world.Add("WillowPopulationDefinition", "Dam_Combat")
+        other.ObjectFlags.A |= 0x4000
+        resident = self.registry.Snapshot()
+        self.registry.TrackNew(resident, DLC.BL2, ["Dam_Combat"])
+        self.assertNotIn(other, self.registry.sources)
+
+    def test_objects_are_only_charged_once(self):
+        resident = self.registry.Snapshot()
+        self.world.Add("WillowPopulationDefinition", "GD_Population_Bandit")
+        self.registry.TrackNew(resident, DLC.BL2, [])
+        self.assertEqual(self.registry.TrackNew(resident, DLC.Scarlett, []), 0)
+        self.assertEqual(self.registry.GetCounts(DLC.Scarlett)["WillowPopulationDefinition"], 0)
+
+    def test_release_clears_keep_alive(self):
+        resident = self.registry.Snapshot()
+        object = self.world.Add("WillowPopulationDefinition", "GD_Population_Bandit")
+        self.registry.TrackNew(resident, DLC.BL2, [])
+        self.assertEqual(self.registry.Release(DLC.BL2), 1)
+        self.assertFalse(object.ObjectFlags.A & 0x4000)
+        self.assertNotIn(object, self.registry.sources)
+
+
+class LoadJobTests(unittest.TestCase):
+    def setUp(self):
+        self.world = FakeWorld()
+        self.loaded = []
+        def LoadPackage(package_name: str):
+            self.loaded.append(package_name)
+            self.world.Add("WillowPopulationDefinition", package_name)
+        patcher = mock.patch.multiple(
+            level_packages.unrealsdk, FindAll=self.world.FindAll, KeepAlive=self.world.KeepAlive, LoadPackage=LoadPackage
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = level_packages.KeepAliveRegistry()
+        for (name, value) in (("keep_alive_registry", self.registry), ("loaded_DLCs", [])):
+            patcher = mock.patch.object(level_packages, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_one_package_per_step(self):
+        package_names = level_packages.combat_packages_by_DLC[DLC.Torgue]
+        job = level_packages.LoadLevelSpawnObjectsJob(DLC.Torgue)
+        self.assertEqual(next(job), (1, len(package_names)))
+        # The first package's objects are kept alive before the next frame
+        self.assertEqual(self.loaded, package_names[:1])
+        self.assertEqual(self.registry.GetCounts(DLC.Torgue)["WillowPopulationDefinition"], 1)
+        self.assertEqual(len(list(job)), len(package_names) - 1)
+        self.assertEqual(level_packages.loaded_DLCs, [DLC.Torgue])
+        self.assertEqual(list(level_packages.LoadLevelSpawnObjectsJob(DLC.Torgue)), [])
+
+    def test_dropped_job_releases(self):
+        job = level_packages.LoadLevelSpawnObjectsJob(DLC.Torgue)
+        next(job)
+        job.close()
+        self.assertEqual(self.registry.sources, {})
+        self.assertNotIn(DLC.Torgue, level_packages.loaded_DLCs)
+
+
+if __name__ == "__main__":
+    unittest.main()
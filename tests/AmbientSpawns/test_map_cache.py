@@ -0,0 +1,46 @@
+"""
+Tests the map cache's eligibility index, and when it tries spawns that failed in a map again.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sdk_stubs
+from Mods.AmbientSpawns import map_cache
+
+
+class EligibilityTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for (name, value) in (("CACHE_FILE", os.path.join(directory.name, "map_cache.json")), ("_cache", None)):
+            patcher = mock.patch.object(map_cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.key = map_cache.EligibilityKey("BL2", "Dam_P", "BL2")
+
+    def test_failed_spawns_expire(self):
+        map_cache.PutEligibility(self.key, ["a"], {"b": 0}, "dens")
+        for _ in range(map_cache.FAILED_SPAWN_RETRY_SETUPS):
+            self.assertTrue(map_cache.SkipFailedSpawns(self.key, "dens"))
+        # Due to be tried again, so the cached tables shouldn't be used
+        self.assertFalse(map_cache.SkipFailedSpawns(self.key, "dens"))
+        skips = map_cache.GetFailedSpawns(self.key, "dens")["b"]
+        self.assertTrue(map_cache.IsFailedSpawnDue(skips))
+
+    def test_failed_spawns_forgotten_when_dens_change(self):
+        map_cache.PutEligibility(self.key, [], {"b": 0}, "dens")
+        self.assertEqual(map_cache.GetFailedSpawns(self.key, "dens"), {"b": 0})
+        self.assertEqual(map_cache.GetFailedSpawns(self.key, "new dens"), {})
+        self.assertTrue(map_cache.SkipFailedSpawns(self.key, "new dens"))
+
+    def test_written_to_file(self):
+        map_cache.PutEligibility(self.key, ["a"], {"b": 2}, "dens")
+        map_cache._cache = None
+        self.assertEqual(map_cache.GetFailedSpawns(self.key, "dens"), {"b": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests the Scheduler's deadline ordering, cancelling, and hooking the tick only while something is scheduled.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import unittest
+from unittest import mock
+
+import sdk_stubs
+from Mods.AmbientSpawns import scheduler
+
+
+class FakeCaller:
+    """The PlayerController the tick hook is called with"""
+    def __init__(self) -> None:
+        self.WorldInfo = mock.Mock(TimeSeconds=0.0)
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.hooks = {}
+        patcher = mock.patch.multiple(
+            scheduler.unrealsdk,
+            RunHook=lambda function, name, callback: self.hooks.__setitem__(name, callback),
+            RemoveHook=lambda function, name: self.hooks.pop(name),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = scheduler.Scheduler("Test.PlayerTick")
+        self.caller = FakeCaller()
+        self.ran = []
+
+    def Tick(self, now: float):
+        self.caller.WorldInfo.TimeSeconds = now
+        self.scheduler.Tick(self.caller, None, None)
+
+    def Record(self, name: str):
+        return lambda now: self.ran.append((name, now))
+
+    def test_runs_in_deadline_order(self):
+        self.scheduler.Schedule(3, self.Record("c"))
+        self.scheduler.Schedule(1, self.Record("a"))
+        self.scheduler.Schedule(2, self.Record("b"))
+        self.scheduler.Schedule(2, self.Record("b2"))
+        self.Tick(0.5)
+        self.assertEqual(self.ran, [])
+        self.Tick(2)
+        self.assertEqual([x[0] for x in self.ran], ["a", "b", "b2"])
+        self.Tick(5)
+        self.assertEqual(self.ran[-1], ("c", 5))
+
+    def test_next_tick(self):
+        self.scheduler.ScheduleNextTick(self.Record("next"))
+        self.Tick(0)
+        self.assertEqual(self.ran, [("next", 0)])
+
+    def test_events_scheduled_while_ticking_wait_for_the_next_tick(self):
+        self.scheduler.Schedule(1, lambda now: self.scheduler.ScheduleNextTick(self.Record("later")))
+        self.Tick(1)
+        self.assertEqual(self.ran, [])
+        self.Tick(1.1)
+        self.assertEqual(self.ran, [("later", 1.1)])
+
+    def test_cancel(self):
+        event = self.scheduler.Schedule(1, self.Record("cancelled"))
+        self.scheduler.Schedule(2, self.Record("kept"))
+        self.scheduler.Cancel(event)
+        self.assertFalse(event.IsPending())
+        self.Tick(3)
+        self.assertEqual([x[0] for x in self.ran], ["kept"])
+
+    def test_hooked_only_while_scheduled(self):
+        event = self.scheduler.Schedule(1, self.Record("a"))
+        self.assertIn("Test.PlayerTick", self.hooks)
+        self.scheduler.Cancel(event)
+        self.assertNotIn("Test.PlayerTick", self.hooks)
+        self.scheduler.Schedule(1, self.Record("b"))
+        self.Tick(1)
+        self.assertNotIn("Test.PlayerTick", self.hooks)
+        self.assertTrue(self.scheduler.IsEmpty())
+
+    def test_failing_callback_does_not_lose_others(self):
+        def Fail(now):
+            raise RuntimeError("spawn went wrong")
+        failing = self.scheduler.Schedule(1, Fail)
+        self.scheduler.Schedule(1, self.Record("after"))
+        self.Tick(1)
+        self.assertEqual(self.ran, [("after", 1)])
+        self.assertFalse(failing.IsPending())
+
+    def test_clear(self):
+        event = self.scheduler.Schedule(1, self.Record("a"))
+        self.scheduler.Clear()
+        self.assertFalse(event.IsPending())
+        self.assertNotIn("Test.PlayerTick", self.hooks)
+        self.Tick(2)
+        self.assertEqual(self.ran, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
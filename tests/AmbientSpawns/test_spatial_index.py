@@ -0,0 +1,141 @@
+"""
+Tests that the DenGrid and CandidateRing find every den in a distance ring, checked against comparing every den's distance,
+ and that CandidateRing only rescans when it has to.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import math
+import random
+import unittest
+from unittest import mock
+
+import sdk_stubs
+from Mods.AmbientSpawns import spatial_index, spawn_geometry
+from Mods.AmbientSpawns.spawn_geometry import LocationTable
+
+
+def RandomDens(rng: random.Random, count: int, extent: float = 40000):
+    return [(rng.uniform(-extent, extent), rng.uniform(-extent, extent)) for _ in range(count)]
+
+
+def InRing(dens, x: float, y: float, minDist: float, maxDist: float):
+    return {i for (i, (denX, denY)) in enumerate(dens) if minDist < math.hypot(denX - x, denY - y) < maxDist}
+
+
+def BuildGrid(dens, cellSize: float = spatial_index.DEFAULT_CELL_SIZE) -> spatial_index.DenGrid:
+    grid = spatial_index.DenGrid(cellSize)
+    for (i, (x, y)) in enumerate(dens):
+        grid.Insert(i, x, y)
+    return grid
+
+
+class DenGridTests(unittest.TestCase):
+    def test_query_ring_finds_every_den_in_the_ring(self):
+        rng = random.Random(1)
+        dens = RandomDens(rng, 2000)
+        grid = BuildGrid(dens)
+        for _ in range(50):
+            (x, y) = (rng.uniform(-40000, 40000), rng.uniform(-40000, 40000))
+            minDist = rng.uniform(0, 5000)
+            maxDist = minDist + rng.uniform(1000, 20000)
+            found = grid.QueryRing(x, y, minDist, maxDist)
+            self.assertEqual(len(found), len(set(found)))
+            self.assertLessEqual(InRing(dens, x, y, minDist, maxDist), set(found))
+
+    def test_query_ring_skips_cells_inside_and_outside(self):
+        size = spatial_index.DEFAULT_CELL_SIZE
+        # One den in the player's own cell, one in the ring, one far away
+        dens = [(size * 0.5, size * 0.5), (size * 4.5, size * 0.5), (size * 40.5, size * 0.5)]
+        grid = BuildGrid(dens)
+        found = grid.QueryRing(size * 0.5, size * 0.5, size * 2, size * 6)
+        self.assertEqual(found, [1])
+
+    def test_cell_edges_and_negative_coordinates(self):
+        size = spatial_index.DEFAULT_CELL_SIZE
+        grid = spatial_index.DenGrid(size)
+        self.assertEqual(grid.CellOf(0, 0), (0, 0))
+        self.assertEqual(grid.CellOf(-1, size), (-1, 1))
+        dens = [(-size, 0), (size, -size), (0, size * 3)]
+        grid = BuildGrid(dens, size)
+        self.assertEqual(grid.numDens, 3)
+        self.assertEqual(set(grid.QueryRing(0, 0, 0, size * 3.5)), {0, 1, 2})
+
+
+class CandidateRingTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(2)
+        self.dens = RandomDens(rng, 1500)
+        self.grid = BuildGrid(self.dens)
+        self.locations = LocationTable([(x, y, 0) for (x, y) in self.dens], [False] * len(self.dens))
+        self.ring = spatial_index.CandidateRing()
+        rescan = mock.patch.object(self.ring, "Rescan", wraps=self.ring.Rescan)
+        self.rescan = rescan.start()
+        self.addCleanup(rescan.stop)
+
+    def Query(self, x: float, y: float, minDist: float = 2000, maxDist: float = 12000):
+        found = self.ring.Query(self.grid, self.locations, x, y, minDist, maxDist)
+        self.assertEqual(len(found), len(set(found)))
+        self.assertEqual(set(found), InRing(self.dens, x, y, minDist, maxDist))
+        return found
+
+    def test_small_moves_reuse_the_scan(self):
+        rng = random.Random(3)
+        (x, y) = (0, 0)
+        self.Query(x, y)
+        for _ in range(30):
+            # A random walk that stays within the margin of where we first scanned
+            angle = rng.uniform(0, math.tau)
+            distance = rng.uniform(0, self.ring.margin)
+            self.Query(math.cos(angle) * distance, math.sin(angle) * distance)
+        self.assertEqual(self.rescan.call_count, 1)
+
+    def test_rescans_past_the_margin(self):
+        self.Query(0, 0)
+        self.Query(self.ring.margin + 1, 0)
+        self.assertEqual(self.rescan.call_count, 2)
+
+    def test_moved_by_the_whole_band(self):
+        # Moving as far as the margin leaves no den certain to still be in the ring, so they all get checked
+        self.Query(0, 0, 1000, 2000)
+        self.Query(self.ring.margin, 0, 1000, 2000)
+        self.assertEqual(self.rescan.call_count, 1)
+
+    def test_rescans_when_the_distances_change(self):
+        self.Query(0, 0)
+        self.Query(0, 0, 3000, 12000)
+        self.Query(0, 0, 3000, 10000)
+        self.assertEqual(self.rescan.call_count, 3)
+
+    def test_rescans_when_the_grid_changes(self):
+        self.Query(0, 0)
+        self.dens.append((5000, 0))
+        self.grid.Insert(len(self.dens) - 1, 5000, 0)
+        self.locations = LocationTable([(x, y, 0) for (x, y) in self.dens], [False] * len(self.dens))
+        self.assertIn(len(self.dens) - 1, self.Query(0, 0))
+        self.assertEqual(self.rescan.call_count, 2)
+        # A new grid for a new map, even with the same number of dens
+        self.grid = BuildGrid(self.dens)
+        self.Query(0, 0)
+        self.assertEqual(self.rescan.call_count, 3)
+
+    def test_ring_boundaries_are_exclusive(self):
+        self.dens[:] = [(2000, 0), (12000, 0), (7000, 0)]
+        self.grid = BuildGrid(self.dens)
+        self.locations = LocationTable([(x, y, 0) for (x, y) in self.dens], [False] * 3)
+        # Exactly on minDist and maxDist is outside the ring
+        self.assertEqual(self.Query(0, 0), [2])
+        # From the reused scan, stepping towards them takes the first den out and brings the second in
+        self.assertEqual(set(self.Query(100, 0)), {1, 2})
+        self.assertEqual(self.rescan.call_count, 1)
+
+
+class CandidateRingPythonTests(CandidateRingTests):
+    """The same, with the LocationTable's pure Python fallback for when NumPy isn't installed"""
+    def setUp(self):
+        patcher = mock.patch.object(spawn_geometry, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+if __name__ == "__main__":
+    unittest.main()
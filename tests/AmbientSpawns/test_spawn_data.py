@@ -0,0 +1,48 @@
+"""
+Validates spawns_bl2.json and spawns_tps.json outside the game, with unrealsdk and ModMenu stubbed out.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import os
+import unittest
+
+from sdk_stubs import MOD_DIR
+from Mods.AmbientSpawns import custom_spawns
+
+
+class SpawnDataTests(unittest.TestCase):
+    def CheckFile(self, fileName: str):
+        catalogue = custom_spawns.SpawnCatalogue(os.path.join(MOD_DIR, fileName))
+        catalogue.LoadData()
+        self.assertGreater(len(catalogue), 0)
+        for DLC, spawns in catalogue.items():
+            for spawn in spawns:
+                self.assertIsInstance(spawn, custom_spawns.Spawn)
+        for pool in catalogue.GetMegaMixSubstitutionPools():
+            self.assertGreater(len(pool), 0, f"{fileName} has an empty Mega Mix pool")
+
+    def test_bl2(self):
+        self.CheckFile("spawns_bl2.json")
+
+    def test_tps(self):
+        self.CheckFile("spawns_tps.json")
+
+    def test_invalid_spawn(self):
+        spawn = {"type": "CustomSpawn", "name": "Broken", "tag": "BADASS", "numSpawns": [1, 2], "numSpawnsWeights": [1]}
+        with self.assertRaises(ValueError):
+            custom_spawns.ValidateSpawnTree(spawn, "test")
+        spawn = {"type": "PoolSpawn", "name": "Broken", "tag": "BADASS", "customSpawnList": [{"type": "Nope"}]}
+        with self.assertRaises(ValueError):
+            custom_spawns.ValidateSpawnTree(spawn, "test")
+
+    def test_pick_excluding_capped_tags(self):
+        Tag = custom_spawns.Tag
+        chump = custom_spawns.Spawn("Chump", Tag.CHUMP, None, [], [])
+        boss = custom_spawns.Spawn("Boss", Tag.BOSS, None, [], [])
+        table = custom_spawns.TagWeightedTable([chump, boss])
+        for _ in range(20):
+            self.assertIs(table.PickExcluding({Tag.BOSS}), chump)
+        self.assertIsNone(table.PickExcluding({Tag.CHUMP, Tag.BOSS}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Tests the SpawnPipeline's batch and rate limits, and the spawn point cooldowns shared between its batches.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import unittest
+
+import sdk_stubs
+from Mods.AmbientSpawns import spawn_pipeline
+from Mods.AmbientSpawns.spawn_pipeline import PointCooldowns, SpawnBatch, SpawnPipeline
+
+
+class FakePoint:
+    def __init__(self, pointDef=None) -> None:
+        self.PointDef = pointDef
+
+
+def Entries(points, delay: float = 0.5):
+    return [("factory", point, delay) for point in points]
+
+
+class PointCooldownTests(unittest.TestCase):
+    def test_cooldown_expiry(self):
+        cooldowns = PointCooldowns()
+        point = FakePoint("PopPointDef_Drop")
+        blank = FakePoint()
+        self.assertTrue(cooldowns.IsFree(point, 0))
+        cooldowns.Use(point, 10)
+        cooldowns.Use(blank, 10)
+        self.assertFalse(cooldowns.IsFree(point, 10 + spawn_pipeline.SPAWN_ANIM_LENGTH - 0.1))
+        self.assertTrue(cooldowns.IsFree(point, 10 + spawn_pipeline.SPAWN_ANIM_LENGTH))
+        self.assertEqual(cooldowns.FreeAt(blank), 10 + spawn_pipeline.BLANK_POINT_COOLDOWN)
+
+    def test_release(self):
+        cooldowns = PointCooldowns()
+        point = FakePoint("PopPointDef_Drop")
+        cooldowns.Use(point, 10)
+        cooldowns.Release(point)
+        self.assertTrue(cooldowns.IsFree(point, 10))
+
+    def test_pick_prefers_unplanned_then_free(self):
+        cooldowns = PointCooldowns()
+        (busy, free) = (FakePoint("A"), FakePoint("B"))
+        cooldowns.Use(busy, 0)
+        planned = {}
+        self.assertIs(cooldowns.PickPoint([busy, free], 1, planned), free)
+        # The group has used the free point now, so the busy one is the least used
+        self.assertIs(cooldowns.PickPoint([busy, free], 1, planned), busy)
+        self.assertEqual(planned, {free: 1, busy: 1})
+
+
+class SpawnPipelineTests(unittest.TestCase):
+    def test_concurrent_batch_limit(self):
+        pipeline = SpawnPipeline(maxBatches=2)
+        for den in ("den1", "den2"):
+            self.assertTrue(pipeline.Add(SpawnBatch(den, Entries([FakePoint()]), 0)))
+        self.assertTrue(pipeline.IsFull())
+
+    def test_same_den_refused(self):
+        pipeline = SpawnPipeline()
+        self.assertTrue(pipeline.Add(SpawnBatch("den", Entries([FakePoint()]), 0)))
+        self.assertTrue(pipeline.IsDenBusy("den"))
+        self.assertFalse(pipeline.Add(SpawnBatch("den", Entries([FakePoint()]), 0)))
+        self.assertEqual(len(pipeline), 1)
+        # Once that group is done, the den can spawn again
+        pipeline.PopDue(0)
+        self.assertFalse(pipeline.IsDenBusy("den"))
+        self.assertTrue(pipeline.Add(SpawnBatch("den", Entries([FakePoint()]), 1)))
+
+    def test_empty_batch_not_added(self):
+        pipeline = SpawnPipeline()
+        self.assertFalse(pipeline.Add(SpawnBatch("den", [], 0)))
+        self.assertIsNone(pipeline.NextDeadline())
+
+    def test_rate_cap(self):
+        pipeline = SpawnPipeline(maxBatches=3, maxSpawnsPerSecond=2)
+        for den in ("den1", "den2", "den3"):
+            pipeline.Add(SpawnBatch(den, Entries([FakePoint(), FakePoint()], delay=0), 0))
+        self.assertEqual(len(pipeline.PopDue(0)), 2)
+        # The cap holds for a second after those spawns
+        self.assertEqual(pipeline.PopDue(0.5), [])
+        self.assertEqual(pipeline.NextDeadline(), 1)
+        self.assertEqual(len(pipeline.PopDue(1)), 2)
+
+    def test_delays_and_limit(self):
+        pipeline = SpawnPipeline()
+        points = [FakePoint() for _ in range(5)]
+        pipeline.Add(SpawnBatch("den", Entries(points, delay=0.5), 0, limit=3))
+        self.assertEqual(pipeline.GetPendingCount(), 3)
+        self.assertEqual(len(pipeline.PopDue(0)), 1)
+        self.assertEqual(pipeline.NextDeadline(), 0.5)
+        self.assertEqual(pipeline.PopDue(0.4), [])
+        self.assertEqual(len(pipeline.PopDue(0.5)), 1)
+        self.assertEqual(len(pipeline.PopDue(1)), 1)
+        self.assertEqual(len(pipeline), 0)
+
+    def test_waits_for_busy_point(self):
+        pipeline = SpawnPipeline()
+        point = FakePoint("PopPointDef_Drop")
+        pipeline.Add(SpawnBatch("den1", Entries([point], delay=0), 0))
+        pipeline.PopDue(0)
+        pipeline.Add(SpawnBatch("den2", Entries([point], delay=0), 0))
+        self.assertEqual(pipeline.PopDue(1), [])
+        self.assertEqual(pipeline.NextDeadline(), spawn_pipeline.SPAWN_ANIM_LENGTH)
+        self.assertEqual(len(pipeline.PopDue(spawn_pipeline.SPAWN_ANIM_LENGTH)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Tests which points the ViewFrustum counts as in view, and that the VisibilityCache only tests each location once.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import math
+import random
+import unittest
+from unittest import mock
+
+import sdk_stubs
+from Mods.AmbientSpawns import spawn_geometry, visibility
+from Mods.AmbientSpawns.spawn_geometry import LocationTable
+from Mods.AmbientSpawns.visibility import ViewFrustum, VisibilityCache
+
+
+def Table(locations, testFOV=None) -> LocationTable:
+    return LocationTable(locations, testFOV if testFOV is not None else [True] * len(locations))
+
+
+class ViewFrustumTests(unittest.TestCase):
+    def setUp(self):
+        # Looking along +X with a 90 degree FOV, so 55 degrees each side with the margin,
+        #  and about 39 degrees up and down at 16:9
+        self.frustum = ViewFrustum(0, 0, 0, 0, 0, 90)
+
+    def test_inside_and_outside(self):
+        inside = [(1000, 0, 0), (1000, 1000, 0), (1000, -1000, 0), (1000, 0, 700), (1000, 0, -700), (50000, 100, 100)]
+        outside = [(-1000, 0, 0), (0, 1000, 0), (1000, 2000, 0), (1000, -2000, 0), (1000, 0, 1000), (1000, 0, -1000)]
+        for point in inside:
+            self.assertTrue(self.frustum.Contains(*point), point)
+        for point in outside:
+            self.assertFalse(self.frustum.Contains(*point), point)
+
+    def test_at_the_camera(self):
+        self.assertFalse(self.frustum.Contains(0, 0, 0))
+
+    def test_turned(self):
+        # Standing somewhere else, facing +Y
+        frustum = ViewFrustum(500, 500, 100, 0, math.pi / 2, 90)
+        self.assertTrue(frustum.Contains(500, 1500, 100))
+        self.assertFalse(frustum.Contains(1500, 500, 100))
+        self.assertFalse(frustum.Contains(500, -500, 100))
+
+    def test_looking_up(self):
+        frustum = ViewFrustum(0, 0, 0, math.radians(80), 0, 90)
+        self.assertTrue(frustum.Contains(100, 0, 1000))
+        self.assertFalse(frustum.Contains(1000, 0, 0))
+
+    def test_margin(self):
+        # 50 degrees to the side is only in view thanks to the margin
+        point = (1000, math.tan(math.radians(50)) * 1000, 0)
+        self.assertTrue(self.frustum.Contains(*point))
+        self.assertFalse(ViewFrustum(0, 0, 0, 0, 0, 90, marginDegrees=0).Contains(*point))
+
+    def test_unreal_angles(self):
+        self.assertAlmostEqual(visibility.UnrealAngleToRadians(16384), math.pi / 2)
+        self.assertAlmostEqual(visibility.UnrealAngleToRadians(49152), -math.pi / 2)
+        self.assertAlmostEqual(visibility.UnrealAngleToRadians(-16384), -math.pi / 2)
+        self.assertAlmostEqual(visibility.UnrealAngleToRadians(65536 + 8192), math.pi / 4)
+
+    def test_contains_many_matches_contains(self):
+        rng = random.Random(5)
+        locations = [(rng.uniform(-5000, 5000), rng.uniform(-5000, 5000), rng.uniform(-2000, 2000)) for _ in range(500)]
+        frustum = ViewFrustum(100, -200, 50, 0.3, 2.0, 75)
+        indexes = list(range(0, 500, 3))
+        expected = [frustum.Contains(*locations[i]) for i in indexes]
+        self.assertIn(True, expected)
+        self.assertIn(False, expected)
+        self.assertEqual(frustum.ContainsMany(Table(locations), indexes), expected)
+        self.assertEqual(frustum.ContainsMany(Table(locations), []), [])
+
+
+class VisibilityCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.table = Table([(1000, 0, 0), (-1000, 0, 0), (1000, 100, 0), (0, 0, 5000)], [True, True, False, True])
+        self.frustum = ViewFrustum(0, 0, 0, 0, 0, 90)
+        patcher = mock.patch.object(self.frustum, "ContainsMany", wraps=self.frustum.ContainsMany)
+        self.containsMany = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = VisibilityCache(self.frustum, self.table)
+
+    def test_only_tests_each_location_once(self):
+        self.assertEqual(self.cache.Test([0, 1]), [True, False])
+        self.assertEqual(self.cache.Test([1, 3, 0]), [False, False, True])
+        self.assertEqual([list(call.args[1]) for call in self.containsMany.call_args_list], [[0, 1], [3]])
+        self.cache.Test([3, 1])
+        self.assertEqual(self.containsMany.call_count, 2)
+
+    def test_prefetch_skips_locations_without_the_fov_check(self):
+        self.cache.Prefetch(range(4))
+        self.assertEqual(set(self.cache.visible), {0, 1, 3})
+
+
+def PatchOutNumPy(test: unittest.TestCase):
+    for module in (spawn_geometry, visibility):
+        patcher = mock.patch.object(module, "np", None)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+class ViewFrustumPythonTests(ViewFrustumTests):
+    """The same, with the pure Python fallback for when NumPy isn't installed"""
+    def setUp(self):
+        PatchOutNumPy(self)
+        super().setUp()
+
+
+class VisibilityCachePythonTests(VisibilityCacheTests):
+    """The same, with the pure Python fallback for when NumPy isn't installed"""
+    def setUp(self):
+        PatchOutNumPy(self)
+        super().setUp()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Tests sampling from WeightedTable's cumulative weights, including items with no weight.
+Run from the repository root with: python -m unittest discover -s tests/AmbientSpawns
+"""
+import random
+import unittest
+from collections import Counter
+
+import sdk_stubs
+from Mods.AmbientSpawns.weighted_tables import WeightedTable
+
+
+class WeightedTableTests(unittest.TestCase):
+    def setUp(self):
+        random.seed(4)
+
+    def test_zero_weights_never_picked(self):
+        table = WeightedTable(["a", "never", "b", "never either"], [1, 0, 3, 0])
+        self.assertEqual(table.GetTotal(), 4)
+        picks = Counter(table.Picks(4000))
+        self.assertEqual(set(picks), {"a", "b"})
+        # About three times as many of b as a
+        self.assertAlmostEqual(picks["b"] / picks["a"], 3, delta=0.5)
+
+    def test_zero_weight_at_the_ends(self):
+        table = WeightedTable(["first", "only", "last"], [0, 2, 0])
+        self.assertEqual({table.Pick() for _ in range(200)}, {"only"})
+
+    def test_all_zero_weights(self):
+        table = WeightedTable(["a", "b"], [0, 0])
+        self.assertEqual(table.GetTotal(), 0)
+        self.assertIsNone(table.Pick())
+        self.assertEqual(table.Picks(3), [])
+
+    def test_empty(self):
+        table = WeightedTable([], [])
+        self.assertEqual(len(table), 0)
+        self.assertIsNone(table.Pick())
+
+    def test_mismatched_weights(self):
+        with self.assertRaises(ValueError):
+            WeightedTable(["a", "b"], [1])
+
+    def test_rebuild(self):
+        table = WeightedTable(["a", "b"], [1, 0])
+        table.Build(["a", "b"], [0, 1])
+        self.assertEqual({table.Pick() for _ in range(50)}, {"b"})
+
+
+if __name__ == "__main__":
+    unittest.main()